@@ -1,7 +1,12 @@
 """AiBot class definition."""
 
-from openai import AsyncOpenAI, OpenAI
-import json
+import time
+
+from app.core.ai_bot.client_registry import OpenAIClientRegistry
+from app.core.ai_bot.openai_provider import OpenAIProvider
+from app.core.ai_bot.pipeline import Pipeline, PipelineStage
+from app.core.ai_bot.post_plan import PostPlanError, parse_post_captions, parse_post_plan
+from app.core.ai_bot.prompt_registry import PromptRegistry
 from app.core.utility.logger_setup import get_logger
 
 log = get_logger()
@@ -13,10 +18,6 @@ class AiBot:
     mood = None
     tone = None
     description = None
-    undersantIntent = None
-    createCaptionPrompt = None
-    createImagePrompt = None
-    createInstagramCaption = None
     textPrompt = None
     imagePrompt = None
     intent = None
@@ -25,60 +26,50 @@ class AiBot:
     elevatedImagePrompt = None
     instagramCaption = None
 
-    def __init__(self, api_key, mood, tone, description, businessInfo):
+    # DALL-E image URLs expire after an hour, never serve one close to expiry
+    IMAGE_URL_TTL_SECONDS = 45 * 60
+    # Completion tokens budgeted per chat call until the actual usage is known
+    CHAT_COMPLETION_TOKEN_ESTIMATE = 500
+    # "full" chains four chat calls, "fast" plans the post in one JSON-mode call
+    PROFILES = ("full", "fast")
+
+    def __init__(
+        self,
+        api_key,
+        mood,
+        tone,
+        description,
+        businessInfo,
+        provider=None,
+        cache=None,
+        cache_bypass=(),
+        prompts=None,
+        on_token=None,
+        scheduler=None,
+        profile="full",
+        image_store=None,
+    ):
         log.debug("AiBot: Initiating ...")
+        if profile not in self.PROFILES:
+            raise ValueError(f"Unknown pipeline profile: {profile}")
         self.api_key = api_key
+        self.profile = profile
+        # Local copy of generated images, upstream image URLs expire
+        self.image_store = image_store
+        self.provider = provider
+        self.cache = cache
+        self.cache_bypass = set(cache_bypass)
+        self.prompts = prompts if prompts is not None else PromptRegistry()
+        # Called with (stage, text) for every streamed chat token, chat calls stream if set
+        self.on_token = on_token
+        # Rate budget and retries of API calls, e.g. for batch runs
+        self.scheduler = scheduler
+        # Queue time, token usage, retries and cache use of each stage
+        self.stage_metrics = {}
         self.mood = mood
         self.tone = tone
         self.description = description
         self.businessInfo = businessInfo
-        self.undersantIntent = f"""system:
-You will receive a question and you will extract the meaning. Add additional context that would help explain and expand on the meaning included.
-Only take the meaning and return the expanded meaning without any other text. Let's make sure we
-take a deep breath and think step by step. Only respond with the expanded understanding.
-
-human: I want to create an instagram post about real estate
-agent: Elaborate an instagram post that follows best practices and is witty, interesting and appealing. The topic of the post is Real Estate.
-
-human: I want to create an instagram post about technology
-agent: Create an engaging and visually appealing Instagram post that centers around the topic of technology. Consider incorporating current tech trends or news, highlighting a new gadget or app, or showcasing how technology has impacted daily life. Use a creative and witty caption to grab the attention of your audience and encourage engagement with your post. To make your post stand out, you can also experiment with unique filters or editing techniques.
-
-human: I want to create a blog about how hackatons are cool
-agent: Write a blog post that highlights the benefits and excitement of participating in hackathons. Discuss the collaborative environment and the opportunity to work with like-minded individuals. Share success stories of previous hackathon participants and the innovative solutions that were created. Include tips for those who are new to hackathons, such as how to prepare and what to expect. Use a conversational tone and personal anecdotes to make the post relatable and engaging for your audience. Consider incorporating visuals, such as photos or videos, to showcase the energy and creativity that can be found at hackathons.
-
-user: { self.description}  make sure to base it on the { self.businessInfo }."""
-        self.createCaptionPrompt = f"""system:
-You are an AI assistant that writes prompts that produce outstanding Instagram captions. You will take the input and return a prompt ready to go into the next agent to actually produce a caption. Let's think step by step. ONLY RETURN THE PROMPT.
-
-human: I want to do an Instagram caption about real estate.
-agent: Craft an Instagram caption that showcases the beauty and diversity of the world of real estate. Highlight the unique features of your property, such as the stunning views, the stylish interiors, or the spacious layout. Use emotive language to evoke a sense of desire and aspiration in your followers, inspiring them to imagine themselves living in your property. Add a touch of personality to your caption, reflecting your unique style and perspective on the real estate market. End your caption with a clear call-to-action, such as "Book a viewing today!" or "Click the link in our bio to learn more."
-
-human: I want to do an instragram caption about hackaton.
-agent: Craft an Instagram caption that brings the high-energy, creative world of hackathons to life. Highlight the unique moments that make hackathons so unforgettable - from the initial spark of an idea to the adrenaline rush of a breakthrough. Use humor to celebrate the quirks of hackathon culture, like the endless supply of caffeine and pizza that fuels late-night coding sessions. Let the caption inspire your followers to join the hackathon community, where innovation thrives, creativity reigns, and solutions are born.
-
-user:
-I want to do an instragram caption about { self.intent } make sure to base it on the { self.businessInfo }."""
-        self.createImagePrompt = f"""system:
-You are an AI assistant that writes prompts that produce outstanding Instagram images. You will take the input and return a prompt ready to go into the next agent to actually produce an image. Let's think step by step. ONLY RETURN THE PROMPT.
-
-human: Create an image for Dalle-3 that has a beautiful house.
-agent: Generate an image of a beautiful, modern house at sunset. The house should have large glass windows reflecting the orange and pink hues of the sky, surrounded by lush, manicured gardens. Include a cobblestone pathway leading up to a grand, wooden front door, with soft, warm lighting coming from inside the house. The surrounding landscape should feature a variety of greenery, including tall trees, flowering bushes, and a well-kept lawn. In the background, there should be a view of distant mountains, adding to the serene and picturesque setting.
-human: Create an image for Dalle-3 that has an alien on the moon.
-agent: Generate an image of an alien standing on the moon's surface, gazing at Earth. The alien should be humanoid, with a sleek, metallic suit reflecting the moon's gray terrain and Earth's blue hues in the distance. Its eyes, large and luminous, should express curiosity and wonder. The lunar landscape around the alien should feature detailed craters, rocks, and the iconic footprints of the first astronauts. In the background, the Earth should rise, full and vibrant, casting a soft light over the scene. The sky should be a deep, star-filled black, highlighting the isolation and beauty of the moon.
-
-user: Create an image about { self.intent } for the { self.modelName } image generator make sure to base it on the { self.businessInfo }.
-The tone should be {self.tone} and the mood should be {self.mood}
-"""
-        self.createInstagramCaption = f"""system:
-You are an AI assistant act as an expert in social media and content generation.
-You are tasked with generating three engaging, creative, and potentially viral captions for Instagram posts.
-The captions MUST be based on the provided topic, adhere to the specified tone, include a compelling call to action and appropriate keywords and hashtags.
-They must be concise, align with Instagram's community guidelines, and be tailored to resonate with a broad social media audience.
-Do the best you can with the information you have to immediately create the captions. Return ONLY the captions in a JSON format.
-
-human: Craft a caption about technology.
-agent: {{ "caption1": "This is the first caption", "caption2": "This is the second caption", "caption3": "This is the third caption"}}
-user: { self.elevatedPrompt }"""
         self.textPrompt = f"""Create an Instagram post given the following information.
     Use the description as a general guideline about the topic.
     The post should have the goal of becoming as viral as possible.
@@ -93,66 +84,316 @@ user: { self.elevatedPrompt }"""
     async def understand_intent(self):
         """Understand Intent"""
         log.info("AiBot: Understanding intent ...")
-        client = self.get_connected_client()
-        result = await client.chat.completions.create(
-            model="gpt-3.5-turbo", messages=[{"role": "user", "content": self.undersantIntent}]
+        prompt = self.prompts.render(
+            "UnderstandIntent", message=self.description, business_info=self.businessInfo
         )
-        self.intent = result.choices[0].message.content
-        return result.choices[0].message.content
+        self.intent = await self._chat("intent", prompt)
+        return self.intent
     
     async def create_prompt_caption(self):
         """Create prompt that will generate an Instagram caption to pass on to subsecuent agents"""
         log.info("AiBot: Creating prompt caption ...")
-        client = self.get_connected_client()
-        result = await client.chat.completions.create(
-            model="gpt-3.5-turbo", messages=[{"role": "user", "content": self.createCaptionPrompt}]
+        prompt = self.prompts.render(
+            "CreateCaptionPrompt", topic=self.intent, business_info=self.businessInfo
         )
-        self.elevatedPrompt = result.choices[0].message.content
-        return result.choices[0].message.content
+        self.elevatedPrompt = await self._chat("caption_prompt", prompt)
+        return self.elevatedPrompt
 
     async def create_prompt_image(self):
         """Create prompt that will generate an Instagram image to pass on to subsecuent agents"""
         log.info("AiBot: Creating prompt image ...")
-        client = self.get_connected_client()
-        result = await client.chat.completions.create(
-            model="gpt-3.5-turbo", messages=[{"role": "user", "content": self.createImagePrompt}]
+        prompt = self.prompts.render(
+            "CreateImagePrompt",
+            topic=self.intent,
+            model_name=self.modelName,
+            business_info=self.businessInfo,
+            tone=self.tone,
+            mood=self.mood,
         )
-        self.elevatedImagePrompt = result.choices[0].message.content
-        return result.choices[0].message.content
+        self.elevatedImagePrompt = await self._chat("image_prompt", prompt)
+        return self.elevatedImagePrompt
     
     async def create_instagram_caption(self):
         """Generate an Instagram caption"""
         log.info("AiBot: Creating instagram caption ...")
-        client = self.get_connected_client()
-        result = await client.chat.completions.create(
-            model="gpt-3.5-turbo", messages=[{"role": "user", "content": self.createInstagramCaption}]
+        prompt = self.prompts.render(
+            "CreateInstagramCaption",
+            elevatedPrompt=self.elevatedPrompt,
+            business_info=self.businessInfo,
         )
-        result_dict = json.loads(result.choices[0].message.content)
+        content = await self._chat("caption", prompt, validate=parse_post_captions)
+        result_dict = parse_post_captions(content).model_dump()
         log.debug(f"Returned captions: {result_dict}")
         self.instagramCaption = result_dict
         return result_dict
     
+    async def create_post_plan(self):
+        """Generate intent, captions and image prompt in a single JSON-mode call"""
+        log.info("AiBot: Creating post plan ...")
+        prompt = self.prompts.render(
+            "CreatePostPlan",
+            message=self.description,
+            model_name=self.modelName,
+            business_info=self.businessInfo,
+            tone=self.tone,
+            mood=self.mood,
+        )
+        plan = parse_post_plan(
+            await self._chat("plan", prompt, json_mode=True, validate=parse_post_plan)
+        )
+        self.intent = plan.intent
+        self.elevatedImagePrompt = plan.image_prompt
+        self.instagramCaption = plan.captions.model_dump()
+        return plan.model_dump()
+
     async def generate_post_content(self):
         """Generate post content."""
         log.info("AiBot: Generating post content ...")
-        client = self.get_connected_client()
-        result = await client.chat.completions.create(
-            model="gpt-3.5-turbo", messages=[{"role": "user", "content": self.textPrompt}]
-        )
-        return result.choices[0].message.content
+        return await self._chat("post_content", self.textPrompt)
 
     async def generate_post_image(self):
-        """Generate post image."""
+        """Generate post image.
+
+        Returns:
+            Path of the local copy if an image store was given, else the upstream URL
+        """
         log.info("AiBot: Generate post image ...")
-        client = self.get_connected_client()
-        response = await client.images.generate(
-            model="dall-e-2",
-            prompt=self.elevatedImagePrompt,
-            size="256x256",
-            quality="standard",
-            n=1,
+        params = {
+            "prompt": self.elevatedImagePrompt,
+            "size": "256x256",
+            "quality": "standard",
+            "n": 1,
+        }
+
+        async def create():
+            provider = self.get_provider()
+            self._stage_metrics("image")["cached"] = False
+            return await self._request(
+                "image", lambda: provider.generate_image("dall-e-2", **params)
+            )
+
+        url = await self._cached(
+            "image", "image", "dall-e-2", params, create, ttl_seconds=self.IMAGE_URL_TTL_SECONDS
         )
-        return response.data[0].url
+        if self.image_store is None:
+            return url
+        return self.image_store.get_url(await self.image_store.save_url(url))
+
+    async def _chat(self, stage, content, model="gpt-3.5-turbo", json_mode=False, validate=None):
+        """Run a single-message chat completion, served from the response cache if possible.
+
+        With `on_token` set the completion is streamed and every token is
+        forwarded. A cached response is forwarded as a single token.
+
+        Args:
+            stage: Pipeline stage name, used for cache bypass and metrics
+            content: Rendered prompt
+            model: Chat model name
+            json_mode: Set True to constrain the output to a JSON object
+            validate: Called with fresh content before it is cached, raise to reject it
+
+        Returns:
+            Message content of the first choice
+        """
+        messages = [{"role": "user", "content": content}]
+        params = {"messages": messages}
+        if json_mode:
+            params["json_mode"] = True
+
+        streamed = False
+        estimated_tokens = len(content) // 4 + self.CHAT_COMPLETION_TOKEN_ESTIMATE
+
+        async def create():
+            nonlocal streamed
+            provider = self.get_provider()
+            metrics = self._stage_metrics(stage)
+            metrics["cached"] = False
+            if self.on_token is None:
+                result = await self._request(
+                    stage, lambda: provider.chat(model, messages, json_mode), estimated_tokens
+                )
+                metrics["prompt_tokens"] += result.prompt_tokens
+                metrics["completion_tokens"] += result.completion_tokens
+                if validate is not None:
+                    validate(result.content)
+                return result.content
+
+            streamed = True
+            parts = []
+            tokens = await self._request(
+                stage, lambda: provider.stream_chat(model, messages, json_mode), estimated_tokens
+            )
+            async for token in tokens:
+                parts.append(token)
+                self.on_token(stage, token)
+            # Streams report no usage, estimate it
+            metrics["prompt_tokens"] += len(messages[0]["content"]) // 4
+            metrics["completion_tokens"] += len("".join(parts)) // 4
+            if validate is not None:
+                validate("".join(parts))
+            return "".join(parts)
+
+        content = await self._cached(stage, "chat", model, params, create)
+        if self.on_token is not None and not streamed:
+            self.on_token(stage, content)
+        return content
+
+    def _stage_metrics(self, stage):
+        """Get the metrics of a stage, creating them if needed."""
+        return self.stage_metrics.setdefault(
+            stage,
+            {
+                "queue_seconds": 0.0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "retries": 0,
+                "cached": self.cache is not None,
+            },
+        )
+
+    async def _request(self, stage, request, estimated_tokens=0):
+        """Send an API request, through the scheduler if one was given.
+
+        Args:
+            stage: Pipeline stage name, used for metrics
+            request: Coroutine function sending the request
+            estimated_tokens: Estimated prompt plus completion tokens
+
+        Returns:
+            API response
+        """
+        if self.scheduler is None:
+            return await request()
+        return await self.scheduler.run(
+            request, estimated_tokens, stats=self._stage_metrics(stage)
+        )
+
+    async def _cached(self, stage, kind, model, params, create, ttl_seconds=None):
+        """Get a response from the cache, or create and cache it.
+
+        Args:
+            stage: Pipeline stage name
+            kind: Kind of call, part of the cache key
+            model: Model name, part of the cache key
+            params: Request parameters, part of the cache key
+            create: Coroutine function calling the API
+            ttl_seconds: Shorter TTL for this lookup
+
+        Returns:
+            Cached or fresh response
+        """
+        if self.cache is None:
+            return await create()
+        key = self.cache.make_key(kind, model, params)
+        bypass = stage in self.cache_bypass or "all" in self.cache_bypass
+        return await self.cache.get_or_create(
+            stage, key, create, bypass=bypass, ttl_seconds=ttl_seconds
+        )
+
+    def build_post_pipeline(self):
+        """Build the post generation stages with their dependencies.
+
+        Caption prompt and image prompt both only need the intent, and caption
+        and image generation are independent of each other, so they run
+        concurrently.
+        """
+        return Pipeline(
+            [
+                PipelineStage("intent", self.understand_intent),
+                PipelineStage("caption_prompt", self.create_prompt_caption, ["intent"]),
+                PipelineStage("image_prompt", self.create_prompt_image, ["intent"]),
+                PipelineStage("caption", self.create_instagram_caption, ["caption_prompt"]),
+                PipelineStage("image", self.generate_post_image, ["image_prompt"]),
+            ]
+        )
+
+    def build_fast_pipeline(self):
+        """Build the post generation stages of the "fast" profile.
+
+        One JSON-mode chat call plans intent, captions and image prompt, so
+        image generation starts after a single chat round trip.
+        """
+        return Pipeline(
+            [
+                PipelineStage("plan", self.create_post_plan),
+                PipelineStage("image", self.generate_post_image, ["plan"]),
+            ]
+        )
+
+    async def generate_post(self, on_stage_done=None, on_stage_start=None):
+        """Run all post generation stages of the selected profile.
+
+        If the plan of the "fast" profile fails to parse or validate, the
+        "full" chain runs instead and "profile" of the result says so.
+
+        Args:
+            on_stage_done: Coroutine function called with the name and result of each finished stage
+            on_stage_start: Coroutine function called with the name of each starting stage
+
+        Returns:
+            Result of every stage by stage name, stage timings under "timings",
+            per stage metrics (see `get_stage_metrics`) under "metrics" and
+            the profile that produced the post under "profile"
+        """
+        log.info(f"AiBot: Generating post with the {self.profile} profile ...")
+        fallback_timings = {}
+        if self.profile == "fast":
+            pipeline = self.build_fast_pipeline()
+            start_time = time.perf_counter()
+            try:
+                results = await pipeline.run(
+                    on_stage_done=on_stage_done, on_stage_start=on_stage_start
+                )
+            except PostPlanError as error:
+                log.warning(f"AiBot: Falling back to the full profile: {error}")
+                fallback_timings["plan"] = {
+                    "start": 0.0,
+                    "duration": time.perf_counter() - start_time,
+                }
+            else:
+                plan = results["plan"]
+                results.update(
+                    intent=plan["intent"],
+                    caption=plan["captions"],
+                    image_prompt=plan["image_prompt"],
+                    timings=pipeline.timings,
+                    metrics=self.get_stage_metrics(pipeline.timings),
+                    profile="fast",
+                )
+                return results
+
+        pipeline = self.build_post_pipeline()
+        results = await pipeline.run(on_stage_done=on_stage_done, on_stage_start=on_stage_start)
+        if fallback_timings:
+            # The failed plan call is part of the cost of this post
+            offset = fallback_timings["plan"]["duration"]
+            for timing in pipeline.timings.values():
+                timing["start"] += offset
+            pipeline.timings["total"]["start"] = 0.0
+            pipeline.timings["total"]["duration"] += offset
+            pipeline.timings.update(fallback_timings)
+        results["timings"] = pipeline.timings
+        results["metrics"] = self.get_stage_metrics(pipeline.timings)
+        results["profile"] = "full"
+        return results
+
+    def get_stage_metrics(self, timings):
+        """Combine stage timings with queue time, token usage, retries and cache use.
+
+        Args:
+            timings: Stage timings of the pipeline run
+
+        Returns:
+            Metrics by stage name, wall time in "wall_seconds"
+        """
+        return {
+            stage: {"wall_seconds": timing["duration"], **self._stage_metrics(stage)}
+            for stage, timing in timings.items()
+            if stage != "total"
+        }
 
-    def get_connected_client(self):
-        return AsyncOpenAI(api_key=self.api_key)
+    def get_provider(self):
+        """Get the shared provider if one was given, else a new OpenAI one."""
+        if self.provider is None:
+            self.provider = OpenAIProvider(OpenAIClientRegistry(api_key=self.api_key))
+        return self.provider
@@ -0,0 +1,83 @@
+"""Interface shared by all AI providers."""
+
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, List
+
+
+class ChatResult:
+    """Content and token usage of a chat completion."""
+
+    def __init__(self, content: str, prompt_tokens: int = 0, completion_tokens: int = 0) -> None:
+        """Run Constructor.
+
+        Args:
+            content: Message content of the first choice
+            prompt_tokens: Number of prompt tokens
+            completion_tokens: Number of completion tokens
+        """
+        self.content = content
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+    @property
+    def total_tokens(self) -> int:
+        """Number of prompt plus completion tokens."""
+        return self.prompt_tokens + self.completion_tokens
+
+
+class BaseProvider(ABC):
+    """Interface shared by all AI providers.
+
+    NOTE:
+        Providers raise `openai` API errors, so retry and error handling
+        does not depend on the provider in use.
+    """
+
+    name = "base"
+
+    async def open(self) -> None:
+        """Open connections, called on application start up."""
+
+    async def close(self) -> None:
+        """Close connections, called on application shutdown."""
+
+    @abstractmethod
+    async def chat(self, model: str, messages: List[dict], json_mode: bool = False) -> ChatResult:
+        """Run a chat completion.
+
+        Args:
+            model: Chat model name
+            messages: Chat messages
+            json_mode: Set True to constrain the output to a JSON object
+
+        Returns:
+            Content and token usage of the completion
+        """
+
+    @abstractmethod
+    async def stream_chat(
+        self, model: str, messages: List[dict], json_mode: bool = False
+    ) -> AsyncIterator[str]:
+        """Start a streamed chat completion.
+
+        Args:
+            model: Chat model name
+            messages: Chat messages
+            json_mode: Set True to constrain the output to a JSON object
+
+        Returns:
+            Iterator over content tokens, once the request was accepted
+        """
+
+    @abstractmethod
+    async def generate_image(self, model: str, prompt: str, **params: object) -> str:
+        """Generate an image.
+
+        Args:
+            model: Image model name
+            prompt: Image prompt
+            params: Further request parameters, e.g. size, quality and n
+
+        Returns:
+            URL of the first image
+        """
@@ -0,0 +1,178 @@
+"""Batch post generation with bounded concurrency."""
+
+import asyncio
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from app.core.utility.logger_setup import get_logger
+from app.core.utility.utils import overwrite_json_file, read_json_file
+
+log = get_logger()
+
+
+class BatchRunner:
+    """Run post generation for many businesses at once.
+
+    NOTE:
+        At most `concurrency` items of a batch run at the same time. The
+        request and token budget is enforced by the scheduler of the AI
+        pipeline, not here. Progress is written to one JSON file per batch
+        after every item, so it can be read by any worker. Progress files not
+        updated for `status_ttl_seconds` are deleted whenever a batch starts.
+    """
+
+    def __init__(
+        self,
+        run_item: Callable[[dict], Awaitable[bool]],
+        status_dirpath: str,
+        concurrency: int = 16,
+        status_ttl_seconds: float = 7 * 86400.0,
+        get_retries: Optional[Callable[[], int]] = None,
+    ) -> None:
+        """Run Constructor.
+
+        Args:
+            run_item: Coroutine function running one item, returns True on success
+            status_dirpath: Directory of the batch progress files
+            concurrency: Maximum number of items run at the same time
+            status_ttl_seconds: Seconds a progress file is kept after its last update
+            get_retries: Callable returning the number of API retries so far
+        """
+        self.run_item = run_item
+        self.status_dirpath = status_dirpath
+        self.concurrency = concurrency
+        self.status_ttl_seconds = status_ttl_seconds
+        self.get_retries = get_retries or (lambda: 0)
+        self._tasks: Set[asyncio.Task] = set()
+        os.makedirs(status_dirpath, exist_ok=True)
+
+    def _status_filepath(self, batch_id: str) -> str:
+        """Get the progress file path of a batch."""
+        return os.path.join(self.status_dirpath, f"{batch_id}.json")
+
+    def _write_status(self, status: dict) -> None:
+        """Atomically replace the progress file of a batch."""
+        status_filepath = self._status_filepath(status["batch_id"])
+        temp_filepath = f"{status_filepath}.{os.getpid()}.tmp"
+        if overwrite_json_file(temp_filepath, status):
+            os.replace(temp_filepath, status_filepath)
+
+    def _prune_statuses(self) -> int:
+        """Delete progress files, and leftover temporary files, not updated within the TTL.
+
+        Returns:
+            Number of deleted files
+        """
+        expires_before = time.time() - self.status_ttl_seconds
+        pruned = 0
+        for entry in os.scandir(self.status_dirpath):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < expires_before:
+                    os.remove(entry.path)
+                    pruned += 1
+            except FileNotFoundError:
+                # Pruned by another worker at the same time
+                continue
+        if pruned:
+            log.info(f"Pruned {pruned} expired batch progress files")
+        return pruned
+
+    def start(self, items: List[dict], concurrency: Optional[int] = None) -> str:
+        """Start a batch in the background.
+
+        Args:
+            items: Items passed to `run_item`, each with a "business_id"
+            concurrency: Maximum number of items run at once, defaults to the runner's
+
+        Returns:
+            Batch ID
+        """
+        self._prune_statuses()
+        batch_id = uuid.uuid4().hex
+        status = {
+            "batch_id": batch_id,
+            "status": "running",
+            "total": len(items),
+            "succeeded": 0,
+            "failed": 0,
+            "running": 0,
+            "failed_ids": [],
+            "retries": 0,
+            "started_at": time.time(),
+            "finished_at": None,
+            "items_per_minute": 0.0,
+            "eta_seconds": None,
+        }
+        self._write_status(status)
+        log.info(f"Batch {batch_id}: Starting {len(items)} items ...")
+
+        task = asyncio.create_task(self._run(status, items, concurrency or self.concurrency))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return batch_id
+
+    async def _run(self, status: dict, items: List[dict], concurrency: int) -> None:
+        """Run all items of a batch and keep its progress file up to date."""
+        semaphore = asyncio.Semaphore(concurrency)
+        retries_at_start = self.get_retries()
+
+        def update_progress() -> None:
+            finished = status["succeeded"] + status["failed"]
+            elapsed = time.time() - status["started_at"]
+            status["retries"] = self.get_retries() - retries_at_start
+            status["items_per_minute"] = finished / elapsed * 60 if elapsed else 0.0
+            status["eta_seconds"] = (
+                (status["total"] - finished) / finished * elapsed if finished else None
+            )
+            self._write_status(status)
+
+        async def run_one(item: dict) -> None:
+            async with semaphore:
+                status["running"] += 1
+                try:
+                    success = await self.run_item(item)
+                except Exception as error:  # pylint: disable=broad-except
+                    log.exception(f"Batch {status['batch_id']}: Item failed: {error}")
+                    success = False
+                status["running"] -= 1
+                if success:
+                    status["succeeded"] += 1
+                else:
+                    status["failed"] += 1
+                    status["failed_ids"].append(item["business_id"])
+                update_progress()
+
+        try:
+            await asyncio.gather(*(run_one(item) for item in items))
+            status["status"] = "done"
+        except asyncio.CancelledError:
+            status["status"] = "cancelled"
+            raise
+        finally:
+            status["finished_at"] = time.time()
+            update_progress()
+            log.info(
+                f"Batch {status['batch_id']}: {status['status']}, "
+                f"{status['succeeded']} succeeded, {status['failed']} failed"
+            )
+
+    def get_status(self, batch_id: str) -> Optional[Dict]:
+        """Get the progress of a batch.
+
+        Args:
+            batch_id: Batch ID
+
+        Returns:
+            Batch progress, None if not found
+        """
+        if not batch_id.isalnum():
+            return None
+        return read_json_file(self._status_filepath(batch_id))
+
+    async def stop(self) -> None:
+        """Cancel all running batches of this worker."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
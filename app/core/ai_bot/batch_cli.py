@@ -0,0 +1,77 @@
+"""Submit a batch post request and report its progress.
+
+Usage:
+    python -m app.core.ai_bot.batch_cli --ids-file ids.txt --mood happy --tone witty --description "Summer sale"
+"""
+
+import argparse
+import sys
+import time
+from typing import List
+
+import httpx
+
+
+def read_business_ids(ids: str, ids_filepath: str) -> List[str]:
+    """Collect business IDs from a comma separated list and/or a file with one ID per line."""
+    business_ids = [business_id.strip() for business_id in (ids or "").split(",")]
+    if ids_filepath:
+        with open(ids_filepath, "r", encoding="utf-8") as ids_file:
+            business_ids.extend(line.strip() for line in ids_file)
+    return [business_id for business_id in business_ids if business_id]
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:9500", help="Backend API base URL")
+    parser.add_argument("--ids", help="Comma separated business IDs")
+    parser.add_argument("--ids-file", help="File with one business ID per line")
+    parser.add_argument("--mood", required=True)
+    parser.add_argument("--tone", required=True)
+    parser.add_argument("--description", required=True)
+    parser.add_argument("--cache-bypass", help="Comma separated stages to regenerate, or all")
+    parser.add_argument("--concurrency", type=int, help="Maximum businesses run at once")
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds between reports")
+    args = parser.parse_args()
+
+    business_ids = read_business_ids(args.ids, args.ids_file)
+    if not business_ids:
+        parser.error("No business IDs given, use --ids and/or --ids-file")
+
+    with httpx.Client(base_url=args.url, timeout=30.0) as client:
+        response = client.post(
+            "/ai_api/send_batch_post_request",
+            json={
+                "business_ids": business_ids,
+                "mood": args.mood,
+                "tone": args.tone,
+                "description": args.description,
+                "cache_bypass": args.cache_bypass,
+                "concurrency": args.concurrency,
+            },
+        )
+        response.raise_for_status()
+        batch_id = response.json()["batch_id"]
+        print(f"Batch {batch_id}: {len(business_ids)} businesses submitted")
+
+        while True:
+            time.sleep(args.poll_interval)
+            status = client.get("/ai_api/get_batch_status", params={"batch_id": batch_id}).json()
+            eta = status["eta_seconds"]
+            print(
+                f"{status['succeeded'] + status['failed']}/{status['total']} finished "
+                f"({status['succeeded']} ok, {status['failed']} failed, {status['running']} running), "
+                f"{status['items_per_minute']:.1f}/min, {status['retries']} retries, "
+                f"ETA {f'{eta:.0f}s' if eta is not None else '?'}"
+            )
+            if status["status"] != "running":
+                break
+
+    if status["failed_ids"]:
+        print(f"Failed business IDs: {','.join(status['failed_ids'])}")
+    sys.exit(0 if status["status"] == "done" and not status["failed"] else 1)
+
+
+if __name__ == "__main__":
+    main()
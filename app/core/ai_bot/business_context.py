@@ -0,0 +1,157 @@
+"""Compact business context for prompts."""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+ELLIPSIS = "..."
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text, about four characters each."""
+    return (len(text) + 3) // 4
+
+
+def truncate_words(text: str, max_chars: int) -> str:
+    """Shorten a text to at most `max_chars` characters, at a word boundary if possible."""
+    if len(text) <= max_chars:
+        return text
+    if max_chars <= len(ELLIPSIS):
+        return text[:max_chars]
+    cut = text[: max_chars - len(ELLIPSIS)]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip(" ,;:.") + ELLIPSIS
+
+
+def share_chars(lengths: List[int], available: int) -> List[int]:
+    """Split a character budget between fields, capping the longest fields first.
+
+    Args:
+        lengths: Length of each field
+        available: Characters available for all fields together
+
+    Returns:
+        Maximum length of each field, short fields keep their full length
+    """
+    limits = list(lengths)
+    remaining = max(available, 0)
+    order = sorted(range(len(lengths)), key=lambda index: lengths[index])
+    for position, index in enumerate(order):
+        share = remaining // (len(order) - position)
+        limits[index] = min(lengths[index], share)
+        remaining -= limits[index]
+    return limits
+
+
+class BusinessContextBuilder:
+    """Build the business context of prompts within a token budget.
+
+    NOTE:
+        Only the configured fields are used, so credentials, contact details,
+        the last post request and metrics never reach a prompt. The context
+        of each business is cached until one of those fields changes, which
+        also keeps prompts, and so response cache keys, stable between posts.
+        Tokens are estimated from the length, like the budgets of the
+        scheduler, so the budget holds for any model.
+    """
+
+    def __init__(
+        self,
+        fields: Sequence[str] = ("name", "description", "specifics"),
+        max_tokens: int = 256,
+        max_entries: int = 10000,
+    ) -> None:
+        """Run Constructor.
+
+        Args:
+            fields: Business fields to include, in order
+            max_tokens: Token budget of the whole context
+            max_entries: Number of businesses to keep cached contexts for
+        """
+        self.fields = tuple(fields)
+        self.max_tokens = max_tokens
+        self.max_entries = max_entries
+        # Business ID to (projected fields, context), least recently used first
+        self._entries: "OrderedDict[str, Tuple[Dict[str, str], str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.truncated = 0
+
+    def project(self, business_info: dict) -> Dict[str, str]:
+        """Keep only the configured, non empty fields of a business, as text."""
+        return {
+            field: " ".join(str(business_info[field]).split())
+            for field in self.fields
+            if business_info.get(field) not in (None, "")
+        }
+
+    def compact(self, projected: Dict[str, str]) -> str:
+        """Format projected fields, truncating the longest ones to fit the budget.
+
+        Args:
+            projected: Projected business fields
+
+        Returns:
+            Context of at most `max_tokens` estimated tokens
+        """
+        labels = [f"{field.replace('_', ' ').capitalize()}: " for field in projected]
+        values = list(projected.values())
+        context = "; ".join(label + value for label, value in zip(labels, values))
+        max_chars = self.max_tokens * 4
+        if len(context) <= max_chars:
+            return context
+
+        self.truncated += 1
+        overhead = sum(len(label) for label in labels) + 2 * (len(labels) - 1)
+        limits = share_chars([len(value) for value in values], max_chars - overhead)
+        values = [truncate_words(value, limit) for value, limit in zip(values, limits)]
+        return "; ".join(label + value for label, value in zip(labels, values) if value)[:max_chars]
+
+    def build(self, business_info: dict, business_id: Optional[str] = None) -> str:
+        """Get the compact context of a business.
+
+        Args:
+            business_info: Business record
+            business_id: ID of the business, set to cache the context
+
+        Returns:
+            Business context for prompts
+        """
+        projected = self.project(business_info)
+        if business_id is None:
+            return self.compact(projected)
+
+        key = str(business_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == projected:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            context = self.compact(projected)
+            self._entries[key] = (projected, context)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        log.debug(f"Built business context of {key}: {estimate_tokens(context)} estimated tokens")
+        return context
+
+    def get_stats(self) -> dict:
+        """Get cache hits and misses and the number of truncated contexts."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "max_tokens": self.max_tokens,
+                "cached": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "truncated": self.truncated,
+            }
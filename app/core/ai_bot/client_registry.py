@@ -0,0 +1,84 @@
+"""Application scoped OpenAI client."""
+
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI
+
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+
+class OpenAIClientRegistry:
+    """Application scoped OpenAI client.
+
+    NOTE:
+        One `AsyncOpenAI` client, and with it one HTTP connection pool, is
+        shared by every request of a worker. It is opened and closed through
+        the FastAPI lifespan, so connections and TLS sessions are reused
+        across pipeline stages and requests.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 120.0,
+        connect_timeout: float = 10.0,
+    ) -> None:
+        """Run Constructor.
+
+        Args:
+            api_key: OpenAI API key
+            max_connections: Maximum number of concurrent connections
+            max_keepalive_connections: Maximum number of idle connections kept open
+            keepalive_expiry: Seconds an idle connection is kept open
+            timeout: Seconds to wait for a response
+            connect_timeout: Seconds to wait for a connection
+        """
+        self.api_key = api_key
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self._client: Optional[AsyncOpenAI] = None
+
+    def _create_client(self) -> AsyncOpenAI:
+        """Create a client with a tuned connection pool."""
+        return AsyncOpenAI(
+            api_key=self.api_key,
+            timeout=self.timeout,
+            http_client=httpx.AsyncClient(limits=self.limits, timeout=self.timeout),
+        )
+
+    async def open(self) -> None:
+        """Create the shared client and its connection pool."""
+        if self._client is not None:
+            return
+        log.info("Opening shared OpenAI client ...")
+        self._client = self._create_client()
+
+    async def close(self) -> None:
+        """Close the shared client and its connection pool."""
+        if self._client is None:
+            return
+        log.info("Closing shared OpenAI client ...")
+        await self._client.close()
+        self._client = None
+
+    def get_client(self) -> AsyncOpenAI:
+        """Get the shared client.
+
+        Returns:
+            Shared OpenAI client
+        """
+        if self._client is None:
+            # Lifespan did not run (e.g. scripts), open on first use instead
+            log.warning("Shared OpenAI client used before lifespan start up. Opening ...")
+            self._client = self._create_client()
+        return self._client
@@ -0,0 +1,206 @@
+"""Deterministic offline AI provider for load tests and benchmarks."""
+
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import struct
+import zlib
+from collections import OrderedDict
+from typing import AsyncIterator, List, Optional
+
+import httpx
+import openai
+
+from app.core.ai_bot.base_provider import BaseProvider, ChatResult
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+DEFAULT_CAPTIONS = [
+    {
+        "caption1": "Fresh ideas, served daily. Come see what's new! #local #smallbusiness",
+        "caption2": "Your weekend plans just got better. Visit us today! #weekend",
+        "caption3": "Made with care, made for you. Tag a friend who needs this! #community",
+    },
+    {
+        "caption1": "Big news is brewing. Stay tuned and follow along! #comingsoon",
+        "caption2": "Good things come to those who scroll. Link in bio! #newarrivals",
+        "caption3": "Behind every great day is a great plan. Let us help! #goals",
+    },
+]
+
+
+def fake_png(rgb: bytes) -> bytes:
+    """Encode a single pixel PNG of a color, so fake images are real, distinct images."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+        )
+
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(b"\x00" + rgb))
+        + chunk(b"IEND", b"")
+    )
+
+
+class FakeProvider(BaseProvider):
+    """Deterministic offline AI provider for load tests and benchmarks.
+
+    NOTE:
+        Every call sleeps for a latency drawn from the configured
+        distribution and fails with the configured error rate, raising the
+        same `openai` errors as the real API (429 or 500). Draws are seeded
+        from the seed, model, prompt and how often that prompt was seen, so a
+        run is repeatable regardless of request interleaving. Seen counts are
+        kept for the `max_seen_prompts` most recently used prompts only, a
+        prompt unused for longer starts counting again.
+
+        Prompts asking for JSON get one of the canned captions, or a post plan
+        (intent, captions and image prompt) if they ask for an "image_prompt"
+        key. Any other prompt gets a short text derived from its hash. Set
+        `invalid_json_rate` to simulate malformed JSON-mode output.
+    """
+
+    name = "fake"
+
+    DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+    def __init__(
+        self,
+        seed: int = 0,
+        latency_ms: float = 800.0,
+        image_latency_ms: float = 3000.0,
+        latency_distribution: str = "lognormal",
+        latency_sigma: float = 0.5,
+        error_rate: float = 0.0,
+        captions: Optional[List[dict]] = None,
+        invalid_json_rate: float = 0.0,
+        max_seen_prompts: int = 10000,
+    ) -> None:
+        """Run Constructor.
+
+        Args:
+            seed: Seed of all random draws
+            latency_ms: Median latency of chat calls in milliseconds
+            image_latency_ms: Median latency of image calls in milliseconds
+            latency_distribution: "fixed", "uniform" (0 to 2x median) or "lognormal"
+            latency_sigma: Shape of the lognormal distribution
+            error_rate: Fraction of calls failing, between 0 and 1
+            captions: Canned caption dicts, returned for JSON prompts
+            invalid_json_rate: Fraction of JSON-mode responses that are truncated
+            max_seen_prompts: Maximum number of prompts whose seen count is kept
+        """
+        if latency_distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {latency_distribution}")
+        self.seed = seed
+        self.latency_ms = latency_ms
+        self.image_latency_ms = image_latency_ms
+        self.latency_distribution = latency_distribution
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.captions = captions or DEFAULT_CAPTIONS
+        self.invalid_json_rate = invalid_json_rate
+        self.max_seen_prompts = max_seen_prompts
+        self._seen: OrderedDict = OrderedDict()
+        log.info(
+            f"Using fake AI provider: {latency_distribution} latency {latency_ms} ms, "
+            f"error rate {error_rate}"
+        )
+
+    @classmethod
+    def from_captions_file(
+        cls, captions_filepath: Optional[str], **kwargs: object
+    ) -> "FakeProvider":
+        """Create a fake provider with canned captions from a JSON file with a list of captions."""
+        captions = None
+        if captions_filepath:
+            with open(captions_filepath, "r", encoding="utf-8") as captions_file:
+                captions = json.load(captions_file)
+        return cls(captions=captions, **kwargs)
+
+    def _draw(self, model: str, prompt: str) -> random.Random:
+        """Get the random generator of this call."""
+        call_key = hashlib.sha256(f"{model}:{prompt}".encode("utf-8")).hexdigest()
+        seen = self._seen.pop(call_key, 0) + 1
+        self._seen[call_key] = seen
+        if len(self._seen) > self.max_seen_prompts:
+            self._seen.popitem(last=False)
+        digest = hashlib.sha256(f"{self.seed}:{call_key}:{seen}".encode("utf-8"))
+        return random.Random(digest.digest())
+
+    def _latency(self, rng: random.Random, median_ms: float) -> float:
+        """Draw a latency in seconds."""
+        if self.latency_distribution == "fixed":
+            return median_ms / 1000
+        if self.latency_distribution == "uniform":
+            return rng.uniform(0, 2 * median_ms) / 1000
+        return rng.lognormvariate(0, self.latency_sigma) * median_ms / 1000
+
+    async def _simulate(self, rng: random.Random, median_ms: float) -> None:
+        """Wait for the call latency, then fail with the configured error rate."""
+        await asyncio.sleep(self._latency(rng, median_ms))
+        if rng.random() < self.error_rate:
+            status_code = rng.choice((429, 500))
+            response = httpx.Response(
+                status_code, request=httpx.Request("POST", "https://fake-provider.invalid")
+            )
+            error = openai.RateLimitError if status_code == 429 else openai.InternalServerError
+            raise error(f"Fake provider error {status_code}", response=response, body=None)
+
+    def _content(self, rng: random.Random, prompt: str, json_mode: bool = False) -> str:
+        """Build the response content of a prompt."""
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        text = f"Fake response {digest}: an engaging, upbeat post about the business."
+        if "JSON" not in prompt:
+            return text
+        if "image_prompt" in prompt:
+            content = json.dumps(
+                {"intent": text, "captions": rng.choice(self.captions), "image_prompt": text}
+            )
+        else:
+            content = json.dumps(rng.choice(self.captions))
+        if json_mode and rng.random() < self.invalid_json_rate:
+            return content[: len(content) // 2]
+        return content
+
+    async def chat(self, model: str, messages: List[dict], json_mode: bool = False) -> ChatResult:
+        """Run a fake chat completion."""
+        prompt = messages[-1]["content"]
+        rng = self._draw(model, prompt)
+        await self._simulate(rng, self.latency_ms)
+        content = self._content(rng, prompt, json_mode)
+        return ChatResult(
+            content, prompt_tokens=len(prompt) // 4, completion_tokens=len(content) // 4
+        )
+
+    async def stream_chat(
+        self, model: str, messages: List[dict], json_mode: bool = False
+    ) -> AsyncIterator[str]:
+        """Start a fake streamed chat completion, first token after a third of the latency."""
+        prompt = messages[-1]["content"]
+        rng = self._draw(model, prompt)
+        latency = self._latency(rng, self.latency_ms)
+        await self._simulate(rng, 0)
+        await asyncio.sleep(latency / 3)
+        words = self._content(rng, prompt, json_mode).split(" ")
+
+        async def tokens() -> AsyncIterator[str]:
+            for index, word in enumerate(words):
+                await asyncio.sleep(latency * 2 / 3 / len(words))
+                yield word if index == 0 else f" {word}"
+
+        return tokens()
+
+    async def generate_image(self, model: str, prompt: str, **params: object) -> str:
+        """Generate a fake image, as a data URL so it can be fetched offline."""
+        rng = self._draw(model, prompt)
+        await self._simulate(rng, self.image_latency_ms)
+        digest = hashlib.sha256(prompt.encode("utf-8")).digest()
+        png = base64.b64encode(fake_png(digest[:3])).decode("ascii")
+        return f"data:image/png;base64,{png}"
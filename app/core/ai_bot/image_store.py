@@ -0,0 +1,233 @@
+"""Content-addressed local store of generated images."""
+
+import asyncio
+import base64
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import httpx
+
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+EXTENSIONS = {"image/png": ".png", "image/jpeg": ".jpg", "image/webp": ".webp"}
+MEDIA_TYPES = {extension: media_type for media_type, extension in EXTENSIONS.items()}
+NAME_PATTERN = re.compile(r"^([0-9a-f]{64})(\.png|\.jpg|\.webp)$")
+
+
+class ImageStore:
+    """Content-addressed local store of generated images.
+
+    NOTE:
+        Images are fetched once from their short-lived upstream URL and
+        stored under the sha256 of their bytes, so a stored file never
+        changes and can be served as immutable. Reads refresh the file
+        modification time, and writes evict the least recently used files
+        once the store is larger than `max_bytes`. Files are written
+        atomically, so workers sharing the directory never see partial
+        images.
+
+        Each worker tracks the store size from the files it wrote, starting
+        from one directory scan. Only when that total passes `max_bytes` is
+        the directory scanned again, which also picks up the files of other
+        workers, and images are evicted down to `evict_to_ratio` of it.
+    """
+
+    def __init__(
+        self,
+        dirpath: str,
+        max_bytes: int = 1_000_000_000,
+        url_prefix: str = "/ai_api/images",
+        timeout: float = 30.0,
+        max_remembered_urls: int = 10000,
+        evict_to_ratio: float = 0.9,
+    ) -> None:
+        """Create the store directory if needed.
+
+        Args:
+            dirpath: Directory of the image files
+            max_bytes: Size of the store above which images are evicted
+            url_prefix: Path the images are served under
+            timeout: Seconds to wait for an upstream image
+            max_remembered_urls: Number of upstream URLs remembered, to skip refetching them
+            evict_to_ratio: Fraction of `max_bytes` the store is shrunk to when evicting
+        """
+        self.dirpath = dirpath
+        self.max_bytes = max_bytes
+        self.url_prefix = url_prefix.rstrip("/")
+        self.timeout = timeout
+        self.max_remembered_urls = max_remembered_urls
+        self.evict_to_ratio = evict_to_ratio
+        # Upstream URL to stored image name, least recently used first
+        self._names: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        os.makedirs(dirpath, exist_ok=True)
+
+    async def open(self) -> None:
+        """Create the HTTP client fetching upstream images."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout, follow_redirects=True)
+
+    async def close(self) -> None:
+        """Close the HTTP client fetching upstream images."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _download(self, url: str) -> Tuple[bytes, str]:
+        """Get the bytes and media type of an image URL, data URLs included."""
+        if url.startswith("data:"):
+            header, _, payload = url.partition(",")
+            return base64.b64decode(payload), header[len("data:") :].split(";")[0]
+        await self.open()
+        response = await self._client.get(url)
+        response.raise_for_status()
+        return response.content, response.headers.get("content-type", "").split(";")[0]
+
+    async def save_url(self, url: str) -> str:
+        """Fetch an image once and store it.
+
+        Args:
+            url: Upstream image URL
+
+        Returns:
+            Name of the stored image
+        """
+        with self._lock:
+            name = self._names.get(url)
+            if name is not None:
+                self._names.move_to_end(url)
+        if name is not None and self.get_filepath(name) is not None:
+            return name
+
+        data, media_type = await self._download(url)
+        name = await asyncio.to_thread(self.save, data, media_type)
+        with self._lock:
+            self._names[url] = name
+            self._names.move_to_end(url)
+            while len(self._names) > self.max_remembered_urls:
+                self._names.popitem(last=False)
+        return name
+
+    def save(self, data: bytes, media_type: str = "image/png") -> str:
+        """Store image bytes under their hash.
+
+        NOTE:
+            Blocking, run it in a thread from async code.
+
+        Args:
+            data: Image bytes
+            media_type: Media type of the image, unknown types are stored as PNG
+
+        Returns:
+            Name of the stored image
+        """
+        name = hashlib.sha256(data).hexdigest() + EXTENSIONS.get(media_type, ".png")
+        filepath = os.path.join(self.dirpath, name)
+        if os.path.exists(filepath):
+            os.utime(filepath)
+            return name
+
+        fd, temp_filepath = tempfile.mkstemp(dir=self.dirpath, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(temp_filepath, filepath)
+        except BaseException:
+            os.unlink(temp_filepath)
+            raise
+        log.info(f"Stored image {name} ({len(data)} bytes)")
+        with self._evict_lock:
+            if self._total_bytes is None:
+                self._total_bytes = self._scan()[1]
+            else:
+                self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict(keep=name)
+        return name
+
+    def _scan(self) -> Tuple[list, int]:
+        """List stored images.
+
+        Returns:
+            (modification time, size, path, name) of every image and their total size
+        """
+        entries = []
+        for entry in os.scandir(self.dirpath):
+            if NAME_PATTERN.match(entry.name):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Evicted by another worker
+                entries.append((stat.st_mtime, stat.st_size, entry.path, entry.name))
+        return entries, sum(size for _, size, _, _ in entries)
+
+    def _evict(self, keep: str) -> None:
+        """Remove least recently used images until the store fits `evict_to_ratio` of `max_bytes`.
+
+        NOTE:
+            Caller must hold `self._evict_lock`
+        """
+        entries, total = self._scan()
+        target = self.max_bytes * self.evict_to_ratio
+        for _, size, filepath, name in sorted(entries):
+            if total <= target:
+                break
+            if name == keep:
+                continue
+            try:
+                os.unlink(filepath)
+            except FileNotFoundError:
+                pass  # Evicted by another worker
+            total -= size
+            log.debug(f"Evicted image {name}")
+        self._total_bytes = total
+
+    def get_filepath(self, name: str) -> Optional[str]:
+        """Get the file of a stored image and mark it as recently used.
+
+        Args:
+            name: Image name
+
+        Returns:
+            Path of the image file, None if the name is invalid or was evicted
+        """
+        if not NAME_PATTERN.match(name):
+            return None
+        filepath = os.path.join(self.dirpath, name)
+        try:
+            os.utime(filepath)
+        except FileNotFoundError:
+            return None
+        return filepath
+
+    @staticmethod
+    def get_etag(name: str) -> str:
+        """Get the strong ETag of a stored image, its content hash."""
+        return f'"{name.split(".")[0]}"'
+
+    @staticmethod
+    def get_media_type(name: str) -> str:
+        """Get the media type of a stored image."""
+        return MEDIA_TYPES.get(os.path.splitext(name)[1], "application/octet-stream")
+
+    def get_url(self, name: str) -> str:
+        """Get the path a stored image is served under."""
+        return f"{self.url_prefix}/{name}"
+
+    def get_name(self, url: str) -> Optional[str]:
+        """Get the name of a stored image from its served path, None for other URLs."""
+        prefix = self.url_prefix + "/"
+        if not url.startswith(prefix):
+            return None
+        name = url[len(prefix) :]
+        return name if NAME_PATTERN.match(name) else None
@@ -0,0 +1,74 @@
+"""AI provider backed by the OpenAI API."""
+
+from typing import AsyncIterator, List
+
+from app.core.ai_bot.base_provider import BaseProvider, ChatResult
+from app.core.ai_bot.client_registry import OpenAIClientRegistry
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+
+class OpenAIProvider(BaseProvider):
+    """AI provider backed by the OpenAI API.
+
+    NOTE:
+        All calls share the pooled client of the registry.
+    """
+
+    name = "openai"
+
+    def __init__(self, clients: OpenAIClientRegistry) -> None:
+        """Run Constructor.
+
+        Args:
+            clients: Registry of the shared OpenAI client
+        """
+        self.clients = clients
+
+    async def open(self) -> None:
+        """Open the shared client."""
+        await self.clients.open()
+
+    async def close(self) -> None:
+        """Close the shared client."""
+        await self.clients.close()
+
+    @staticmethod
+    def _format_params(json_mode: bool) -> dict:
+        """Get the request parameters selecting the output format."""
+        return {"response_format": {"type": "json_object"}} if json_mode else {}
+
+    async def chat(self, model: str, messages: List[dict], json_mode: bool = False) -> ChatResult:
+        """Run a chat completion."""
+        result = await self.clients.get_client().chat.completions.create(
+            model=model, messages=messages, **self._format_params(json_mode)
+        )
+        usage = result.usage
+        return ChatResult(
+            result.choices[0].message.content,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0,
+        )
+
+    async def stream_chat(
+        self, model: str, messages: List[dict], json_mode: bool = False
+    ) -> AsyncIterator[str]:
+        """Start a streamed chat completion."""
+        stream = await self.clients.get_client().chat.completions.create(
+            model=model, messages=messages, stream=True, **self._format_params(json_mode)
+        )
+
+        async def tokens() -> AsyncIterator[str]:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        return tokens()
+
+    async def generate_image(self, model: str, prompt: str, **params: object) -> str:
+        """Generate an image."""
+        response = await self.clients.get_client().images.generate(
+            model=model, prompt=prompt, **params
+        )
+        return response.data[0].url
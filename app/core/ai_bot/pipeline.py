@@ -0,0 +1,135 @@
+"""Concurrent execution of dependent async stages."""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+
+class PipelineStage:
+    """Single named step of a pipeline."""
+
+    def __init__(
+        self, name: str, run: Callable[[], Awaitable[Any]], depends_on: Sequence[str] = ()
+    ) -> None:
+        """Run Constructor.
+
+        Args:
+            name: Unique stage name
+            run: Coroutine function running the stage
+            depends_on: Names of stages that must finish before this one starts
+        """
+        self.name = name
+        self.run = run
+        self.depends_on = tuple(depends_on)
+
+
+class Pipeline:
+    """Run stages as soon as the stages they depend on are done.
+
+    NOTE:
+        Independent stages run concurrently on the event loop, so the total
+        time is the longest chain of dependent stages rather than the sum of
+        all stages. If a stage fails, every stage still running is cancelled
+        and the error is raised.
+    """
+
+    def __init__(self, stages: List[PipelineStage]) -> None:
+        """Validate and order stages.
+
+        Args:
+            stages: Pipeline stages, in any order
+        """
+        self.stages = self._sort(stages)
+        self.timings: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def _sort(stages: List[PipelineStage]) -> List[PipelineStage]:
+        """Order stages so each comes after the stages it depends on.
+
+        Args:
+            stages: Pipeline stages
+
+        Returns:
+            Topologically sorted stages
+        """
+        by_name = {stage.name: stage for stage in stages}
+        if len(by_name) != len(stages):
+            raise ValueError("Pipeline stage names must be unique")
+
+        ordered: List[PipelineStage] = []
+        visiting, done = set(), set()
+
+        def visit(stage: PipelineStage) -> None:
+            if stage.name in done:
+                return
+            if stage.name in visiting:
+                raise ValueError(f"Pipeline has a dependency cycle at stage: {stage.name}")
+            visiting.add(stage.name)
+            for dependency in stage.depends_on:
+                if dependency not in by_name:
+                    raise ValueError(f"Stage {stage.name} depends on unknown stage: {dependency}")
+                visit(by_name[dependency])
+            visiting.discard(stage.name)
+            done.add(stage.name)
+            ordered.append(stage)
+
+        for stage in stages:
+            visit(stage)
+        return ordered
+
+    async def run(
+        self,
+        on_stage_done: Optional[Callable[[str, Any], Awaitable[None]]] = None,
+        on_stage_start: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> Dict[str, Any]:
+        """Run all stages.
+
+        Args:
+            on_stage_done: Coroutine function called with the name and result of each finished stage
+            on_stage_start: Coroutine function called with the name of each starting stage
+
+        Returns:
+            Result of every stage by stage name
+        """
+        self.timings = {}
+        pipeline_start = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(stage: PipelineStage) -> Any:
+            await asyncio.gather(*(tasks[dependency] for dependency in stage.depends_on))
+            if on_stage_start is not None:
+                await on_stage_start(stage.name)
+            stage_start = time.perf_counter()
+            result = await stage.run()
+            stage_end = time.perf_counter()
+            self.timings[stage.name] = {
+                "start": stage_start - pipeline_start,
+                "duration": stage_end - stage_start,
+            }
+            log.debug(f"Pipeline: Stage {stage.name} took {stage_end - stage_start:.4f} seconds")
+            if on_stage_done is not None:
+                await on_stage_done(stage.name, result)
+            return result
+
+        for stage in self.stages:
+            tasks[stage.name] = asyncio.create_task(run_stage(stage), name=stage.name)
+
+        try:
+            results = await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        total = time.perf_counter() - pipeline_start
+        stage_timings = ", ".join(
+            f"{name}={timing['duration']:.4f}s" for name, timing in self.timings.items()
+        )
+        log.info(f"Pipeline: Finished in {total:.4f} seconds. Stages: {stage_timings}")
+        self.timings["total"] = {"start": 0.0, "duration": total}
+        return dict(zip(tasks.keys(), results))
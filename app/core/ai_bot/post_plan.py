@@ -0,0 +1,61 @@
+"""Schema of the single-call post plan of the "fast" pipeline profile, and of captions."""
+
+import json
+
+from pydantic import BaseModel, Field, ValidationError
+
+
+class PostPlanError(ValueError):
+    """Raised when a post plan or captions response does not match the schema."""
+
+
+class PostCaptions(BaseModel):
+    """Three caption variants of a post."""
+
+    caption1: str = Field(min_length=1)
+    caption2: str = Field(min_length=1)
+    caption3: str = Field(min_length=1)
+
+
+class PostPlan(BaseModel):
+    """Intent, captions and image prompt of a post, generated in one chat call."""
+
+    intent: str = Field(min_length=1)
+    captions: PostCaptions
+    image_prompt: str = Field(min_length=1)
+
+
+def parse_post_plan(content: str) -> PostPlan:
+    """Parse and validate a post plan response.
+
+    Args:
+        content: Message content of the chat completion
+
+    Returns:
+        Validated post plan
+
+    Raises:
+        PostPlanError: If the content is not valid JSON or does not match the schema
+    """
+    try:
+        return PostPlan.model_validate(json.loads(content))
+    except (json.JSONDecodeError, ValidationError) as error:
+        raise PostPlanError(f"Invalid post plan: {error}") from error
+
+
+def parse_post_captions(content: str) -> PostCaptions:
+    """Parse and validate a captions response.
+
+    Args:
+        content: Message content of the chat completion
+
+    Returns:
+        Validated captions
+
+    Raises:
+        PostPlanError: If the content is not valid JSON or does not match the schema
+    """
+    try:
+        return PostCaptions.model_validate(json.loads(content))
+    except (json.JSONDecodeError, ValidationError) as error:
+        raise PostPlanError(f"Invalid captions: {error}") from error
@@ -0,0 +1,85 @@
+"""Compiled Jinja2 prompt templates."""
+
+import os
+import time
+from collections import defaultdict
+from typing import Dict
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined
+
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+
+class PromptRegistry:
+    """Compiled Jinja2 prompt templates.
+
+    NOTE:
+        All templates of the prompts directory are compiled once when the
+        registry is created. With `auto_reload` set (dev), a template is
+        recompiled on its next render after its file changed. Rendering fails
+        on undefined variables, so a stage can never send a prompt built from
+        a result that does not exist yet.
+    """
+
+    TEMPLATE_SUFFIX = ".jinja2"
+
+    def __init__(self, dirpath: str = "prompts", auto_reload: bool = False) -> None:
+        """Compile all prompt templates.
+
+        Args:
+            dirpath: Path to the prompt templates directory
+            auto_reload: Set True to recompile templates changed on disk
+        """
+        self.dirpath = dirpath
+        self.environment = Environment(
+            loader=FileSystemLoader(dirpath),
+            undefined=StrictUndefined,
+            auto_reload=auto_reload,
+            autoescape=False,
+        )
+        self._render_counts: Dict[str, int] = defaultdict(int)
+        self._render_seconds: Dict[str, float] = defaultdict(float)
+        self._render_max_seconds: Dict[str, float] = defaultdict(float)
+
+        log.info(f"Compiling prompt templates: {dirpath} (auto reload: {auto_reload})")
+        for filename in sorted(os.listdir(dirpath)):
+            if filename.endswith(self.TEMPLATE_SUFFIX):
+                self.environment.get_template(filename)
+
+    def render(self, name: str, **context: object) -> str:
+        """Render a prompt template.
+
+        Args:
+            name: Template name without suffix, e.g. "UnderstandIntent"
+            context: Template variables
+
+        Returns:
+            Rendered prompt
+        """
+        start = time.perf_counter()
+        prompt = self.environment.get_template(name + self.TEMPLATE_SUFFIX).render(**context)
+        duration = time.perf_counter() - start
+
+        self._render_counts[name] += 1
+        self._render_seconds[name] += duration
+        self._render_max_seconds[name] = max(self._render_max_seconds[name], duration)
+        log.debug(f"Prompt: Rendered {name} in {duration * 1000:.3f} ms")
+        return prompt
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get render count and timings per template.
+
+        Returns:
+            Render statistics by template name, times in milliseconds
+        """
+        return {
+            name: {
+                "renders": count,
+                "mean_ms": self._render_seconds[name] / count * 1000,
+                "max_ms": self._render_max_seconds[name] * 1000,
+                "total_ms": self._render_seconds[name] * 1000,
+            }
+            for name, count in sorted(self._render_counts.items())
+        }
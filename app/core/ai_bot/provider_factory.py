@@ -0,0 +1,51 @@
+"""Select and create the configured AI provider."""
+
+from typing import Optional
+
+from app.core.ai_bot.base_provider import BaseProvider
+from app.core.ai_bot.client_registry import OpenAIClientRegistry
+from app.core.ai_bot.fake_provider import FakeProvider
+from app.core.ai_bot.openai_provider import OpenAIProvider
+from app.core.fastapi_config import Settings
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+
+def create_provider(settings: Settings, openai_api_key: Optional[str] = None) -> BaseProvider:
+    """Create the AI provider selected in settings.
+
+    Args:
+        settings: Application settings
+        openai_api_key: OpenAI API key, required by the "openai" provider
+
+    Returns:
+        AI provider instance
+    """
+    provider = settings.AI_PROVIDER.lower()
+    log.info(f"Using AI provider: {provider}")
+    if provider == "openai":
+        if not openai_api_key:
+            raise ValueError("The openai AI provider requires an OpenAI API key")
+        return OpenAIProvider(
+            OpenAIClientRegistry(
+                api_key=openai_api_key,
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+                timeout=settings.OPENAI_TIMEOUT,
+                connect_timeout=settings.OPENAI_CONNECT_TIMEOUT,
+            )
+        )
+    if provider == "fake":
+        return FakeProvider.from_captions_file(
+            settings.FAKE_PROVIDER_CAPTIONS_FILEPATH,
+            seed=settings.FAKE_PROVIDER_SEED,
+            latency_ms=settings.FAKE_PROVIDER_LATENCY_MS,
+            image_latency_ms=settings.FAKE_PROVIDER_IMAGE_LATENCY_MS,
+            latency_distribution=settings.FAKE_PROVIDER_LATENCY_DISTRIBUTION,
+            latency_sigma=settings.FAKE_PROVIDER_LATENCY_SIGMA,
+            error_rate=settings.FAKE_PROVIDER_ERROR_RATE,
+            invalid_json_rate=settings.FAKE_PROVIDER_INVALID_JSON_RATE,
+        )
+    raise ValueError(f"Unknown AI provider: {settings.AI_PROVIDER}")
@@ -0,0 +1,206 @@
+"""Persistent cache of AI responses."""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses (accessed_at);
+CREATE INDEX IF NOT EXISTS idx_responses_created_at ON responses (created_at);
+"""
+
+
+class ResponseCache:
+    """Persistent cache of AI responses.
+
+    NOTE:
+        Responses are keyed by a hash of the call kind, model, rendered prompt
+        and all other request parameters, and kept in an SQLite file shared by
+        all workers. Entries older than the TTL are ignored and purged, and the
+        least recently used entries are evicted once the size bound is hit.
+
+        SQLite calls run on a thread, never on the event loop.
+    """
+
+    def __init__(
+        self, filepath: str, max_bytes: int = 50_000_000, ttl_seconds: float = 86400.0
+    ) -> None:
+        """Open cache file and create schema if needed.
+
+        Args:
+            filepath: Path to the SQLite cache file
+            max_bytes: Maximum total size of cached responses
+            ttl_seconds: Seconds a cached response stays valid
+        """
+        self.filepath = filepath
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+
+        log.info(f"Opening AI response cache: {self.filepath}")
+        os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection of the current thread, opening one if needed."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.filepath, timeout=30.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def make_key(kind: str, model: str, params: dict) -> str:
+        """Build the cache key of a call.
+
+        Args:
+            kind: Kind of call, e.g. "chat" or "image"
+            model: Model name
+            params: All other request parameters, including the rendered prompt
+
+        Returns:
+            Cache key
+        """
+        payload = json.dumps([kind, model, params], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, ttl_seconds: Optional[float] = None) -> Optional[Any]:
+        """Get a cached response.
+
+        Args:
+            key: Cache key
+            ttl_seconds: Shorter TTL for this lookup, e.g. for expiring URLs
+
+        Returns:
+            Cached response, None if missing or expired
+        """
+        now = time.time()
+        ttl_seconds = (
+            self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        )
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT value FROM responses WHERE key = ? AND created_at >= ?",
+            (key, now - ttl_seconds),
+        ).fetchone()
+        if row is None:
+            return None
+        connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a response, evicting expired and least recently used ones.
+
+        Args:
+            key: Cache key
+            value: JSON serializable response
+        """
+        now = time.time()
+        encoded = json.dumps(value)
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                (key, encoded, len(encoded), now, now),
+            )
+            connection.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            )
+            total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                self._evict(connection, total - self.max_bytes)
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    @staticmethod
+    def _evict(connection: sqlite3.Connection, bytes_to_free: int) -> None:
+        """Delete least recently used entries until enough space is freed.
+
+        Args:
+            connection: SQLite connection inside a write transaction
+            bytes_to_free: Number of bytes to free
+        """
+        freed = 0
+        evicted = []
+        for key, size in connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall():
+            if freed >= bytes_to_free:
+                break
+            evicted.append((key,))
+            freed += size
+        connection.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        log.debug(f"AI response cache: Evicted {len(evicted)} entries ({freed} bytes)")
+
+    async def get_or_create(
+        self,
+        stage: str,
+        key: str,
+        create: Callable[[], Awaitable[Any]],
+        bypass: bool = False,
+        ttl_seconds: Optional[float] = None,
+    ) -> Any:
+        """Get a cached response or create and cache it.
+
+        Args:
+            stage: Pipeline stage name, used for hit/miss counters
+            key: Cache key, see `make_key`
+            create: Coroutine function creating the response on a miss
+            bypass: Set True to skip the cache lookup (the fresh response is still stored)
+            ttl_seconds: Shorter TTL for this lookup, see `get`
+
+        Returns:
+            Cached or freshly created response
+        """
+        if not bypass:
+            value = await asyncio.to_thread(self.get, key, ttl_seconds)
+            if value is not None:
+                self.hits[stage] += 1
+                log.debug(f"AI response cache: Hit for stage {stage}")
+                return value
+        self.misses[stage] += 1
+
+        value = await create()
+        await asyncio.to_thread(self.set, key, value)
+        return value
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get hit/miss counters and hit rate per stage.
+
+        Returns:
+            Cache statistics by stage name
+        """
+        stats = {}
+        for stage in sorted(set(self.hits) | set(self.misses)):
+            lookups = self.hits[stage] + self.misses[stage]
+            stats[stage] = {
+                "hits": self.hits[stage],
+                "misses": self.misses[stage],
+                "hit_rate": self.hits[stage] / lookups if lookups else 0.0,
+            }
+        return stats
@@ -0,0 +1,176 @@
+"""Rate budgeted and retried OpenAI requests."""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+import openai
+
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+
+class RateBudget:
+    """Requests and tokens per minute budget.
+
+    NOTE:
+        Two token buckets, refilled continuously, which start full so a burst
+        of up to one minute of budget is allowed. Waiters are served in
+        order. Token counts are estimates until the actual usage of a
+        response is recorded with `record`.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int) -> None:
+        """Run Constructor.
+
+        Args:
+            requests_per_minute: Maximum number of requests per minute
+            tokens_per_minute: Maximum number of tokens per minute
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._refilled_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        """Add budget for the time passed since the last refill."""
+        now = time.monotonic()
+        minutes = (now - self._refilled_at) / 60
+        self._refilled_at = now
+        self._requests = min(
+            self.requests_per_minute, self._requests + minutes * self.requests_per_minute
+        )
+        self._tokens = min(self.tokens_per_minute, self._tokens + minutes * self.tokens_per_minute)
+
+    async def acquire(self, tokens: int) -> None:
+        """Wait until one request and an estimated number of tokens fit the budget.
+
+        Args:
+            tokens: Estimated number of tokens of the request
+        """
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                wait_minutes = max(
+                    (1 - self._requests) / self.requests_per_minute,
+                    (tokens - self._tokens) / self.tokens_per_minute,
+                )
+                await asyncio.sleep(wait_minutes * 60)
+
+    def record(self, tokens: int) -> None:
+        """Charge tokens used beyond the estimate, or refund unused ones.
+
+        Args:
+            tokens: Actual minus estimated tokens
+        """
+        self._tokens = min(self.tokens_per_minute, self._tokens - tokens)
+
+
+class RequestScheduler:
+    """Run OpenAI requests within a rate budget, retrying transient failures.
+
+    NOTE:
+        Rate limit (429), server (5xx) and connection errors are retried
+        with exponential backoff and full jitter, so many concurrent callers
+        do not retry in lockstep. A `Retry-After` header, if sent, is the
+        minimum delay.
+    """
+
+    def __init__(
+        self,
+        budget: RateBudget,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ) -> None:
+        """Run Constructor.
+
+        Args:
+            budget: Shared requests and tokens per minute budget
+            max_retries: Maximum number of retries of a request
+            base_delay: Backoff ceiling of the first retry in seconds
+            max_delay: Maximum backoff in seconds
+        """
+        self.budget = budget
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        """Check if a request error is transient."""
+        if isinstance(error, openai.APIConnectionError):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code == 429 or error.status_code >= 500
+        return False
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Get the delay before a retry.
+
+        Args:
+            attempt: Number of the failed attempt, starting at 0
+            error: Error of the failed attempt
+
+        Returns:
+            Seconds to wait
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            return max(delay, float(retry_after)) if retry_after else delay
+        except ValueError:
+            return delay
+
+    async def run(
+        self,
+        request: Callable[[], Awaitable[Any]],
+        estimated_tokens: int = 0,
+        stats: Optional[dict] = None,
+    ) -> Any:
+        """Run a request within the budget.
+
+        Args:
+            request: Coroutine function sending the request
+            estimated_tokens: Estimated prompt plus completion tokens
+            stats: Dict whose "queue_seconds" and "retries" are increased
+
+        Returns:
+            Response of the request
+        """
+        stats = stats if stats is not None else {}
+        attempt = 0
+        while True:
+            queued_at = time.perf_counter()
+            await self.budget.acquire(estimated_tokens)
+            stats["queue_seconds"] = stats.get("queue_seconds", 0.0) + (
+                time.perf_counter() - queued_at
+            )
+            try:
+                response = await request()
+            except Exception as error:  # pylint: disable=broad-except
+                if attempt == self.max_retries or not self.is_retryable(error):
+                    raise
+                delay = self._backoff(attempt, error)
+                self.retries += 1
+                stats["retries"] = stats.get("retries", 0) + 1
+                attempt += 1
+                log.warning(f"Scheduler: Request failed ({error}), retry {attempt} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            total_tokens: Optional[int] = getattr(response, "total_tokens", None)
+            if total_tokens is not None and estimated_tokens:
+                self.budget.record(total_tokens - estimated_tokens)
+            return response
@@ -0,0 +1,109 @@
+"""Non-blocking database API for async routes."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+from app.core.database.base_database import BaseDatabase
+
+
+class AsyncDatabase:
+    """Non-blocking database API for async routes.
+
+    NOTE:
+        Every call runs the wrapped (blocking) backend on a dedicated thread
+        pool, so disk I/O never runs on the event loop. The pool is separate
+        from the one serving sync routes, so a burst of sync requests cannot
+        starve async routes of database access and vice versa.
+    """
+
+    def __init__(self, database: BaseDatabase, max_workers: int = 4) -> None:
+        """Run Constructor.
+
+        Args:
+            database: Blocking database backend
+            max_workers: Number of threads running database calls
+        """
+        self.database = database
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="async-database"
+        )
+
+    async def _run(self, function: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run a blocking database call on the database thread pool.
+
+        Args:
+            function: Blocking database method
+            *args: Positional arguments
+            **kwargs: Keyword arguments
+
+        Returns:
+            Result of the call
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(function, *args, **kwargs))
+
+    def close(self) -> None:
+        """Shut down the database thread pool."""
+        self._executor.shutdown(wait=True)
+
+    async def remove_all_businesses(self) -> bool:
+        """Remove all businesses."""
+        return await self._run(self.database.remove_all_businesses)
+
+    async def get_all_business_info(self) -> dict:
+        """Get all business info keyed by business ID."""
+        return await self._run(self.database.get_all_business_info)
+
+    async def create_business(
+        self, name: str, description: str, specifics: str, email: str, password: str
+    ) -> Tuple[bool, dict, str]:
+        """Create a new business."""
+        return await self._run(
+            self.database.create_business, name, description, specifics, email, password
+        )
+
+    async def create_businesses(self, businesses: List[dict]) -> List[Tuple[bool, dict, str]]:
+        """Create many businesses in a single durable write."""
+        return await self._run(self.database.create_businesses, businesses)
+
+    async def get_all_business_ids(self) -> List[int]:
+        """Get all business IDs."""
+        return await self._run(self.database.get_all_business_ids)
+
+    async def get_business_page(
+        self, after_id: int = 0, limit: int = 100, fields: Optional[List[str]] = None
+    ) -> List[Tuple[str, dict]]:
+        """Get businesses ordered by ID, starting after a cursor."""
+        return await self._run(self.database.get_business_page, after_id, limit, fields)
+
+    async def get_business_info(
+        self, business_id: int = None, name: str = None, email: str = None
+    ) -> Union[dict, None]:
+        """Get business info by ID, name or email."""
+        return await self._run(self.database.get_business_info, business_id, name, email)
+
+    async def remove_business(self, business_id: str) -> bool:
+        """Remove a single business."""
+        return await self._run(self.database.remove_business, business_id)
+
+    async def set_business_info(self, business_id: str, key: str, value: str) -> bool:
+        """Set a single top level field of a business."""
+        return await self._run(self.database.set_business_info, business_id, key, value)
+
+    async def set_post_request_info(self, business_id: str, post_request_info: dict) -> dict:
+        """Set the post request of a business."""
+        return await self._run(self.database.set_post_request_info, business_id, post_request_info)
+
+    async def update_post_request_info(
+        self, business_id: str, updates: dict, expected_job_id: Optional[str] = None
+    ) -> Optional[dict]:
+        """Merge fields into the post request of a business."""
+        return await self._run(
+            self.database.update_post_request_info, business_id, updates, expected_job_id
+        )
+
+    async def set_ai_response(self, business_id: str, ai_response: List[str]) -> dict:
+        """Set the AI response of a business post request and mark it done."""
+        return await self._run(self.database.set_ai_response, business_id, ai_response)
@@ -0,0 +1,112 @@
+"""Interface shared by all database backends."""
+
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple, Union
+
+
+def project_fields(record: dict, fields: Optional[List[str]] = None) -> dict:
+    """Keep only selected top level fields of a business record.
+
+    Args:
+        record: Business record
+        fields: Fields to keep, None to keep all
+
+    Returns:
+        Projected record
+    """
+    if fields is None:
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+
+class BaseDatabase(ABC):
+    """Interface shared by all database backends.
+
+    NOTE:
+        Business IDs are passed around as strings (or ints on lookup) and each
+        business is a flat dict with an optional nested `post_request` dict.
+    """
+
+    @abstractmethod
+    def remove_all_businesses(self) -> bool:
+        """Remove all businesses."""
+
+    @abstractmethod
+    def get_all_business_info(self) -> dict:
+        """Get all business info keyed by business ID."""
+
+    @abstractmethod
+    def create_business(
+        self, name: str, description: str, specifics: str, email: str, password: str
+    ) -> Tuple[bool, dict, str]:
+        """Create a new business."""
+
+    @abstractmethod
+    def create_businesses(self, businesses: List[dict]) -> List[Tuple[bool, dict, str]]:
+        """Create many businesses in a single durable write.
+
+        Args:
+            businesses: Validated business records to create
+
+        Returns:
+            Per business result in input order, as returned by `create_business`
+        """
+
+    @abstractmethod
+    def get_all_business_ids(self) -> List[int]:
+        """Get all business IDs."""
+
+    @abstractmethod
+    def get_business_page(
+        self, after_id: int = 0, limit: int = 100, fields: Optional[List[str]] = None
+    ) -> List[Tuple[str, dict]]:
+        """Get businesses ordered by ID, starting after a cursor.
+
+        Args:
+            after_id: Only return businesses with an ID greater than this
+            limit: Maximum number of businesses to return
+            fields: Top level fields to return per business, None for all
+
+        Returns:
+            List of business ID and (projected) business record pairs
+        """
+
+    @abstractmethod
+    def get_business_info(
+        self, business_id: int = None, name: str = None, email: str = None
+    ) -> Union[dict, None]:
+        """Get business info by ID, name or email."""
+
+    @abstractmethod
+    def remove_business(self, business_id: str) -> bool:
+        """Remove a single business."""
+
+    @abstractmethod
+    def set_business_info(self, business_id: str, key: str, value: str) -> bool:
+        """Set a single top level field of a business."""
+
+    @abstractmethod
+    def set_post_request_info(self, business_id: str, post_request_info: dict) -> dict:
+        """Set the post request of a business."""
+
+    @abstractmethod
+    def update_post_request_info(
+        self, business_id: str, updates: dict, expected_job_id: Optional[str] = None
+    ) -> Optional[dict]:
+        """Merge fields into the post request of a business.
+
+        Args:
+            business_id: ID of the business
+            updates: Post request fields to set, other fields are kept
+            expected_job_id: Only update if the post request still belongs to this job
+
+        Returns:
+            Updated business info, None if the post request belongs to another job
+        """
+
+    @abstractmethod
+    def set_ai_response(self, business_id: str, ai_response: List[str]) -> dict:
+        """Set the AI response of a business post request and mark it done."""
+
+    def close(self) -> None:
+        """Release any resources held by the backend."""
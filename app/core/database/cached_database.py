@@ -0,0 +1,261 @@
+"""Read cache in front of a database backend."""
+
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
+
+from app.core.database.base_database import BaseDatabase
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+
+class VersionSignal:
+    """Generation counter shared between worker processes.
+
+    NOTE:
+        The counter is an 8 byte integer in a memory mapped file, so reading
+        it costs no system call. Writers increment it under an exclusive file
+        lock after every committed change.
+    """
+
+    COUNTER_FORMAT = "Q"
+    COUNTER_SIZE = struct.calcsize(COUNTER_FORMAT)
+
+    def __init__(self, filepath: str) -> None:
+        """Run Constructor.
+
+        Args:
+            filepath: Path to the shared counter file
+        """
+        self.filepath = filepath
+        self._fd = None
+        self._mmap = None
+        self._pid = None
+
+    def _open(self) -> mmap.mmap:
+        """Map the counter file, reopening it after a fork.
+
+        NOTE:
+            flock() locks belong to the open file description, which a forked
+            worker would share with its parent, so every process opens its own.
+
+        Returns:
+            Memory mapped counter
+        """
+        if self._pid != os.getpid():
+            self._fd = os.open(self.filepath, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(self._fd).st_size < self.COUNTER_SIZE:
+                    os.ftruncate(self._fd, self.COUNTER_SIZE)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            self._mmap = mmap.mmap(self._fd, self.COUNTER_SIZE)
+            self._pid = os.getpid()
+        return self._mmap
+
+    def current(self) -> int:
+        """Get the current generation.
+
+        Returns:
+            Generation counter
+        """
+        return struct.unpack_from(self.COUNTER_FORMAT, self._open(), 0)[0]
+
+    def bump(self) -> int:
+        """Increment the generation.
+
+        Returns:
+            New generation counter
+        """
+        counter = self._open()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            generation = struct.unpack_from(self.COUNTER_FORMAT, counter, 0)[0] + 1
+            struct.pack_into(self.COUNTER_FORMAT, counter, 0, generation)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        return generation
+
+
+class CachedDatabase(BaseDatabase):
+    """Read cache in front of a database backend.
+
+    NOTE:
+        Single record reads are served from an in-process LRU cache. Every
+        write bumps a `VersionSignal` shared by all gunicorn workers and every
+        read first compares it with the generation the cache was filled at,
+        dropping the whole cache if another worker (or this one) wrote since.
+    """
+
+    def __init__(self, backend: BaseDatabase, version_filepath: str, max_entries: int = 10000):
+        """Run Constructor.
+
+        Args:
+            backend: Database backend to cache
+            version_filepath: Path to the counter file shared between workers
+            max_entries: Maximum number of cached reads
+        """
+        self.backend = backend
+        self.max_entries = max_entries
+        self.version_signal = VersionSignal(version_filepath)
+
+        self._lock = threading.Lock()
+        self._cache: OrderedDict = OrderedDict()
+        self._generation = self.version_signal.current()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _sync(self) -> None:
+        """Drop all cached reads if the shared generation moved."""
+        generation = self.version_signal.current()
+        if generation != self._generation:
+            with self._lock:
+                self._cache.clear()
+                self._generation = generation
+                self.invalidations += 1
+
+    def _cached(self, key: Hashable, read: Any) -> Any:
+        """Get a value from cache or read it through from the backend.
+
+        Args:
+            key: Cache key
+            read: Callable reading the value from the backend
+
+        Returns:
+            Cached or freshly read value
+        """
+        # Generation must be checked before the backend read, so a write
+        # landing during the read invalidates the value on the next lookup
+        self._sync()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return self._cache[key]
+            self.misses += 1
+            generation = self._generation
+
+        value = read()
+        with self._lock:
+            # Another thread invalidated the cache during the read, the value
+            # may predate that write and must not be stored in the new generation
+            if generation != self._generation:
+                return value
+            self._cache[key] = value
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return value
+
+    def _written(self) -> None:
+        """Signal all workers that the backend changed."""
+        self.version_signal.bump()
+
+    def get_cache_stats(self) -> Dict[str, Union[int, float]]:
+        """Get cache hit/miss counters.
+
+        Returns:
+            Cache statistics
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "entries": len(self._cache),
+            "generation": self._generation,
+        }
+
+    def close(self) -> None:
+        """Close the cached backend."""
+        self.backend.close()
+
+    def remove_all_businesses(self) -> bool:
+        """Remove all businesses."""
+        success = self.backend.remove_all_businesses()
+        self._written()
+        return success
+
+    def get_all_business_info(self) -> dict:
+        """Get all business info keyed by business ID."""
+        return self.backend.get_all_business_info()
+
+    def create_business(
+        self, name: str, description: str, specifics: str, email: str, password: str
+    ) -> Tuple[bool, dict, str]:
+        """Create a new business."""
+        result = self.backend.create_business(name, description, specifics, email, password)
+        self._written()
+        return result
+
+    def create_businesses(self, businesses: List[dict]) -> List[Tuple[bool, dict, str]]:
+        """Create many businesses in a single durable write."""
+        results = self.backend.create_businesses(businesses)
+        self._written()
+        return results
+
+    def get_all_business_ids(self) -> List[int]:
+        """Get all business IDs."""
+        return self._cached(("ids",), self.backend.get_all_business_ids)
+
+    def get_business_page(
+        self, after_id: int = 0, limit: int = 100, fields: Optional[List[str]] = None
+    ) -> List[Tuple[str, dict]]:
+        """Get businesses ordered by ID, starting after a cursor."""
+        return self.backend.get_business_page(after_id, limit, fields)
+
+    def get_business_info(
+        self, business_id: int = None, name: str = None, email: str = None
+    ) -> Union[dict, None]:
+        """Get business info by ID, name or email."""
+        if business_id:
+            key = ("id", str(business_id))
+        elif name:
+            key = ("name", name)
+        elif email:
+            key = ("email", email)
+        else:
+            return self.backend.get_business_info()
+        return self._cached(
+            key, lambda: self.backend.get_business_info(business_id, name=name, email=email)
+        )
+
+    def remove_business(self, business_id: str) -> bool:
+        """Remove a single business."""
+        success = self.backend.remove_business(business_id)
+        self._written()
+        return success
+
+    def set_business_info(self, business_id: str, key: str, value: str) -> bool:
+        """Set a single top level field of a business."""
+        success = self.backend.set_business_info(business_id, key, value)
+        self._written()
+        return success
+
+    def set_post_request_info(self, business_id: str, post_request_info: dict) -> dict:
+        """Set the post request of a business."""
+        business_info = self.backend.set_post_request_info(business_id, post_request_info)
+        self._written()
+        return business_info
+
+    def update_post_request_info(
+        self, business_id: str, updates: dict, expected_job_id: Optional[str] = None
+    ) -> Optional[dict]:
+        """Merge fields into the post request of a business."""
+        business_info = self.backend.update_post_request_info(business_id, updates, expected_job_id)
+        if business_info is not None:
+            self._written()
+        return business_info
+
+    def set_ai_response(self, business_id: str, ai_response: List[str]) -> dict:
+        """Set the AI response of a business post request and mark it done."""
+        business_info = self.backend.set_ai_response(business_id, ai_response)
+        self._written()
+        return business_info
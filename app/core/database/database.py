@@ -1,57 +1,463 @@
 """Manage database."""
 
+import bisect
+import fcntl
+import json
 import os
-from pprint import pformat, pprint
-from typing import List, Tuple, Union
+import shutil
+import struct
+import threading
+from json import JSONDecodeError
+from pprint import pformat
+from typing import Dict, List, Optional, Tuple, Union
 
+from app.core.database.base_database import BaseDatabase, project_fields
+from app.core.database.serializers import detect_serializer, get_serializer
 from app.core.utility.logger_setup import get_logger
 from app.core.utility.utils import overwrite_json_file, read_json_file
 
 log = get_logger()
 
 
-class Database:
+class Database(BaseDatabase):
     """Manage database.
 
     NOTE:
-        Database is a local JSON file
+        The full dataset is held in memory. Every mutation is appended to a
+        write-ahead log (WAL) next to the snapshot file and a background thread
+        periodically compacts the WAL into a new snapshot. On start up the
+        snapshot is loaded and any WAL entries are replayed on top of it.
+
+        The snapshot format is pluggable (see `serializers`). Existing files are
+        read in whatever format they were written in and rewritten in the
+        configured one.
+
+        WAL entries are full-record operations (set / delete / clear, or a
+        batch of those written as one entry), so replaying a log that was
+        already folded into a snapshot is harmless.
+
+        New IDs come from a monotonic counter. It is saved in a small `.meta`
+        file with every snapshot and advanced by every replayed WAL entry, so
+        IDs of removed businesses are never handed out again.
+
+        Secondary indexes on name and email are kept in memory and updated on
+        every applied operation, making lookups by either field O(1). A sorted
+        list of IDs backs cursor pagination. Legacy non-numeric IDs are kept
+        and readable but are left out of it.
+
+        Since the dataset lives in one process, an exclusive lock on a `.lock`
+        file next to the snapshot is held while the database is open. A second
+        process (e.g. another gunicorn worker) opening the same file fails
+        instead of silently diverging, use the sqlite backend for those. The
+        backend is single-worker only: `gunicorn_conf.py` refuses to start more
+        than one worker with it.
     """
 
-    def __init__(self, filepath: str = "database.json") -> None:
-        """TODO."""
+    INDEXED_FIELDS = ("name", "email")
+
+    def __init__(
+        self,
+        filepath: str = "database.json",
+        snapshot_interval: float = 30.0,
+        snapshot_max_wal_entries: int = 1000,
+        fsync: bool = False,
+        case_insensitive_lookup: bool = False,
+        serializer: str = "json",
+        read_only: bool = False,
+    ) -> None:
+        """Load snapshot, replay write-ahead log and start background compaction.
+
+        A read-only database replays the write-ahead log in memory only. It
+        never takes the process lock, writes or converts any file, or starts
+        compaction, so it can be used to inspect or migrate a database.
+
+        Args:
+            filepath: Path to the snapshot file
+            snapshot_interval: Seconds between background compaction checks
+            snapshot_max_wal_entries: Number of WAL entries that triggers an early compaction
+            fsync: Set True to fsync the WAL after every mutation
+            case_insensitive_lookup: Set True to match name and email case-folded
+            serializer: Snapshot file format, see `serializers.SERIALIZERS`
+            read_only: Set True to load the files without ever changing them
+        """
         self.db_filepath = filepath
+        self.wal_filepath = f"{filepath}.wal"
+        self.wal_compacting_filepath = f"{filepath}.wal.compacting"
+        self.meta_filepath = f"{filepath}.meta"
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_max_wal_entries = snapshot_max_wal_entries
+        self.fsync = fsync
+        self.case_insensitive_lookup = case_insensitive_lookup
+        self.serializer = get_serializer(serializer)
+        self.read_only = read_only
+        self._process_lock_file = None
+        self._wal_file = None
+        self._compaction_thread = None
+        if not read_only:
+            self._process_lock_file = self._acquire_process_lock(f"{filepath}.lock")
+
+        self._lock = threading.RLock()
+        self._compaction_lock = threading.Lock()
+        self._compaction_requested = threading.Event()
+        self._closed = threading.Event()
+        self._wal_entries = 0
+        self._indexes: Dict[str, Dict[str, Dict[str, None]]] = {}
+        self._next_id = 1
+        self._sorted_ids: List[int] = []
+        self._snapshot_serializer = None
 
         # If database file does not exist, create it, with {} as content
+        if not os.path.isfile(self.db_filepath) and read_only:
+            raise FileNotFoundError(f"Database file does not exist: {self.db_filepath}")
         if not os.path.isfile(self.db_filepath):
             log.warning(f"Database file does not exist. Creating: {self.db_filepath}")
-            overwrite_json_file(self.db_filepath, {})
+            self._write_snapshot({}, next_id=1)
+
+        self.db = self._read_snapshot()
+        self._rebuild_indexes()
+        meta = read_json_file(self.meta_filepath) if os.path.isfile(self.meta_filepath) else {}
+        self._next_id = max(self._next_id, (meta or {}).get("next_id", 1))
 
-        self.db = read_json_file(self.db_filepath)
+        # Crash recovery: replay any log left behind by a previous process
+        replayed = self._replay_wal(self.wal_compacting_filepath)
+        replayed += self._replay_wal(self.wal_filepath)
         log.debug(f"Database file loaded: {pformat(self.db)}")
-        if self.db is None:
-            log.fatal(f"Failed to read database file: {self.db_filepath}")
+        if read_only:
+            return
+        try:
+            self.serializer.check(self.db)
+        except ValueError as error:
+            log.fatal(f"Cannot use database file: {self.db_filepath}: {error}")
+            self._process_lock_file.close()
+            raise
+
+        self._wal_file = open(self.wal_filepath, "a", encoding="utf-8")
+        if replayed:
+            log.info(f"Replayed {replayed} write-ahead log entries. Compacting ...")
+            self._wal_entries = replayed
+            self.compact()
+        elif self._snapshot_serializer is not self.serializer:
+            log.info(f"Converting database file to format: {self.serializer.name} ...")
+            self._write_snapshot(dict(self.db), self._next_id)
+
+        self._compaction_thread = threading.Thread(
+            target=self._compaction_loop, name="database-compaction", daemon=True
+        )
+        self._compaction_thread.start()
+
+    ##########################################################################
+    #                      Write-ahead log / snapshots
+    ##########################################################################
+
+    @staticmethod
+    def _acquire_process_lock(lock_filepath: str):
+        """Take an exclusive lock so only one process uses the database files.
+
+        Args:
+            lock_filepath: Path of the lock file
+
+        Returns:
+            Open lock file, the lock is held until it is closed
+
+        Raises:
+            RuntimeError: If another process already holds the lock
+        """
+        lock_file = open(lock_filepath, "a", encoding="utf-8")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError as error:
+            lock_file.close()
+            log.fatal(f"Database file is in use by another process: {lock_filepath}")
+            raise RuntimeError(
+                "The json database backend supports a single process only, "
+                'run one worker or set DATABASE_BACKEND="sqlite"'
+            ) from error
+        return lock_file
+
+    @staticmethod
+    def _numeric_id(business_id: str) -> Optional[int]:
+        """Convert a business ID to an int for ordering.
+
+        Args:
+            business_id: ID of the business
+
+        Returns:
+            Numeric ID, None for legacy non-numeric IDs
+        """
+        try:
+            return int(business_id)
+        except ValueError:
+            return None
+
+    def _read_snapshot(self) -> dict:
+        """Read the snapshot file in whichever format it was written.
+
+        Returns:
+            Business records keyed by business ID
+        """
+        log.debug(f"Reading database snapshot: {self.db_filepath} ...")
+        with open(self.db_filepath, "rb") as snapshot_file:
+            self._snapshot_serializer = detect_serializer(snapshot_file)
+            try:
+                return self._snapshot_serializer.load(snapshot_file)
+            except ValueError as error:
+                log.fatal(f"Failed to read database file: {self.db_filepath}: {error}")
+                raise
+
+    def _write_snapshot(self, snapshot: dict, next_id: int) -> bool:
+        """Atomically replace the snapshot file.
+
+        Args:
+            snapshot: Business records keyed by business ID
+            next_id: ID counter at the time of the snapshot
+
+        Returns:
+            True if successful, False otherwise
+        """
+        # Meta goes first, a counter ahead of the snapshot is always safe
+        if not overwrite_json_file(self.meta_filepath, {"next_id": next_id}):
+            return False
+
+        temp_filepath = f"{self.db_filepath}.tmp"
+        try:
+            with open(temp_filepath, "wb") as snapshot_file:
+                self.serializer.dump(snapshot, snapshot_file)
+                snapshot_file.flush()
+                os.fsync(snapshot_file.fileno())
+            os.replace(temp_filepath, self.db_filepath)
+        except (IOError, OSError, TypeError, ValueError, struct.error) as error:
+            log.error(f"Failed to write database snapshot: {error}")
+            return False
+        self._snapshot_serializer = self.serializer
+        return True
+
+    def _replay_wal(self, wal_filepath: str) -> int:
+        """Apply all operations found in a write-ahead log file to memory.
+
+        Args:
+            wal_filepath: Path of the write-ahead log to replay
+
+        Returns:
+            Number of entries replayed
+        """
+        if not os.path.isfile(wal_filepath):
+            return 0
+
+        replayed = 0
+        with open(wal_filepath, "r", encoding="utf-8") as wal_file:
+            for line_number, line in enumerate(wal_file, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except JSONDecodeError:
+                    # A torn final line is expected after a crash mid-append
+                    log.warning(f"Skipping corrupt WAL entry {wal_filepath}:{line_number}")
+                    continue
+                self._apply(entry)
+                replayed += 1
+        return replayed
+
+    def _index_key(self, value: str) -> str:
+        """Normalize a value for use as secondary index key.
+
+        Args:
+            value: Field value
+
+        Returns:
+            Index key
+        """
+        return value.casefold() if self.case_insensitive_lookup else value
+
+    def _index(self, business_id: str, record: dict) -> None:
+        """Add a record to the secondary indexes.
+
+        Args:
+            business_id: ID of the business
+            record: Business record
+        """
+        for field in self.INDEXED_FIELDS:
+            value = record.get(field)
+            if isinstance(value, str):
+                # Dict is used as insertion ordered set, first entry wins on lookup
+                self._indexes[field].setdefault(self._index_key(value), {})[business_id] = None
+
+    def _unindex(self, business_id: str, record: dict) -> None:
+        """Remove a record from the secondary indexes.
+
+        Args:
+            business_id: ID of the business
+            record: Business record
+        """
+        for field in self.INDEXED_FIELDS:
+            value = record.get(field)
+            if not isinstance(value, str):
+                continue
+            key = self._index_key(value)
+            business_ids = self._indexes[field].get(key, {})
+            business_ids.pop(business_id, None)
+            if not business_ids:
+                self._indexes[field].pop(key, None)
+
+    def _rebuild_indexes(self) -> None:
+        """Build all secondary indexes from scratch."""
+        self._indexes = {field: {} for field in self.INDEXED_FIELDS}
+        self._sorted_ids = []
+        for business_id, record in self.db.items():
+            self._index(business_id, record)
+            numeric_id = self._numeric_id(business_id)
+            if numeric_id is not None:
+                self._sorted_ids.append(numeric_id)
+                self._next_id = max(self._next_id, numeric_id + 1)
+        self._sorted_ids.sort()
+
+    def _lookup(self, field: str, value: str) -> Union[dict, None]:
+        """Find the first business with a matching indexed field.
+
+        Args:
+            field: Indexed field name
+            value: Value to match
+
+        Returns:
+            Business record, None if not found
+        """
+        with self._lock:
+            business_ids = self._indexes[field].get(self._index_key(value))
+            if not business_ids:
+                return None
+            return self.db.get(next(iter(business_ids)))
+
+    def _apply(self, entry: dict) -> None:
+        """Apply a single write-ahead log entry to the in-memory dataset.
+
+        Args:
+            entry: WAL entry
+        """
+        operation = entry.get("op")
+        numeric_id = self._numeric_id(entry["id"]) if "id" in entry else None
+        if operation == "set":
+            if entry["id"] in self.db:
+                self._unindex(entry["id"], self.db[entry["id"]])
+            elif numeric_id is not None:
+                bisect.insort(self._sorted_ids, numeric_id)
+            self.db[entry["id"]] = entry["record"]
+            self._index(entry["id"], entry["record"])
+            if numeric_id is not None:
+                self._next_id = max(self._next_id, numeric_id + 1)
+        elif operation == "delete":
+            if entry["id"] in self.db:
+                self._unindex(entry["id"], self.db.pop(entry["id"]))
+                if numeric_id is not None:
+                    del self._sorted_ids[bisect.bisect_left(self._sorted_ids, numeric_id)]
+        elif operation == "clear":
+            self.db = {}
+            self._rebuild_indexes()
+        elif operation == "batch":
+            for batch_entry in entry["entries"]:
+                self._apply(batch_entry)
+        else:
+            log.error(f"Unknown WAL operation: {operation}")
+
+    def _append(self, entry: dict) -> None:
+        """Apply an entry in memory and append it to the write-ahead log.
+
+        NOTE:
+            Caller must hold `self._lock`
+
+        Args:
+            entry: WAL entry
+        """
+        if self.read_only:
+            raise RuntimeError(f"Database is read-only: {self.db_filepath}")
+        self._apply(entry)
+        self._wal_file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._wal_file.flush()
+        if self.fsync:
+            os.fsync(self._wal_file.fileno())
+
+        self._wal_entries += len(entry.get("entries", [entry]))
+        if self._wal_entries >= self.snapshot_max_wal_entries:
+            self._compaction_requested.set()
+
+    def compact(self) -> bool:
+        """Write the in-memory dataset as a new snapshot and truncate the write-ahead log.
+
+        Returns:
+            True if successful, False otherwise
+        """
+        if self.read_only:
+            return False
+        with self._compaction_lock:
+            # Swap in a fresh log while holding the write lock, so the snapshot
+            # taken here covers exactly the entries in the rotated log
+            with self._lock:
+                if not self._wal_entries and not os.path.isfile(self.wal_compacting_filepath):
+                    return True
+                self._wal_file.close()
+                if os.path.isfile(self.wal_compacting_filepath):
+                    # A previous compaction failed, keep its entries in front of ours
+                    with open(self.wal_compacting_filepath, "a", encoding="utf-8") as old_wal:
+                        with open(self.wal_filepath, "r", encoding="utf-8") as wal_file:
+                            shutil.copyfileobj(wal_file, old_wal)
+                    os.remove(self.wal_filepath)
+                else:
+                    os.replace(self.wal_filepath, self.wal_compacting_filepath)
+                self._wal_file = open(self.wal_filepath, "a", encoding="utf-8")
+                self._wal_entries = 0
+                snapshot = dict(self.db)
+                next_id = self._next_id
+
+            log.debug(f"Compacting database snapshot: {self.db_filepath} ...")
+            if not self._write_snapshot(snapshot, next_id):
+                # Rotated log stays on disk and will be replayed on next start
+                return False
+
+            os.remove(self.wal_compacting_filepath)
+            log.debug(f"Successfully compacted database snapshot: {self.db_filepath}")
+            return True
+
+    def _compaction_loop(self) -> None:
+        """Background loop compacting the write-ahead log periodically or on demand."""
+        while not self._closed.is_set():
+            self._compaction_requested.wait(timeout=self.snapshot_interval)
+            self._compaction_requested.clear()
+            if self._closed.is_set():
+                break
+            self.compact()
+
+    def close(self) -> None:
+        """Stop background compaction and write a final snapshot."""
+        if self.read_only:
+            return
+        self._closed.set()
+        self._compaction_requested.set()
+        self._compaction_thread.join(timeout=self.snapshot_interval)
+        self.compact()
+        with self._lock:
+            self._wal_file.close()
+        self._process_lock_file.close()
+
+    ##########################################################################
+    #                             Business data
+    ##########################################################################
 
     def remove_all_businesses(self) -> bool:
-        """TODO."""
+        """Remove all businesses."""
         log.info("Removing all businesses ...")
-        overwrite_json_file(self.db_filepath, {})
+        with self._lock:
+            self._append({"op": "clear"})
         return True
 
     def get_all_business_info(self) -> dict:
-        """TODO."""
+        """Get all business info keyed by business ID."""
         log.info("Getting all business info ...")
-        self.db = read_json_file(self.db_filepath)
-        return self.db
+        return dict(self.db)
 
     def create_business(
         self, name: str, description: str, specifics: str, email: str, password: str
-    ) -> Tuple[bool, dict]:
-        """TODO."""
+    ) -> Tuple[bool, dict, str]:
+        """Create a new business."""
         log.info(f"Creating business: {name}")
-        self.db = read_json_file(self.db_filepath)
-
-        # Increment next business ID number available
-        next_id = len(self.db) + 1
         business_info = {
             "name": name,
             "description": description,
@@ -59,56 +465,105 @@ class Database:
             "email": email,
             "password": password,
         }
-        self.db[str(next_id)] = business_info
-        overwrite_json_file(self.db_filepath, self.db)
+        with self._lock:
+            # IDs are never reused, removing a business must not hand out its ID again
+            next_id = self._next_id
+            self._append({"op": "set", "id": str(next_id), "record": business_info})
         return True, business_info, str(next_id)
 
+    def create_businesses(self, businesses: List[dict]) -> List[Tuple[bool, dict, str]]:
+        """Create many businesses in one write-ahead log entry."""
+        log.info(f"Creating {len(businesses)} businesses ...")
+        with self._lock:
+            first_id = self._next_id
+            entries = [
+                {"op": "set", "id": str(first_id + index), "record": dict(business_info)}
+                for index, business_info in enumerate(businesses)
+            ]
+            if entries:
+                self._append({"op": "batch", "entries": entries})
+        return [(True, entry["record"], entry["id"]) for entry in entries]
+
     def get_all_business_ids(self) -> List[int]:
-        """TODO."""
-        log.info(f"Getting all business IDs ...")
-        self.db = read_json_file(self.db_filepath)
-        return [int(id) for id in self.db.keys()]
+        """Get all business IDs."""
+        log.info("Getting all business IDs ...")
+        with self._lock:
+            return list(self._sorted_ids)
 
-    def get_business_info(self, business_id: int = None, name: str = None) -> Union[dict, None]:
-        """TODO."""
+    def get_business_page(
+        self, after_id: int = 0, limit: int = 100, fields: Optional[List[str]] = None
+    ) -> List[Tuple[str, dict]]:
+        """Get businesses ordered by ID, starting after a cursor."""
+        with self._lock:
+            start = bisect.bisect_right(self._sorted_ids, after_id)
+            business_ids = [str(id) for id in self._sorted_ids[start : start + limit]]
+            return [(id, project_fields(self.db[id], fields)) for id in business_ids]
+
+    def get_business_info(
+        self, business_id: int = None, name: str = None, email: str = None
+    ) -> Union[dict, None]:
+        """Get business info by ID, name or email."""
         log.info(f"Getting business info: {business_id} ...")
-        self.db = read_json_file(self.db_filepath)
         if business_id:
             return self.db.get(str(business_id), {})
         if name:
-            for _, business_info in self.db.items():
-                if business_info.get("name") == name:
-                    return business_info
-        log.error("Failed to get business info. No ID or name provided.")
+            return self._lookup("name", name)
+        if email:
+            return self._lookup("email", email)
+        log.error("Failed to get business info. No ID, name or email provided.")
         return None
 
+    def remove_business(self, business_id: str) -> bool:
+        """Remove a single business."""
+        log.info(f"Removing business: {business_id} ...")
+        with self._lock:
+            if business_id not in self.db:
+                log.error(f"Failed to remove business. Business not found: {business_id}")
+                return False
+            self._append({"op": "delete", "id": business_id})
+        return True
+
     def set_business_info(self, business_id: str, key: str, value: str) -> bool:
-        """TODO."""
+        """Set a single top level field of a business."""
         log.info(f"Setting business info: {business_id} ...")
-        self.db = read_json_file(self.db_filepath)
-        business_info = self.db.get(business_id, {})
-        business_info[key] = value
-        self.db[business_id] = business_info
-        overwrite_json_file(self.db_filepath, self.db)
+        with self._lock:
+            # Records are replaced, never mutated, so snapshots can share them
+            business_info = dict(self.db.get(business_id, {}))
+            business_info[key] = value
+            self._append({"op": "set", "id": business_id, "record": business_info})
         return True
 
     def set_post_request_info(self, business_id: str, post_request_info: dict) -> dict:
-        """TODO."""
+        """Set the post request of a business."""
         log.info(f"Setting post request info: {business_id} ...")
-        self.db = read_json_file(self.db_filepath)
-        business_info = self.db.get(business_id, {})
-        business_info["post_request"] = post_request_info
-        self.db[business_id] = business_info
-        overwrite_json_file(self.db_filepath, self.db)
+        with self._lock:
+            business_info = dict(self.db.get(business_id, {}))
+            business_info["post_request"] = post_request_info
+            self._append({"op": "set", "id": business_id, "record": business_info})
+        return business_info
+
+    def update_post_request_info(
+        self, business_id: str, updates: dict, expected_job_id: Optional[str] = None
+    ) -> Optional[dict]:
+        """Merge fields into the post request of a business."""
+        log.debug(f"Updating post request info: {business_id} ...")
+        with self._lock:
+            business_info = dict(self.db.get(business_id, {}))
+            job_id = business_info.get("post_request", {}).get("job_id")
+            if expected_job_id is not None and job_id != expected_job_id:
+                return None
+            business_info["post_request"] = {**business_info.get("post_request", {}), **updates}
+            self._append({"op": "set", "id": business_id, "record": business_info})
         return business_info
 
     def set_ai_response(self, business_id: str, ai_response: List[str]) -> dict:
-        """TODO."""
+        """Set the AI response of a business post request and mark it done."""
         log.info(f"Setting AI responses: {business_id} ...")
-        self.db = read_json_file(self.db_filepath)
-        business_info = self.db.get(business_id, {})
-        business_info["post_request"]["ai_response"] = ai_response
-        business_info["post_request"]["in_progress"] = False
-        self.db[business_id] = business_info
-        overwrite_json_file(self.db_filepath, self.db)
+        with self._lock:
+            business_info = dict(self.db.get(business_id, {}))
+            post_request = dict(business_info["post_request"])
+            post_request["ai_response"] = ai_response
+            post_request["in_progress"] = False
+            business_info["post_request"] = post_request
+            self._append({"op": "set", "id": business_id, "record": business_info})
         return business_info
@@ -0,0 +1,53 @@
+"""Select and create the configured database backend."""
+
+from app.core.database.base_database import BaseDatabase
+from app.core.database.cached_database import CachedDatabase
+from app.core.database.database import Database
+from app.core.database.sharded_database import ShardedDatabase
+from app.core.database.sqlite_database import SqliteDatabase
+from app.core.fastapi_config import Settings
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+
+def create_database(settings: Settings) -> BaseDatabase:
+    """Create the database backend selected in settings.
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        Database backend instance
+    """
+    backend = settings.DATABASE_BACKEND.lower()
+    log.info(f"Using database backend: {backend}")
+    if backend == "json":
+        database = Database(
+            settings.DATABASE_JSON_FILEPATH,
+            case_insensitive_lookup=settings.DATABASE_CASE_INSENSITIVE_LOOKUP,
+            serializer=settings.DATABASE_SERIALIZER,
+        )
+    elif backend == "sqlite":
+        database = SqliteDatabase(
+            settings.DATABASE_SQLITE_FILEPATH,
+            case_insensitive_lookup=settings.DATABASE_CASE_INSENSITIVE_LOOKUP,
+        )
+        # First start after switching from the json backend: keep its businesses
+        database.import_json_database(settings.DATABASE_JSON_FILEPATH)
+    elif backend == "sharded":
+        database = ShardedDatabase(
+            settings.DATABASE_SHARDS_DIRPATH,
+            case_insensitive_lookup=settings.DATABASE_CASE_INSENSITIVE_LOOKUP,
+        )
+    else:
+        raise ValueError(f"Unknown database backend: {settings.DATABASE_BACKEND}")
+
+    if settings.DATABASE_READ_CACHE:
+        log.info(f"Using database read cache: {settings.DATABASE_READ_CACHE_SIZE} entries")
+        database = CachedDatabase(
+            database,
+            version_filepath=settings.DATABASE_VERSION_FILEPATH,
+            max_entries=settings.DATABASE_READ_CACHE_SIZE,
+        )
+    return database
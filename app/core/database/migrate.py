@@ -0,0 +1,65 @@
+"""Convert a database file between snapshot formats.
+
+Usage:
+    python -m app.core.database.migrate SOURCE DESTINATION --format records
+"""
+
+import argparse
+import os
+
+from app.core.database.database import Database
+from app.core.database.serializers import SERIALIZERS, get_serializer
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+
+def migrate(source_filepath: str, destination_filepath: str, serializer_name: str) -> int:
+    """Convert a database file to another snapshot format.
+
+    NOTE:
+        Any write-ahead log next to the source file is replayed in memory, so
+        the destination contains every committed write. The source files are
+        opened read-only and never changed.
+
+    Args:
+        source_filepath: Path of the existing database file
+        destination_filepath: Path of the database file to write
+        serializer_name: Format of the destination file
+
+    Returns:
+        Number of businesses migrated
+    """
+    serializer = get_serializer(serializer_name)
+    if os.path.abspath(source_filepath) == os.path.abspath(destination_filepath):
+        raise ValueError("Source and destination must differ")
+    if not os.path.isfile(source_filepath):
+        raise FileNotFoundError(f"Database file does not exist: {source_filepath}")
+
+    data = Database(source_filepath, read_only=True).get_all_business_info()
+    serializer.check(data)
+
+    log.info(f"Writing {len(data)} businesses to {destination_filepath} as {serializer.name} ...")
+    temp_filepath = f"{destination_filepath}.tmp"
+    with open(temp_filepath, "wb") as destination_file:
+        serializer.dump(data, destination_file)
+        destination_file.flush()
+        os.fsync(destination_file.fileno())
+    os.replace(temp_filepath, destination_filepath)
+    return len(data)
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="Existing database file")
+    parser.add_argument("destination", help="Database file to write")
+    parser.add_argument("--format", choices=list(SERIALIZERS), default="records")
+    args = parser.parse_args()
+
+    count = migrate(args.source, args.destination, args.format)
+    print(f"Migrated {count} businesses to {args.destination} ({args.format})")
+
+
+if __name__ == "__main__":
+    main()
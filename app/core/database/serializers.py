@@ -0,0 +1,180 @@
+"""Serializers for the database snapshot file."""
+
+import json
+import struct
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Dict
+
+from app.core.utility.logger_setup import get_logger
+
+try:
+    import msgpack
+except ImportError:  # Optional, enables the "msgpack" format
+    msgpack = None
+
+log = get_logger()
+
+
+class Serializer(ABC):
+    """Read and write a whole dataset of business records."""
+
+    name = ""
+
+    @abstractmethod
+    def dump(self, data: dict, file: BinaryIO) -> None:
+        """Write dataset to a binary file.
+
+        Args:
+            data: Business records keyed by business ID
+            file: File opened for binary writing
+        """
+
+    @abstractmethod
+    def load(self, file: BinaryIO) -> dict:
+        """Read dataset from a binary file.
+
+        Args:
+            file: File opened for binary reading
+
+        Returns:
+            Business records keyed by business ID
+        """
+
+    def check(self, data: dict) -> None:
+        """Check that a dataset can be written in this format.
+
+        Args:
+            data: Business records keyed by business ID
+
+        Raises:
+            ValueError: If the dataset cannot be written
+        """
+
+
+class JsonSerializer(Serializer):
+    """Single compact JSON document, compatible with the original database file."""
+
+    name = "json"
+
+    def dump(self, data: dict, file: BinaryIO) -> None:
+        """Write dataset as one JSON document."""
+        file.write(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+    def load(self, file: BinaryIO) -> dict:
+        """Read dataset from one JSON document."""
+        content = file.read()
+        return json.loads(content) if content.strip() else {}
+
+
+class RecordSerializer(Serializer):
+    """Length-prefixed binary records.
+
+    NOTE:
+        Layout is a magic header followed by one record per business:
+
+            MAGIC | (uint32 id, uint32 length, <length> bytes compact JSON)*
+
+        Records are independent, so a reader never holds more than one encoded
+        record next to the decoded dataset. A torn tail is logged and loading
+        stops at the last complete record instead of failing on the whole file.
+    """
+
+    name = "records"
+    MAGIC = b"HBDBREC1"
+    HEADER = struct.Struct(">II")
+    MAX_ID = 2**32 - 1
+
+    def check(self, data: dict) -> None:
+        """Check that every business ID fits the uint32 ID field."""
+        for business_id in data:
+            if not (business_id.isdigit() and int(business_id) <= self.MAX_ID):
+                raise ValueError(
+                    f"The {self.name} format only stores numeric business IDs up to "
+                    f"{self.MAX_ID}, found: {business_id!r}. Use the json format."
+                )
+
+    def dump(self, data: dict, file: BinaryIO) -> None:
+        """Write dataset as length-prefixed records."""
+        file.write(self.MAGIC)
+        for business_id, record in data.items():
+            payload = json.dumps(record, separators=(",", ":")).encode("utf-8")
+            file.write(self.HEADER.pack(int(business_id), len(payload)))
+            file.write(payload)
+
+    def load(self, file: BinaryIO) -> dict:
+        """Read dataset from length-prefixed records."""
+        if file.read(len(self.MAGIC)) != self.MAGIC:
+            raise ValueError("Not a record database file")
+
+        data = {}
+        while True:
+            header = file.read(self.HEADER.size)
+            if not header:
+                break
+            if len(header) < self.HEADER.size:
+                log.warning(f"Ignoring truncated record header after {len(data)} records")
+                break
+            business_id, length = self.HEADER.unpack(header)
+            payload = file.read(length)
+            if len(payload) < length:
+                log.warning(f"Ignoring truncated record for business {business_id}")
+                break
+            data[str(business_id)] = json.loads(payload)
+        return data
+
+
+class MsgpackSerializer(Serializer):
+    """Single MessagePack document, available when `msgpack` is installed."""
+
+    name = "msgpack"
+    MAGIC = b"HBDBMPK1"
+
+    def dump(self, data: dict, file: BinaryIO) -> None:
+        """Write dataset as one MessagePack document."""
+        file.write(self.MAGIC)
+        file.write(msgpack.packb(data))
+
+    def load(self, file: BinaryIO) -> dict:
+        """Read dataset from one MessagePack document."""
+        if file.read(len(self.MAGIC)) != self.MAGIC:
+            raise ValueError("Not a msgpack database file")
+        return msgpack.unpackb(file.read())
+
+
+SERIALIZERS: Dict[str, Serializer] = {
+    serializer.name: serializer for serializer in (JsonSerializer(), RecordSerializer())
+}
+if msgpack is not None:
+    SERIALIZERS[MsgpackSerializer.name] = MsgpackSerializer()
+
+
+def get_serializer(name: str) -> Serializer:
+    """Get a serializer by name.
+
+    Args:
+        name: Serializer name
+
+    Returns:
+        Serializer instance
+    """
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown database serializer: {name}. Options: {list(SERIALIZERS)}")
+    return SERIALIZERS[name]
+
+
+def detect_serializer(file: BinaryIO) -> Serializer:
+    """Detect the serializer a file was written with and rewind it.
+
+    Args:
+        file: File opened for binary reading
+
+    Returns:
+        Serializer able to load the file
+    """
+    magic = file.read(len(RecordSerializer.MAGIC))
+    file.seek(0)
+    if magic == RecordSerializer.MAGIC:
+        return SERIALIZERS[RecordSerializer.name]
+    if magic == MsgpackSerializer.MAGIC:
+        return get_serializer(MsgpackSerializer.name)
+    return SERIALIZERS[JsonSerializer.name]
@@ -0,0 +1,493 @@
+"""Manage per-business sharded database."""
+
+import bisect
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from itertools import islice
+from typing import Callable, Iterator, List, Optional, Tuple, Union
+
+from app.core.database.base_database import BaseDatabase, project_fields
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+
+class ShardedDatabase(BaseDatabase):
+    """Manage per-business sharded database.
+
+    NOTE:
+        Every business is its own JSON file, replaced atomically on write, so
+        the cost of a write does not depend on the number of businesses.
+        Read-modify-write of a business is serialized with a striped file
+        lock, which works across gunicorn workers while writes to businesses
+        in different stripes run in parallel.
+
+        The set of existing businesses is an append-only manifest of ID
+        additions and removals. Each worker keeps a sorted copy in memory and
+        only reads entries appended since its last look, so pagination is a
+        binary search. A business is visible only once its manifest entry is
+        written, which makes a bulk import appear all at once: its records are
+        fsynced first, then committed by one fsynced manifest entry.
+
+        Layout of the database directory:
+
+            businesses/<id>.json        One file per business
+            index/<field>/<hash>.json   IDs of businesses with that name/email
+            locks/<kind>-<stripe>.lock  Striped file locks
+            manifest                    Lines of "+<first id> <count>" or "-<id>"
+            next_id                     Monotonic ID counter
+    """
+
+    INDEXED_FIELDS = ("name", "email")
+
+    def __init__(
+        self,
+        dirpath: str = "database_shards",
+        lock_stripes: int = 64,
+        case_insensitive_lookup: bool = False,
+    ) -> None:
+        """Create database directory layout if needed.
+
+        Args:
+            dirpath: Path to the database directory
+            lock_stripes: Number of lock files each kind of lock is spread over
+            case_insensitive_lookup: Set True to match name and email case-folded
+        """
+        self.dirpath = dirpath
+        self.lock_stripes = lock_stripes
+        self.case_insensitive_lookup = case_insensitive_lookup
+        self.businesses_dirpath = os.path.join(dirpath, "businesses")
+        self.locks_dirpath = os.path.join(dirpath, "locks")
+        self.next_id_filepath = os.path.join(dirpath, "next_id")
+        self.manifest_filepath = os.path.join(dirpath, "manifest")
+
+        self._ids_lock = threading.Lock()
+        self._ids: List[int] = []
+        self._manifest_offset = 0
+
+        log.info(f"Opening sharded database: {self.dirpath}")
+        os.makedirs(self.businesses_dirpath, exist_ok=True)
+        os.makedirs(self.locks_dirpath, exist_ok=True)
+        for field in self.INDEXED_FIELDS:
+            os.makedirs(os.path.join(dirpath, "index", field), exist_ok=True)
+        self._create_manifest()
+
+    ##########################################################################
+    #                           Files and locking
+    ##########################################################################
+
+    @contextmanager
+    def _locked(self, kind: str, key: str) -> Iterator[None]:
+        """Hold the striped file lock of a key.
+
+        NOTE:
+            Each acquisition opens its own file descriptor, so the lock also
+            excludes other threads of this process. Never nest two locks of the
+            same kind, they may map to the same stripe.
+
+        Args:
+            kind: Lock kind, e.g. "business" or "index"
+            key: Key to lock
+        """
+        stripe = zlib.crc32(key.encode("utf-8")) % self.lock_stripes
+        lock_filepath = os.path.join(self.locks_dirpath, f"{kind}-{stripe}.lock")
+        lock_fd = os.open(lock_filepath, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(lock_fd)
+
+    @staticmethod
+    def _read_file(filepath: str, default: Union[dict, None] = None) -> Union[dict, None]:
+        """Read a JSON file, returning a default if it does not exist.
+
+        Args:
+            filepath: Path of the JSON file
+            default: Value returned if the file does not exist
+
+        Returns:
+            JSON file content
+        """
+        try:
+            with open(filepath, "r", encoding="utf-8") as json_file:
+                return json.load(json_file)
+        except FileNotFoundError:
+            return default
+
+    @staticmethod
+    def _replace_file(filepath: str, data: dict, fsync: bool = False) -> None:
+        """Atomically replace a JSON file.
+
+        Args:
+            filepath: Path of the JSON file
+            data: Content to write
+            fsync: Set True to flush the content to disk before replacing
+        """
+        temp_filepath = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_filepath, "w", encoding="utf-8") as json_file:
+            json.dump(data, json_file, separators=(",", ":"))
+            if fsync:
+                json_file.flush()
+                os.fsync(json_file.fileno())
+        os.replace(temp_filepath, filepath)
+
+    def _business_filepath(self, business_id: Union[int, str]) -> str:
+        """Get the shard file path of a business."""
+        return os.path.join(self.businesses_dirpath, f"{int(business_id)}.json")
+
+    def _index_filepath(self, field: str, value: str) -> str:
+        """Get the index file path of a field value."""
+        key = value.casefold() if self.case_insensitive_lookup else value
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.dirpath, "index", field, f"{digest}.json")
+
+    ##########################################################################
+    #                               Manifest
+    ##########################################################################
+
+    def _create_manifest(self) -> None:
+        """Create the manifest from the business files of an older database directory."""
+        with self._locked("manifest", "manifest"):
+            if os.path.isfile(self.manifest_filepath):
+                return
+            business_ids = sorted(
+                int(entry.name[: -len(".json")])
+                for entry in os.scandir(self.businesses_dirpath)
+                if entry.name.endswith(".json")
+            )
+            temp_filepath = f"{self.manifest_filepath}.{os.getpid()}.tmp"
+            with open(temp_filepath, "w", encoding="utf-8") as manifest_file:
+                manifest_file.writelines(f"+{business_id} 1\n" for business_id in business_ids)
+                manifest_file.flush()
+                os.fsync(manifest_file.fileno())
+            os.replace(temp_filepath, self.manifest_filepath)
+
+    def _append_manifest(self, entry: str) -> None:
+        """Durably append an entry to the manifest.
+
+        Args:
+            entry: Manifest line without line ending
+        """
+        with self._locked("manifest", "manifest"):
+            with open(self.manifest_filepath, "rb+") as manifest_file:
+                # Drop a line torn by a crash, it was never committed
+                size = manifest_file.seek(0, os.SEEK_END)
+                manifest_file.seek(max(size - 1, 0))
+                if manifest_file.read(1) not in (b"", b"\n"):
+                    manifest_file.seek(max(size - 4096, 0))
+                    tail = manifest_file.read()
+                    manifest_file.truncate(size - len(tail) + tail.rfind(b"\n") + 1)
+                    manifest_file.seek(0, os.SEEK_END)
+                manifest_file.write(f"{entry}\n".encode("utf-8"))
+                manifest_file.flush()
+                os.fsync(manifest_file.fileno())
+
+    def _business_ids(self) -> List[int]:
+        """Get all business IDs in ascending order, reading new manifest entries first.
+
+        Returns:
+            Sorted business IDs, the list must not be modified
+        """
+        with self._ids_lock:
+            if os.path.getsize(self.manifest_filepath) == self._manifest_offset:
+                return self._ids
+            with open(self.manifest_filepath, "rb") as manifest_file:
+                manifest_file.seek(self._manifest_offset)
+                content = manifest_file.read()
+
+            # A line without line ending is still being written
+            complete = content.rfind(b"\n") + 1
+            self._manifest_offset += complete
+            ids = list(self._ids)
+            for line in content[:complete].decode("utf-8").splitlines():
+                try:
+                    if line.startswith("+"):
+                        first_id, count = (int(value) for value in line[1:].split())
+                        for business_id in range(first_id, first_id + count):
+                            index = bisect.bisect_left(ids, business_id)
+                            if index == len(ids) or ids[index] != business_id:
+                                ids.insert(index, business_id)
+                    elif line.startswith("-"):
+                        index = bisect.bisect_left(ids, int(line[1:]))
+                        if index < len(ids) and ids[index] == int(line[1:]):
+                            del ids[index]
+                    elif line:
+                        raise ValueError(line)
+                except ValueError:
+                    log.warning(f"Skipping corrupt manifest entry: {line!r}")
+            # Swapped, never mutated, so callers may keep iterating an old list
+            self._ids = ids
+            return self._ids
+
+    def _exists(self, business_id: Union[int, str]) -> bool:
+        """Check whether a business is committed to the manifest."""
+        business_ids = self._business_ids()
+        index = bisect.bisect_left(business_ids, int(business_id))
+        return index < len(business_ids) and business_ids[index] == int(business_id)
+
+    ##########################################################################
+    #                       IDs, indexes and records
+    ##########################################################################
+
+    def _allocate_ids(self, count: int) -> int:
+        """Reserve a range of new business IDs.
+
+        Args:
+            count: Number of IDs to reserve
+
+        Returns:
+            First reserved ID
+        """
+        with self._locked("counter", "next_id"):
+            first_id = self._read_file(self.next_id_filepath, {"next_id": 1})["next_id"]
+            self._replace_file(self.next_id_filepath, {"next_id": first_id + count})
+        return first_id
+
+    def _update_index(self, field: str, value: str, business_id: str, add: bool) -> None:
+        """Add or remove a business from the index file of a field value.
+
+        Args:
+            field: Indexed field name
+            value: Field value
+            business_id: ID of the business
+            add: True to add, False to remove
+        """
+        index_filepath = self._index_filepath(field, value)
+        with self._locked("index", index_filepath):
+            business_ids = self._read_file(index_filepath, {})
+            if add:
+                business_ids[business_id] = None
+            else:
+                business_ids.pop(business_id, None)
+
+            if business_ids:
+                self._replace_file(index_filepath, business_ids)
+            elif os.path.isfile(index_filepath):
+                os.remove(index_filepath)
+
+    def _reindex(self, business_id: str, old_record: dict, new_record: dict) -> None:
+        """Update secondary indexes after a record changed.
+
+        Args:
+            business_id: ID of the business
+            old_record: Record before the change, empty if created
+            new_record: Record after the change, empty if removed
+        """
+        for field in self.INDEXED_FIELDS:
+            old_value, new_value = old_record.get(field), new_record.get(field)
+            if old_value == new_value:
+                continue
+            if isinstance(old_value, str):
+                self._update_index(field, old_value, business_id, add=False)
+            if isinstance(new_value, str):
+                self._update_index(field, new_value, business_id, add=True)
+
+    def _write_record(self, business_id: str, record: dict, fsync: bool = False) -> None:
+        """Write a new business record.
+
+        NOTE:
+            The business is not visible until it is added to the manifest.
+
+        Args:
+            business_id: ID of the business
+            record: Business record
+            fsync: Set True to flush the record to disk
+        """
+        with self._locked("business", business_id):
+            self._replace_file(self._business_filepath(business_id), record, fsync)
+            self._reindex(business_id, {}, record)
+
+    def _update_record(
+        self, business_id: str, update: Callable[[dict], Optional[bool]]
+    ) -> Optional[dict]:
+        """Read, modify and write back a single business record.
+
+        Args:
+            business_id: ID of the business
+            update: Callable modifying the record in place, returns False to leave it unchanged
+
+        Returns:
+            Updated business record, None if left unchanged
+        """
+        business_id = str(business_id)
+        with self._locked("business", business_id):
+            business_filepath = self._business_filepath(business_id)
+            exists = self._exists(business_id)
+            old_record = self._read_file(business_filepath, {})
+            # A file not in the manifest is left over from an interrupted import
+            record = dict(old_record) if exists else {}
+            if update(record) is False:
+                return None
+            self._replace_file(business_filepath, record)
+            self._reindex(business_id, old_record, record)
+            if not exists:
+                self._append_manifest(f"+{business_id} 1")
+        return record
+
+    def _lookup(self, field: str, value: str) -> Union[dict, None]:
+        """Find the first business with a matching indexed field.
+
+        Args:
+            field: Indexed field name
+            value: Value to match
+
+        Returns:
+            Business record, None if not found
+        """
+        business_ids = self._read_file(self._index_filepath(field, value), {})
+        for business_id in business_ids:
+            if not self._exists(business_id):
+                continue
+            record = self._read_file(self._business_filepath(business_id))
+            if record is not None:
+                return record
+        return None
+
+    ##########################################################################
+    #                             Business data
+    ##########################################################################
+
+    def remove_all_businesses(self) -> bool:
+        """Remove all businesses."""
+        log.info("Removing all businesses ...")
+        for business_id in self._business_ids():
+            self.remove_business(str(business_id))
+        return True
+
+    def get_all_business_info(self) -> dict:
+        """Get all business info keyed by business ID."""
+        log.info("Getting all business info ...")
+        return dict(self.get_business_page(limit=len(self._business_ids())))
+
+    def create_business(
+        self, name: str, description: str, specifics: str, email: str, password: str
+    ) -> Tuple[bool, dict, str]:
+        """Create a new business."""
+        log.info(f"Creating business: {name}")
+        business_info = {
+            "name": name,
+            "description": description,
+            "specifics": specifics,
+            "email": email,
+            "password": password,
+        }
+        business_id = str(self._allocate_ids(1))
+        self._write_record(business_id, business_info)
+        self._append_manifest(f"+{business_id} 1")
+        return True, business_info, business_id
+
+    def create_businesses(self, businesses: List[dict]) -> List[Tuple[bool, dict, str]]:
+        """Create many businesses, committed by a single manifest entry."""
+        log.info(f"Creating {len(businesses)} businesses ...")
+        if not businesses:
+            return []
+        first_id = self._allocate_ids(len(businesses))
+        results = []
+        for index, business_info in enumerate(businesses):
+            business_id = str(first_id + index)
+            self._write_record(business_id, business_info, fsync=True)
+            results.append((True, business_info, business_id))
+
+        # Records must be on disk before the entry that makes them visible
+        businesses_dir_fd = os.open(self.businesses_dirpath, os.O_RDONLY)
+        try:
+            os.fsync(businesses_dir_fd)
+        finally:
+            os.close(businesses_dir_fd)
+        self._append_manifest(f"+{first_id} {len(businesses)}")
+        return results
+
+    def get_all_business_ids(self) -> List[int]:
+        """Get all business IDs."""
+        log.info("Getting all business IDs ...")
+        return list(self._business_ids())
+
+    def get_business_page(
+        self, after_id: int = 0, limit: int = 100, fields: Optional[List[str]] = None
+    ) -> List[Tuple[str, dict]]:
+        """Get businesses ordered by ID, starting after a cursor."""
+        page = []
+        business_ids = self._business_ids()
+        for business_id in islice(business_ids, bisect.bisect_right(business_ids, after_id), None):
+            if len(page) >= limit:
+                break
+            if fields == []:
+                page.append((str(business_id), {}))
+                continue
+            record = self._read_file(self._business_filepath(business_id))
+            if record is not None:
+                page.append((str(business_id), project_fields(record, fields)))
+        return page
+
+    def get_business_info(
+        self, business_id: int = None, name: str = None, email: str = None
+    ) -> Union[dict, None]:
+        """Get business info by ID, name or email."""
+        log.info(f"Getting business info: {business_id} ...")
+        if business_id:
+            if not self._exists(business_id):
+                return {}
+            return self._read_file(self._business_filepath(business_id), {})
+        if name:
+            return self._lookup("name", name)
+        if email:
+            return self._lookup("email", email)
+        log.error("Failed to get business info. No ID, name or email provided.")
+        return None
+
+    def remove_business(self, business_id: str) -> bool:
+        """Remove a single business."""
+        log.info(f"Removing business: {business_id} ...")
+        with self._locked("business", str(business_id)):
+            business_filepath = self._business_filepath(business_id)
+            record = self._read_file(business_filepath) if self._exists(business_id) else None
+            if record is None:
+                log.error(f"Failed to remove business. Business not found: {business_id}")
+                return False
+            self._append_manifest(f"-{int(business_id)}")
+            os.remove(business_filepath)
+            self._reindex(str(business_id), record, {})
+        return True
+
+    def set_business_info(self, business_id: str, key: str, value: str) -> bool:
+        """Set a single top level field of a business."""
+        log.info(f"Setting business info: {business_id} ...")
+        self._update_record(business_id, lambda record: record.__setitem__(key, value))
+        return True
+
+    def set_post_request_info(self, business_id: str, post_request_info: dict) -> dict:
+        """Set the post request of a business."""
+        log.info(f"Setting post request info: {business_id} ...")
+        return self._update_record(
+            business_id, lambda record: record.__setitem__("post_request", post_request_info)
+        )
+
+    def update_post_request_info(
+        self, business_id: str, updates: dict, expected_job_id: Optional[str] = None
+    ) -> Optional[dict]:
+        """Merge fields into the post request of a business."""
+        log.debug(f"Updating post request info: {business_id} ...")
+
+        def update(record: dict) -> Optional[bool]:
+            job_id = record.get("post_request", {}).get("job_id")
+            if expected_job_id is not None and job_id != expected_job_id:
+                return False
+            record["post_request"] = {**record.get("post_request", {}), **updates}
+
+        return self._update_record(business_id, update)
+
+    def set_ai_response(self, business_id: str, ai_response: List[str]) -> dict:
+        """Set the AI response of a business post request and mark it done."""
+        log.info(f"Setting AI responses: {business_id} ...")
+
+        def update(record: dict) -> None:
+            record["post_request"]["ai_response"] = ai_response
+            record["post_request"]["in_progress"] = False
+
+        return self._update_record(business_id, update)
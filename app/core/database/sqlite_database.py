@@ -0,0 +1,338 @@
+"""Manage SQLite database."""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple, Union
+
+from app.core.database.base_database import BaseDatabase, project_fields
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS businesses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    email TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_businesses_name ON businesses (name);
+CREATE INDEX IF NOT EXISTS idx_businesses_email ON businesses (email);
+CREATE INDEX IF NOT EXISTS idx_businesses_name_nocase ON businesses (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_businesses_email_nocase ON businesses (email COLLATE NOCASE);
+"""
+
+
+class SqliteDatabase(BaseDatabase):
+    """Manage SQLite database.
+
+    NOTE:
+        Safe to share between gunicorn workers. The database runs in WAL mode,
+        so readers never block the single writer, and every read-modify-write
+        runs inside a `BEGIN IMMEDIATE` transaction.
+
+        Each thread of each worker process gets its own connection, which is
+        reused for the lifetime of that thread.
+    """
+
+    def __init__(
+        self,
+        filepath: str = "database.sqlite3",
+        busy_timeout: float = 30.0,
+        case_insensitive_lookup: bool = False,
+    ) -> None:
+        """Open database and create schema if needed.
+
+        Args:
+            filepath: Path to the SQLite database file
+            busy_timeout: Seconds to wait for another writer to release the lock
+            case_insensitive_lookup: Set True to match name and email ignoring (ASCII) case
+        """
+        self.db_filepath = filepath
+        self.busy_timeout = busy_timeout
+        self.case_insensitive_lookup = case_insensitive_lookup
+        self._local = threading.local()
+
+        log.info(f"Opening SQLite database: {self.db_filepath}")
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection of the current thread, opening one if needed.
+
+        Returns:
+            SQLite connection
+        """
+        connection = getattr(self._local, "connection", None)
+        # Connections must not be shared across a fork, reopen in the child
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self.db_filepath,
+                timeout=self.busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run statements inside a write transaction.
+
+        Yields:
+            SQLite connection inside an open transaction
+        """
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    @staticmethod
+    def _read_record(connection: sqlite3.Connection, business_id: str) -> dict:
+        """Read a single business record.
+
+        Args:
+            connection: SQLite connection
+            business_id: ID of the business
+
+        Returns:
+            Business record, empty if not found
+        """
+        row = connection.execute(
+            "SELECT data FROM businesses WHERE id = ?", (int(business_id),)
+        ).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    @staticmethod
+    def _write_record(connection: sqlite3.Connection, business_id: str, record: dict) -> None:
+        """Insert or replace a single business record.
+
+        Args:
+            connection: SQLite connection
+            business_id: ID of the business
+            record: Business record
+        """
+        connection.execute(
+            "INSERT OR REPLACE INTO businesses (id, name, email, data) VALUES (?, ?, ?, ?)",
+            (int(business_id), record.get("name"), record.get("email"), json.dumps(record)),
+        )
+
+    def close(self) -> None:
+        """Close the connection of the current thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def import_json_database(self, json_filepath: str) -> int:
+        """Import a json backend database file into a database that was never written.
+
+        The import runs once: after it, or after any business was ever created,
+        the ID sequence exists and later calls do nothing. Business IDs are kept,
+        so existing clients keep working after switching backend.
+
+        Args:
+            json_filepath: Path to the json backend snapshot file
+
+        Returns:
+            Number of imported businesses
+        """
+        # Imported here: the json backend is only needed for this one-off import
+        from app.core.database.database import Database
+
+        sequence_sql = "SELECT seq FROM sqlite_sequence WHERE name = 'businesses'"
+        if not os.path.isfile(json_filepath):
+            return 0
+        if self._connection().execute(sequence_sql).fetchone() is not None:
+            return 0
+        source = Database(json_filepath, read_only=True)
+        businesses = source.get_all_business_info()
+        next_id = source._next_id
+        if not businesses and next_id <= 1:
+            return 0
+
+        imported = 0
+        with self._transaction() as connection:
+            # Another worker may have imported while the json file was loading
+            if connection.execute(sequence_sql).fetchone() is not None:
+                return 0
+            for business_id, record in businesses.items():
+                if not str(business_id).isdigit():
+                    log.error(f"Cannot import business with non-numeric ID: {business_id}")
+                    continue
+                self._write_record(connection, business_id, record)
+                imported += 1
+            last_id = max([next_id - 1, *(int(id) for id in businesses if str(id).isdigit())])
+            connection.execute("DELETE FROM sqlite_sequence WHERE name = 'businesses'")
+            connection.execute(
+                "INSERT INTO sqlite_sequence (name, seq) VALUES ('businesses', ?)", (last_id,)
+            )
+        log.warning(f"Imported {imported} businesses from {json_filepath} into {self.db_filepath}")
+        return imported
+
+    def remove_all_businesses(self) -> bool:
+        """Remove all businesses."""
+        log.info("Removing all businesses ...")
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM businesses")
+        return True
+
+    def get_all_business_info(self) -> dict:
+        """Get all business info keyed by business ID."""
+        log.info("Getting all business info ...")
+        rows = self._connection().execute("SELECT id, data FROM businesses ORDER BY id")
+        return {str(id): json.loads(data) for id, data in rows}
+
+    def create_business(
+        self, name: str, description: str, specifics: str, email: str, password: str
+    ) -> Tuple[bool, dict, str]:
+        """Create a new business."""
+        log.info(f"Creating business: {name}")
+        business_info = {
+            "name": name,
+            "description": description,
+            "specifics": specifics,
+            "email": email,
+            "password": password,
+        }
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "INSERT INTO businesses (name, email, data) VALUES (?, ?, ?)",
+                (name, email, json.dumps(business_info)),
+            )
+        return True, business_info, str(cursor.lastrowid)
+
+    def create_businesses(self, businesses: List[dict]) -> List[Tuple[bool, dict, str]]:
+        """Create many businesses in a single durable write."""
+        log.info(f"Creating {len(businesses)} businesses ...")
+        results = []
+        with self._transaction() as connection:
+            for business_info in businesses:
+                cursor = connection.execute(
+                    "INSERT INTO businesses (name, email, data) VALUES (?, ?, ?)",
+                    (
+                        business_info.get("name"),
+                        business_info.get("email"),
+                        json.dumps(business_info),
+                    ),
+                )
+                results.append((True, business_info, str(cursor.lastrowid)))
+        return results
+
+    def get_all_business_ids(self) -> List[int]:
+        """Get all business IDs."""
+        log.info("Getting all business IDs ...")
+        rows = self._connection().execute("SELECT id FROM businesses ORDER BY id")
+        return [id for (id,) in rows]
+
+    def get_business_page(
+        self, after_id: int = 0, limit: int = 100, fields: Optional[List[str]] = None
+    ) -> List[Tuple[str, dict]]:
+        """Get businesses ordered by ID, starting after a cursor."""
+        connection = self._connection()
+        if fields == []:
+            rows = connection.execute(
+                "SELECT id FROM businesses WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+            )
+            return [(str(id), {}) for (id,) in rows]
+        rows = connection.execute(
+            "SELECT id, data FROM businesses WHERE id > ? ORDER BY id LIMIT ?", (after_id, limit)
+        )
+        return [(str(id), project_fields(json.loads(data), fields)) for id, data in rows]
+
+    def _lookup(self, field: str, value: str) -> Union[dict, None]:
+        """Find the first business with a matching indexed field.
+
+        Args:
+            field: Indexed column name
+            value: Value to match
+
+        Returns:
+            Business record, None if not found
+        """
+        collation = " COLLATE NOCASE" if self.case_insensitive_lookup else ""
+        row = (
+            self._connection()
+            .execute(
+                f"SELECT data FROM businesses WHERE {field} = ?{collation} ORDER BY id LIMIT 1",
+                (value,),
+            )
+            .fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+    def get_business_info(
+        self, business_id: int = None, name: str = None, email: str = None
+    ) -> Union[dict, None]:
+        """Get business info by ID, name or email."""
+        log.info(f"Getting business info: {business_id} ...")
+        if business_id:
+            return self._read_record(self._connection(), business_id)
+        if name:
+            return self._lookup("name", name)
+        if email:
+            return self._lookup("email", email)
+        log.error("Failed to get business info. No ID, name or email provided.")
+        return None
+
+    def remove_business(self, business_id: str) -> bool:
+        """Remove a single business."""
+        log.info(f"Removing business: {business_id} ...")
+        with self._transaction() as connection:
+            cursor = connection.execute("DELETE FROM businesses WHERE id = ?", (int(business_id),))
+        if not cursor.rowcount:
+            log.error(f"Failed to remove business. Business not found: {business_id}")
+            return False
+        return True
+
+    def set_business_info(self, business_id: str, key: str, value: str) -> bool:
+        """Set a single top level field of a business."""
+        log.info(f"Setting business info: {business_id} ...")
+        with self._transaction() as connection:
+            business_info = self._read_record(connection, business_id)
+            business_info[key] = value
+            self._write_record(connection, business_id, business_info)
+        return True
+
+    def set_post_request_info(self, business_id: str, post_request_info: dict) -> dict:
+        """Set the post request of a business."""
+        log.info(f"Setting post request info: {business_id} ...")
+        with self._transaction() as connection:
+            business_info = self._read_record(connection, business_id)
+            business_info["post_request"] = post_request_info
+            self._write_record(connection, business_id, business_info)
+        return business_info
+
+    def update_post_request_info(
+        self, business_id: str, updates: dict, expected_job_id: Optional[str] = None
+    ) -> Optional[dict]:
+        """Merge fields into the post request of a business."""
+        log.debug(f"Updating post request info: {business_id} ...")
+        with self._transaction() as connection:
+            business_info = self._read_record(connection, business_id)
+            job_id = business_info.get("post_request", {}).get("job_id")
+            if expected_job_id is not None and job_id != expected_job_id:
+                return None
+            business_info["post_request"] = {**business_info.get("post_request", {}), **updates}
+            self._write_record(connection, business_id, business_info)
+        return business_info
+
+    def set_ai_response(self, business_id: str, ai_response: List[str]) -> dict:
+        """Set the AI response of a business post request and mark it done."""
+        log.info(f"Setting AI responses: {business_id} ...")
+        with self._transaction() as connection:
+            business_info = self._read_record(connection, business_id)
+            business_info["post_request"]["ai_response"] = ai_response
+            business_info["post_request"]["in_progress"] = False
+            self._write_record(connection, business_id, business_info)
+        return business_info
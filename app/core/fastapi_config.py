@@ -1,6 +1,6 @@
 """FastAPI App Settings."""
 
-from typing import List, Union
+from typing import List, Optional, Union
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -15,6 +15,94 @@ class Settings(BaseSettings):
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
     APP_ENV: str = "prod"
 
+    # Database backend: "sqlite" or "sharded" (multi-worker safe), "json" (single worker only).
+    # On its first start the sqlite backend imports the businesses of DATABASE_JSON_FILEPATH.
+    DATABASE_BACKEND: str = "sqlite"
+    DATABASE_JSON_FILEPATH: str = "app/core/database/database.json"
+    DATABASE_SERIALIZER: str = "json"  # Snapshot format of json backend: json, records, msgpack
+    DATABASE_SQLITE_FILEPATH: str = "app/core/database/database.sqlite3"
+    DATABASE_SHARDS_DIRPATH: str = "app/core/database/database_shards"
+    DATABASE_CASE_INSENSITIVE_LOOKUP: bool = False
+
+    # Per worker read cache, invalidated across workers through a shared counter file
+    DATABASE_READ_CACHE: bool = False
+    DATABASE_READ_CACHE_SIZE: int = 10000
+    DATABASE_VERSION_FILEPATH: str = "app/core/database/database.version"
+
+    # AI provider: "openai", or "fake" for offline load tests (no API key needed)
+    AI_PROVIDER: str = "openai"
+    FAKE_PROVIDER_SEED: int = 0
+    FAKE_PROVIDER_LATENCY_MS: float = 800.0
+    FAKE_PROVIDER_IMAGE_LATENCY_MS: float = 3000.0
+    FAKE_PROVIDER_LATENCY_DISTRIBUTION: str = "lognormal"  # fixed, uniform, lognormal
+    FAKE_PROVIDER_LATENCY_SIGMA: float = 0.5
+    FAKE_PROVIDER_ERROR_RATE: float = 0.0
+    FAKE_PROVIDER_INVALID_JSON_RATE: float = 0.0
+    FAKE_PROVIDER_CAPTIONS_FILEPATH: Optional[str] = None  # JSON list of caption dicts
+
+    # Shared OpenAI client connection pool, per worker
+    OPENAI_MAX_CONNECTIONS: int = 100
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_KEEPALIVE_EXPIRY: float = 30.0
+    OPENAI_TIMEOUT: float = 120.0
+    OPENAI_CONNECT_TIMEOUT: float = 10.0
+
+    # AI pipeline profile: "full" (chain of calls) or "fast" (one JSON call, then the image)
+    AI_PIPELINE_PROFILE: str = "full"
+
+    # Prompt templates, recompiled on change when APP_ENV is "dev"
+    PROMPTS_DIRPATH: str = "prompts"
+
+    # Business context of prompts: fields used, token budget, businesses cached per worker
+    AI_CONTEXT_FIELDS: List[str] = ["name", "description", "specifics"]
+    AI_CONTEXT_MAX_TOKENS: int = 256
+    AI_CONTEXT_CACHE_SIZE: int = 10000
+
+    # Persistent AI response cache, shared by all workers
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_FILEPATH: str = "app/core/ai_bot/ai_response_cache.sqlite3"
+    AI_CACHE_MAX_BYTES: int = 50_000_000
+    AI_CACHE_TTL_SECONDS: float = 86400.0
+    AI_CACHE_BYPASS_STAGES: List[str] = []  # Stage names, or "all"
+
+    # Local copies of generated images, served under /ai_api/images
+    IMAGE_STORE_DIRPATH: str = "app/core/ai_bot/images"
+    IMAGE_STORE_MAX_BYTES: int = 1_000_000_000
+    IMAGE_FETCH_TIMEOUT: float = 30.0
+
+    # Batch post generation, budgets are per worker running the batch
+    BATCH_REQUESTS_PER_MINUTE: int = 500
+    BATCH_TOKENS_PER_MINUTE: int = 200_000
+    BATCH_CONCURRENCY: int = 16
+    BATCH_MAX_RETRIES: int = 6
+    BATCH_RETRY_BASE_DELAY: float = 1.0
+    BATCH_RETRY_MAX_DELAY: float = 60.0
+    BATCH_STATUS_DIRPATH: str = "app/core/ai_bot/batches"
+    BATCH_STATUS_TTL_SECONDS: float = 7 * 86400.0  # Progress files older than this are deleted
+
+    # Background post generation jobs, per worker
+    POST_JOB_WORKERS: int = 4
+    POST_JOB_QUEUE_SIZE: int = 100
+    # Identical in-flight post requests are coalesced onto one job, across workers
+    POST_COALESCE_MAX_AGE: float = 600.0  # Older in-flight jobs are considered dead
+    POST_LOCKS_DIRPATH: str = "app/core/ai_bot/locks"
+
+    # Publishing outbox, fanned out to all selected platforms concurrently
+    PUBLISH_PLATFORMS: List[str] = ["twitter", "instagram"]  # Any of twitter, instagram, fake
+    PUBLISH_OUTBOX_FILEPATH: str = "app/core/social/publish_outbox.sqlite3"
+    PUBLISH_CONCURRENCY: int = 4  # Per platform and worker
+    PUBLISH_MAX_ATTEMPTS: int = 5
+    PUBLISH_RETRY_BASE_DELAY: float = 2.0
+    PUBLISH_RETRY_MAX_DELAY: float = 300.0
+    PUBLISH_LEASE_SECONDS: float = 600.0  # Deliveries running longer are claimed again
+    PUBLIC_BASE_URL: Optional[str] = None  # Needed by Instagram to fetch stored images
+    TWITTER_CLIENT_CACHE_SIZE: int = 32  # Credential sets with cached clients
+    TWITTER_TIMEOUT: float = 60.0
+    INSTAGRAM_API_VERSION: str = "v19.0"
+    INSTAGRAM_TIMEOUT: float = 60.0
+    FAKE_PUBLISHER_LATENCY_MS: float = 200.0
+    FAKE_PUBLISHER_ERROR_RATE: float = 0.0
+
     @field_validator("BACKEND_CORS_ORIGINS", mode="before")
     @classmethod
     def assemble_cors_origins(cls, value: Union[str, List[str]]) -> Union[List[str], str]:
@@ -0,0 +1,64 @@
+"""Interface shared by all social media publishers."""
+
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class PublishError(Exception):
+    """Raised when a platform rejects or fails a post.
+
+    NOTE:
+        Only set `retryable` when the post was certainly not created, e.g.
+        rate limits, server errors answered before the post was stored, or
+        connection failures. A retry after an ambiguous failure can post twice.
+    """
+
+    def __init__(self, message: str, retryable: bool = False, retry_after: Optional[float] = None):
+        """Run Constructor.
+
+        Args:
+            message: Error description
+            retryable: Set True if the post may be retried
+            retry_after: Seconds the platform asked to wait before a retry
+        """
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class BasePublisher(ABC):
+    """Interface shared by all social media publishers.
+
+    NOTE:
+        Publishers never block the event loop. Blocking client libraries run
+        on a thread pool owned by the publisher, so a slow platform only uses
+        up its own threads.
+
+        Set `idempotent` only for platforms that deduplicate posts by
+        idempotency key. An interrupted attempt of any other platform may
+        still create the post, so it must never run again automatically.
+    """
+
+    name = "base"
+    idempotent = False
+
+    async def open(self) -> None:
+        """Open connections, called on application start up."""
+
+    async def close(self) -> None:
+        """Close connections, called on application shutdown."""
+
+    @abstractmethod
+    async def publish(self, post: dict, idempotency_key: str) -> str:
+        """Publish a post.
+
+        Args:
+            post: Post with "caption_text" and "picture_url"
+            idempotency_key: Unique key of this post on this platform, reused on retries
+
+        Returns:
+            ID of the post on the platform
+
+        Raises:
+            PublishError: If the platform rejected or failed the post
+        """
@@ -0,0 +1,229 @@
+"""Concurrent fan-out of outbox deliveries to social media platforms."""
+
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.social.base_publisher import BasePublisher, PublishError
+from app.core.social.outbox import INTERRUPTED_ERROR, Outbox, make_key
+from app.core.utility.logger_setup import get_logger
+from app.core.utility.metrics import metrics
+
+log = get_logger()
+
+PUBLISH_ATTEMPTS = metrics.counter(
+    "publish_attempts_total", "Finished publish attempts", ["platform", "outcome"]
+)
+PUBLISH_ATTEMPT_SECONDS = metrics.histogram(
+    "publish_attempt_seconds", "Run time of publish attempts", ["platform"]
+)
+
+
+class PublishDispatcher:
+    """Concurrent fan-out of outbox deliveries to social media platforms.
+
+    NOTE:
+        Every platform has its own claim loop and concurrency limit, so the
+        platforms of a post are published concurrently and a slow or failing
+        platform never delays the others. Retryable failures are retried with
+        exponential backoff and full jitter, or after the wait the platform
+        asked for. Loops of all workers share the outbox, each delivery is
+        claimed by one of them. New posts wake the loops of this worker,
+        other workers pick them up within `poll_interval`.
+
+        A delivery interrupted by shutdown goes back to the outbox only for
+        idempotent platforms. Elsewhere the post may still be created by the
+        interrupted call, so the delivery fails for manual review instead of
+        risking a second post.
+    """
+
+    def __init__(
+        self,
+        outbox: Outbox,
+        publishers: Dict[str, BasePublisher],
+        concurrency: int = 4,
+        max_attempts: int = 5,
+        base_delay: float = 2.0,
+        max_delay: float = 300.0,
+        lease_seconds: float = 600.0,
+        poll_interval: float = 1.0,
+    ) -> None:
+        """Run Constructor.
+
+        Args:
+            outbox: Persistent outbox
+            publishers: Publisher by platform name
+            concurrency: Deliveries run concurrently per platform
+            max_attempts: Attempts per delivery before it fails
+            base_delay: Seconds to wait before the first retry, doubled per attempt
+            max_delay: Maximum seconds to wait before a retry
+            lease_seconds: Seconds a claimed delivery may run before it is claimed again, or
+                failed on platforms without idempotency keys
+            poll_interval: Maximum seconds between outbox checks
+        """
+        self.outbox = outbox
+        self.publishers = publishers
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._wake: Dict[str, asyncio.Event] = {}
+        self._loop_tasks: List[asyncio.Task] = []
+        self._delivery_tasks: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """Open publishers and start a claim loop per platform."""
+        log.info(f"Starting publish dispatcher for: {', '.join(self.publishers)} ...")
+        for platform, publisher in self.publishers.items():
+            await publisher.open()
+            self._wake[platform] = asyncio.Event()
+            self._loop_tasks.append(
+                asyncio.create_task(self._claim_loop(platform), name=f"publish-{platform}")
+            )
+
+    async def stop(self) -> None:
+        """Stop claim loops and deliveries, settling them in the outbox, and close publishers."""
+        log.info("Stopping publish dispatcher ...")
+        tasks = self._loop_tasks + list(self._delivery_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop_tasks = []
+        for publisher in self.publishers.values():
+            await publisher.close()
+
+    async def submit(
+        self,
+        business_id: str,
+        platforms: List[str],
+        post: dict,
+        idempotency_key: Optional[str] = None,
+        retry_interrupted: bool = False,
+    ) -> Tuple[str, List[dict]]:
+        """Store a post in the outbox and wake the loops of its platforms.
+
+        Args:
+            business_id: ID of the business posting
+            platforms: Platforms to post to
+            post: Post with "caption_text" and "picture_url"
+            idempotency_key: Key of the post, defaults to a hash of business and post
+            retry_interrupted: Set True to queue interrupted deliveries again, see `Outbox.add`
+
+        Returns:
+            Publish ID and the delivery of each platform
+        """
+        platforms = list(dict.fromkeys(platforms))
+        unknown = set(platforms) - set(self.publishers)
+        if unknown:
+            raise ValueError(f"Unknown platforms: {', '.join(sorted(unknown))}")
+        if idempotency_key is None:
+            idempotency_key = make_key(business_id, post["caption_text"], post["picture_url"])
+        deliveries = await asyncio.to_thread(
+            self.outbox.add, business_id, platforms, post, idempotency_key, retry_interrupted
+        )
+        for platform in platforms:
+            if platform in self._wake:
+                self._wake[platform].set()
+        return deliveries[0]["publish_id"], deliveries
+
+    def _backoff(self, attempt: int, error: PublishError) -> float:
+        """Get the delay before a retry.
+
+        Args:
+            attempt: Number of the failed attempt, starting at 1
+            error: Error of the failed attempt
+
+        Returns:
+            Seconds to wait
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if error.retry_after is not None:
+            return max(delay, min(error.retry_after, self.max_delay))
+        return delay
+
+    async def _claim_loop(self, platform: str) -> None:
+        """Claim and start due deliveries of a platform while it has free capacity."""
+        wake = self._wake[platform]
+        running: Set[asyncio.Task] = set()
+
+        def on_delivery_done(task: asyncio.Task) -> None:
+            running.discard(task)
+            self._delivery_tasks.discard(task)
+            wake.set()
+
+        while True:
+            wake.clear()
+            free = self.concurrency - len(running)
+            if free > 0:
+                try:
+                    deliveries = await asyncio.to_thread(
+                        self.outbox.claim,
+                        platform,
+                        free,
+                        self.lease_seconds,
+                        self.publishers[platform].idempotent,
+                    )
+                except Exception as error:  # pylint: disable=broad-except
+                    log.exception(f"Claiming {platform} deliveries failed: {error}")
+                    deliveries = []
+                for delivery in deliveries:
+                    task = asyncio.create_task(self._deliver(delivery))
+                    running.add(task)
+                    self._delivery_tasks.add(task)
+                    task.add_done_callback(on_delivery_done)
+                if len(deliveries) == free:
+                    continue  # More may be due
+
+            timeout = self.poll_interval
+            if len(running) < self.concurrency:
+                next_attempt_at = await asyncio.to_thread(self.outbox.next_attempt_at, platform)
+                if next_attempt_at is not None:
+                    timeout = min(timeout, max(0.0, next_attempt_at - time.time()))
+            try:
+                await asyncio.wait_for(wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _deliver(self, delivery: dict) -> None:
+        """Run one attempt of a delivery and store its outcome."""
+        platform, key = delivery["platform"], delivery["idempotency_key"]
+        publisher = self.publishers[platform]
+        start_time = time.perf_counter()
+        try:
+            platform_post_id = await publisher.publish(delivery["post"], key)
+        except asyncio.CancelledError:
+            if publisher.idempotent:
+                await asyncio.shield(asyncio.to_thread(self.outbox.release, key))
+            else:
+                log.error(
+                    f"Publish {delivery['publish_id']} to {platform} interrupted, "
+                    "it may have been posted"
+                )
+                await asyncio.shield(asyncio.to_thread(self.outbox.fail, key, INTERRUPTED_ERROR))
+            raise
+        except PublishError as error:
+            if error.retryable and delivery["attempts"] < self.max_attempts:
+                delay = self._backoff(delivery["attempts"], error)
+                log.warning(
+                    f"Publish {delivery['publish_id']} to {platform} failed, "
+                    f"retrying in {delay:.1f} seconds: {error}"
+                )
+                await asyncio.to_thread(self.outbox.retry, key, delay, str(error))
+                outcome = "retried"
+            else:
+                log.error(f"Publish {delivery['publish_id']} to {platform} failed: {error}")
+                await asyncio.to_thread(self.outbox.fail, key, str(error))
+                outcome = "failed"
+        except Exception as error:  # pylint: disable=broad-except
+            log.exception(f"Publish {delivery['publish_id']} to {platform} failed: {error}")
+            await asyncio.to_thread(self.outbox.fail, key, str(error))
+            outcome = "failed"
+        else:
+            log.info(f"Published {delivery['publish_id']} to {platform}: {platform_post_id}")
+            await asyncio.to_thread(self.outbox.complete, key, platform_post_id)
+            outcome = "done"
+        PUBLISH_ATTEMPT_SECONDS.observe(time.perf_counter() - start_time, platform=platform)
+        PUBLISH_ATTEMPTS.inc(platform=platform, outcome=outcome)
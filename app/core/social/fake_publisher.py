@@ -0,0 +1,52 @@
+"""Offline social media publisher for tests and load tests."""
+
+import asyncio
+import hashlib
+import random
+from typing import Dict, Optional
+
+from app.core.social.base_publisher import BasePublisher, PublishError
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+
+class FakePublisher(BasePublisher):
+    """Offline social media publisher for tests and load tests.
+
+    NOTE:
+        Posts are kept in memory by idempotency key. Publishing a key again
+        returns the ID of the first post instead of posting twice, like
+        platforms honoring idempotency keys do. Failures are retryable, so
+        they exercise the retries of the dispatcher.
+    """
+
+    name = "fake"
+    idempotent = True
+
+    def __init__(
+        self, latency_ms: float = 200.0, error_rate: float = 0.0, seed: Optional[int] = None
+    ) -> None:
+        """Run Constructor.
+
+        Args:
+            latency_ms: Latency of each post in milliseconds
+            error_rate: Fraction of posts failing with a retryable error
+            seed: Seed of the failures, None for a random one
+        """
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        # Idempotency key to post ID of every published post
+        self.posts: Dict[str, str] = {}
+
+    async def publish(self, post: dict, idempotency_key: str) -> str:
+        """Publish a fake post."""
+        await asyncio.sleep(self.latency_ms / 1000)
+        if self.random.random() < self.error_rate:
+            raise PublishError("Fake publisher failure", retryable=True)
+        if idempotency_key not in self.posts:
+            digest = hashlib.sha256(idempotency_key.encode("utf-8")).hexdigest()[:16]
+            self.posts[idempotency_key] = f"fake-{digest}"
+            log.info(f"Fake publisher posted: {post['caption_text'][:40]}")
+        return self.posts[idempotency_key]
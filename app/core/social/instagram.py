@@ -0,0 +1,101 @@
+"""Class handling instagram stuff."""
+
+import asyncio
+
+import httpx
+
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+
+class Instagram:
+    """Post to an Instagram professional account through the Graph API.
+
+    NOTE:
+        Publishing takes two calls: a media container is created from a
+        public image URL, then published once Instagram has processed it.
+    """
+
+    GRAPH_URL = "https://graph.facebook.com"
+
+    def __init__(
+        self,
+        user_id: str,
+        access_token: str,
+        client: httpx.AsyncClient,
+        api_version: str = "v19.0",
+        ready_checks: int = 10,
+        ready_check_interval: float = 1.0,
+    ) -> None:
+        """Run Constructor.
+
+        Args:
+            user_id: Instagram user ID of the account
+            access_token: Graph API access token of the account
+            client: Shared HTTP client
+            api_version: Graph API version
+            ready_checks: Number of times to check if the container was processed
+            ready_check_interval: Seconds between container checks
+        """
+        self.user_id = user_id
+        self.access_token = access_token
+        self.client = client
+        self.base_url = f"{self.GRAPH_URL}/{api_version}"
+        self.ready_checks = ready_checks
+        self.ready_check_interval = ready_check_interval
+
+    async def _call(self, method: str, path: str, **params: str) -> dict:
+        """Call the Graph API and return the JSON response."""
+        response = await self.client.request(
+            method, f"{self.base_url}/{path}", params={**params, "access_token": self.access_token}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def create_container(self, content: str, image_url: str) -> str:
+        """Create the media container of a post.
+
+        Returns:
+            Container ID
+        """
+        result = await self._call(
+            "POST", f"{self.user_id}/media", image_url=image_url, caption=content
+        )
+        return result["id"]
+
+    async def wait_until_ready(self, container_id: str) -> None:
+        """Wait until a media container was processed."""
+        for _ in range(self.ready_checks):
+            result = await self._call("GET", container_id, fields="status_code")
+            status = result.get("status_code")
+            if status == "FINISHED":
+                return
+            if status in ("ERROR", "EXPIRED"):
+                raise RuntimeError(f"Instagram media container {container_id}: {status}")
+            await asyncio.sleep(self.ready_check_interval)
+        raise TimeoutError(f"Instagram media container {container_id} not ready")
+
+    async def publish_container(self, container_id: str) -> str:
+        """Publish a processed media container.
+
+        Returns:
+            Media ID of the post
+        """
+        result = await self._call("POST", f"{self.user_id}/media_publish", creation_id=container_id)
+        return result["id"]
+
+    async def post(self, content: str, image_url: str) -> str:
+        """Post an image with a caption.
+
+        Args:
+            content: Caption
+            image_url: Public URL of the image
+
+        Returns:
+            Media ID of the post
+        """
+        log.info("Posting Instagram post ...")
+        container_id = await self.create_container(content, image_url)
+        await self.wait_until_ready(container_id)
+        return await self.publish_container(container_id)
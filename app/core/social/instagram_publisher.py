@@ -0,0 +1,99 @@
+"""Publisher posting to Instagram."""
+
+from typing import Optional
+
+import httpx
+
+from app.core.social.base_publisher import BasePublisher, PublishError
+from app.core.social.instagram import Instagram
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+
+class InstagramPublisher(BasePublisher):
+    """Publisher posting to Instagram.
+
+    NOTE:
+        Instagram fetches the image itself, so images stored locally are
+        only publishable with a public base URL of this app. Failures while
+        creating the media container are retryable, nothing was posted yet.
+        Publishing the container is only retried on rate limits and failed
+        connections, where the post was certainly not created.
+    """
+
+    name = "instagram"
+
+    def __init__(
+        self,
+        user_id: Optional[str],
+        access_token: Optional[str],
+        public_base_url: Optional[str] = None,
+        api_version: str = "v19.0",
+        timeout: float = 60.0,
+    ) -> None:
+        """Run Constructor.
+
+        Args:
+            user_id: Instagram user ID of the account
+            access_token: Graph API access token of the account
+            public_base_url: Public URL of this app, e.g. "https://api.example.com"
+            api_version: Graph API version
+            timeout: Seconds to wait for the Graph API
+        """
+        self.user_id = user_id
+        self.access_token = access_token
+        self.public_base_url = public_base_url.rstrip("/") if public_base_url else None
+        self.api_version = api_version
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def open(self) -> None:
+        """Create the shared HTTP client."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout)
+
+    async def close(self) -> None:
+        """Close the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def get_image_url(self, picture_url: str) -> str:
+        """Get the public URL of a post image."""
+        if picture_url.startswith(("http://", "https://")):
+            return picture_url
+        if self.public_base_url is None:
+            raise PublishError("Set PUBLIC_BASE_URL to publish locally stored images")
+        return self.public_base_url + picture_url
+
+    async def publish(self, post: dict, idempotency_key: str) -> str:
+        """Post the caption and image of a post."""
+        if not self.user_id or not self.access_token:
+            raise PublishError("Instagram credentials are not configured")
+        await self.open()
+        instagram = Instagram(
+            self.user_id, self.access_token, self._client, api_version=self.api_version
+        )
+        image_url = self.get_image_url(post["picture_url"])
+
+        try:
+            container_id = await instagram.create_container(post["caption_text"], image_url)
+            await instagram.wait_until_ready(container_id)
+        except httpx.HTTPStatusError as error:
+            status_code = error.response.status_code
+            retryable = status_code == 429 or status_code >= 500
+            raise PublishError(str(error), retryable=retryable) from error
+        except (httpx.TransportError, TimeoutError) as error:
+            raise PublishError(str(error), retryable=True) from error
+        except RuntimeError as error:
+            raise PublishError(str(error)) from error
+
+        try:
+            return await instagram.publish_container(container_id)
+        except httpx.HTTPStatusError as error:
+            raise PublishError(str(error), retryable=error.response.status_code == 429) from error
+        except httpx.ConnectError as error:
+            raise PublishError(str(error), retryable=True) from error
+        except httpx.HTTPError as error:
+            raise PublishError(str(error)) from error
@@ -0,0 +1,267 @@
+"""Persistent outbox of social media posts."""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    idempotency_key TEXT PRIMARY KEY,
+    publish_id TEXT NOT NULL,
+    business_id TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    post TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    lease_until REAL,
+    platform_post_id TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_deliveries_publish_id ON deliveries (publish_id);
+CREATE INDEX IF NOT EXISTS idx_deliveries_due ON deliveries (platform, status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS idx_deliveries_business
+    ON deliveries (business_id, platform, created_at);
+"""
+
+# Error of deliveries interrupted mid-attempt on a platform without idempotency keys
+INTERRUPTED_ERROR = "Interrupted, check the platform before retrying"
+
+COLUMNS = (
+    "idempotency_key",
+    "publish_id",
+    "business_id",
+    "platform",
+    "post",
+    "status",
+    "attempts",
+    "next_attempt_at",
+    "lease_until",
+    "platform_post_id",
+    "error",
+    "created_at",
+    "updated_at",
+)
+
+
+def make_key(*parts: str) -> str:
+    """Hash key parts into a fixed length key."""
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class Outbox:
+    """Persistent outbox of social media posts.
+
+    NOTE:
+        Every post is stored as one delivery per platform before anything is
+        sent, in an SQLite file shared by all workers. A delivery moves from
+        "pending" to "running" when a worker claims it, then to "done" or
+        "failed", or back to "pending" with a later attempt time to retry.
+        Claims hold a lease, so deliveries of a crashed worker are claimed
+        again once their lease expired, but only on idempotent platforms.
+        Elsewhere the crashed attempt may have posted, so an expired claim
+        fails with `INTERRUPTED_ERROR` for manual review. The same holds for
+        deliveries interrupted by shutdown, see the dispatcher.
+
+        Deliveries are keyed by the idempotency key of the post and the
+        platform, so submitting a post again never posts it twice. Only
+        failed deliveries are queued again, interrupted ones only when asked
+        to explicitly, after checking the platform.
+
+        SQLite calls block, run them on a thread, never on the event loop.
+    """
+
+    def __init__(self, filepath: str) -> None:
+        """Open outbox file and create schema if needed.
+
+        Args:
+            filepath: Path to the SQLite outbox file
+        """
+        self.filepath = filepath
+        self._local = threading.local()
+
+        log.info(f"Opening publish outbox: {self.filepath}")
+        os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection of the current thread, opening one if needed."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.filepath, timeout=30.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    @staticmethod
+    def _to_dict(row: tuple) -> dict:
+        """Convert a delivery row to a dict."""
+        delivery = dict(zip(COLUMNS, row))
+        delivery["post"] = json.loads(delivery["post"])
+        return delivery
+
+    def _select(self, where: str, params: tuple) -> List[dict]:
+        """Get the deliveries matching a condition."""
+        rows = self._connection().execute(
+            f"SELECT {', '.join(COLUMNS)} FROM deliveries WHERE {where}", params
+        )
+        return [self._to_dict(row) for row in rows]
+
+    def add(
+        self,
+        business_id: str,
+        platforms: List[str],
+        post: dict,
+        idempotency_key: str,
+        retry_interrupted: bool = False,
+    ) -> List[dict]:
+        """Store the deliveries of a post, unless they were stored before.
+
+        Args:
+            business_id: ID of the business posting
+            platforms: Platforms to post to
+            post: Post with "caption_text" and "picture_url"
+            idempotency_key: Key of the post, the same key never posts twice
+            retry_interrupted: Set True to also queue deliveries failed with `INTERRUPTED_ERROR`
+
+        Returns:
+            Delivery of each platform
+        """
+        now = time.time()
+        publish_id = make_key(idempotency_key)[:32]
+        keys = [make_key(idempotency_key, platform) for platform in platforms]
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for key, platform in zip(keys, platforms):
+                connection.execute(
+                    "INSERT OR IGNORE INTO deliveries VALUES "
+                    "(?, ?, ?, ?, ?, 'pending', 0, ?, NULL, NULL, NULL, ?, ?)",
+                    (key, publish_id, business_id, platform, json.dumps(post), now, now, now),
+                )
+                connection.execute(
+                    "UPDATE deliveries SET status = 'pending', attempts = 0, "
+                    "next_attempt_at = ?, error = NULL, updated_at = ? "
+                    "WHERE idempotency_key = ? AND status = 'failed' "
+                    "AND (? OR error IS NULL OR error != ?)",
+                    (now, now, key, retry_interrupted, INTERRUPTED_ERROR),
+                )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        placeholders = ", ".join("?" for _ in keys)
+        return self._select(f"idempotency_key IN ({placeholders})", tuple(keys))
+
+    def claim(
+        self, platform: str, limit: int, lease_seconds: float, reclaim_expired: bool = True
+    ) -> List[dict]:
+        """Claim due deliveries of a platform.
+
+        Args:
+            platform: Platform to claim deliveries of
+            limit: Maximum number of deliveries to claim
+            lease_seconds: Seconds after which an unfinished claim expires
+            reclaim_expired: Set True to claim expired claims again, False to fail them
+
+        Returns:
+            Claimed deliveries, their attempt counted
+        """
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if not reclaim_expired:
+                connection.execute(
+                    "UPDATE deliveries SET status = 'failed', error = ?, lease_until = NULL, "
+                    "updated_at = ? WHERE platform = ? AND status = 'running' AND lease_until < ?",
+                    (INTERRUPTED_ERROR, now, platform, now),
+                )
+            keys = [
+                row[0]
+                for row in connection.execute(
+                    "SELECT idempotency_key FROM deliveries WHERE platform = ? AND ("
+                    "(status = 'pending' AND next_attempt_at <= ?) "
+                    "OR (status = 'running' AND lease_until < ?)"
+                    ") ORDER BY next_attempt_at LIMIT ?",
+                    (platform, now, now, limit),
+                )
+            ]
+            connection.executemany(
+                "UPDATE deliveries SET status = 'running', attempts = attempts + 1, "
+                "lease_until = ?, updated_at = ? WHERE idempotency_key = ?",
+                [(now + lease_seconds, now, key) for key in keys],
+            )
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        if not keys:
+            return []
+        placeholders = ", ".join("?" for _ in keys)
+        return self._select(f"idempotency_key IN ({placeholders})", tuple(keys))
+
+    def _update(self, key: str, assignments: str, params: tuple) -> None:
+        """Update a running delivery."""
+        self._connection().execute(
+            f"UPDATE deliveries SET {assignments}, lease_until = NULL, updated_at = ? "
+            "WHERE idempotency_key = ? AND status = 'running'",
+            (*params, time.time(), key),
+        )
+
+    def complete(self, key: str, platform_post_id: str) -> None:
+        """Mark a delivery as posted."""
+        self._update(
+            key, "status = 'done', platform_post_id = ?, error = NULL", (platform_post_id,)
+        )
+
+    def retry(self, key: str, delay: float, error: str) -> None:
+        """Queue a delivery again after a delay."""
+        self._update(
+            key, "status = 'pending', next_attempt_at = ?, error = ?", (time.time() + delay, error)
+        )
+
+    def fail(self, key: str, error: str) -> None:
+        """Mark a delivery as finally failed."""
+        self._update(key, "status = 'failed', error = ?", (error,))
+
+    def release(self, key: str) -> None:
+        """Return an interrupted delivery to the queue, without counting its attempt."""
+        self._update(key, "status = 'pending', attempts = attempts - 1", ())
+
+    def next_attempt_at(self, platform: str) -> Optional[float]:
+        """Get the time the next delivery of a platform is due, None if there is none."""
+        row = (
+            self._connection()
+            .execute(
+                "SELECT MIN(CASE status WHEN 'pending' THEN next_attempt_at ELSE lease_until END) "
+                "FROM deliveries WHERE platform = ? AND status IN ('pending', 'running')",
+                (platform,),
+            )
+            .fetchone()
+        )
+        return row[0]
+
+    def get_publish(self, publish_id: str) -> List[dict]:
+        """Get the deliveries of a post by publish ID."""
+        return self._select("publish_id = ? ORDER BY platform", (publish_id,))
+
+    def get_latest(self, business_id: str, platform: str) -> Optional[dict]:
+        """Get the latest delivery of a business to a platform."""
+        deliveries = self._select(
+            "business_id = ? AND platform = ? ORDER BY created_at DESC LIMIT 1",
+            (business_id, platform),
+        )
+        return deliveries[0] if deliveries else None
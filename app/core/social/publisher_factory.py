@@ -0,0 +1,62 @@
+"""Create the configured social media publishers."""
+
+import os
+from typing import Callable, Dict, Optional
+
+from app.core.fastapi_config import Settings
+from app.core.social.base_publisher import BasePublisher
+from app.core.social.fake_publisher import FakePublisher
+from app.core.social.instagram_publisher import InstagramPublisher
+from app.core.social.twitter import TwitterClientRegistry
+from app.core.social.twitter_publisher import TwitterPublisher
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+
+def create_publishers(
+    settings: Settings, resolve_image: Callable[[str], Optional[str]]
+) -> Dict[str, BasePublisher]:
+    """Create the publishers of the platforms enabled in settings.
+
+    Args:
+        settings: Application settings
+        resolve_image: Called with the picture URL of a post, returns the
+            local image file or None if the image is not stored locally
+
+    Returns:
+        Publisher by platform name
+    """
+    publishers: Dict[str, BasePublisher] = {}
+    for platform in (platform.lower() for platform in settings.PUBLISH_PLATFORMS):
+        if platform == "twitter":
+            publishers[platform] = TwitterPublisher(
+                os.getenv("TWITTER_API_KEY"),
+                os.getenv("TWITTER_API_KEY_SECRET"),
+                os.getenv("TWITTER_ACCESS_TOKEN"),
+                os.getenv("TWITTER_ACCESS_TOKEN_SECRET"),
+                clients=TwitterClientRegistry(
+                    max_entries=settings.TWITTER_CLIENT_CACHE_SIZE,
+                    pool_maxsize=settings.PUBLISH_CONCURRENCY,
+                    timeout=settings.TWITTER_TIMEOUT,
+                ),
+                resolve_image=resolve_image,
+                max_workers=settings.PUBLISH_CONCURRENCY,
+            )
+        elif platform == "instagram":
+            publishers[platform] = InstagramPublisher(
+                os.getenv("INSTAGRAM_USER_ID"),
+                os.getenv("INSTAGRAM_ACCESS_TOKEN"),
+                public_base_url=settings.PUBLIC_BASE_URL,
+                api_version=settings.INSTAGRAM_API_VERSION,
+                timeout=settings.INSTAGRAM_TIMEOUT,
+            )
+        elif platform == "fake":
+            publishers[platform] = FakePublisher(
+                latency_ms=settings.FAKE_PUBLISHER_LATENCY_MS,
+                error_rate=settings.FAKE_PUBLISHER_ERROR_RATE,
+            )
+        else:
+            raise ValueError(f"Unknown publish platform: {platform}")
+    log.info(f"Publishing to: {', '.join(publishers) or 'no platforms'}")
+    return publishers
@@ -1,13 +1,121 @@
 """Class handling twitter stuff."""
 
-import urllib
+import os
+import tempfile
+import threading
+import urllib.parse
+from collections import OrderedDict
+from typing import BinaryIO, Optional, Tuple
 
+import requests
 import tweepy
+from requests.adapters import HTTPAdapter
 
 from app.core.utility.logger_setup import get_logger
 
 log = get_logger()
 
+# Images up to this size may use the simple upload endpoint
+SIMPLE_UPLOAD_MAX_BYTES = 5 * 1024 * 1024
+# Downloaded media is kept in memory up to this size, then spooled to disk
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+DOWNLOAD_TIMEOUT = 60.0
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """Connection pool adapter applying a default timeout to every request."""
+
+    def __init__(self, timeout: float, **kwargs: object) -> None:
+        """Run Constructor.
+
+        Args:
+            timeout: Seconds to wait for a connection and for each read
+            kwargs: Pool arguments of `HTTPAdapter`
+        """
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        """Send a request, with the default timeout unless one was given."""
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class TwitterClientRegistry:
+    """Twitter clients cached per credential set.
+
+    NOTE:
+        Both clients of a credential set share one pooled HTTP session, so
+        connections and TLS sessions are reused across posts. The least
+        recently used credential sets are dropped beyond `max_entries`. Every
+        request times out, so a slow Twitter API cannot hold a thread forever.
+    """
+
+    def __init__(self, max_entries: int = 32, pool_maxsize: int = 10, timeout: float = 60.0):
+        """Run Constructor.
+
+        Args:
+            max_entries: Number of credential sets to keep clients for
+            pool_maxsize: Connections kept open per credential set
+            timeout: Seconds to wait for a connection and for each read
+        """
+        self.max_entries = max_entries
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self._clients: "OrderedDict[Tuple[str, ...], Tuple[tweepy.API, tweepy.Client]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def _create_clients(
+        self, api_key: str, api_secret: str, access_token: str, access_token_secret: str
+    ) -> Tuple[tweepy.API, tweepy.Client]:
+        """Create the v1.1 and v2 clients of a credential set on a shared session."""
+        auth = tweepy.OAuth1UserHandler(api_key, api_secret, access_token, access_token_secret)
+        client_v1 = tweepy.API(auth, timeout=self.timeout)
+        client_v2 = tweepy.Client(
+            consumer_key=api_key,
+            consumer_secret=api_secret,
+            access_token=access_token,
+            access_token_secret=access_token_secret,
+        )
+        adapter = TimeoutHTTPAdapter(
+            self.timeout, pool_connections=2, pool_maxsize=self.pool_maxsize
+        )
+        client_v1.session.mount("https://", adapter)
+        client_v2.session = client_v1.session
+        return client_v1, client_v2
+
+    def get_clients(
+        self, api_key: str, api_secret: str, access_token: str, access_token_secret: str
+    ) -> Tuple[tweepy.API, tweepy.Client]:
+        """Get the cached clients of a credential set, creating them if needed.
+
+        Returns:
+            Twitter API v1.1 client (media upload) and v2 client (tweets)
+        """
+        key = (api_key, api_secret, access_token, access_token_secret)
+        with self._lock:
+            clients = self._clients.get(key)
+            if clients is None:
+                log.info("Creating Twitter clients ...")
+                clients = self._create_clients(*key)
+                self._clients[key] = clients
+            self._clients.move_to_end(key)
+            while len(self._clients) > self.max_entries:
+                _, (client_v1, _) = self._clients.popitem(last=False)
+                client_v1.session.close()
+        return clients
+
+    def close(self) -> None:
+        """Close the sessions of all cached clients."""
+        with self._lock:
+            for client_v1, _ in self._clients.values():
+                client_v1.session.close()
+            self._clients.clear()
+
 
 class Twitter:
     """Class handling twitter stuff."""
@@ -18,30 +126,103 @@ class Twitter:
     access_token_secret = None
 
     def __init__(
-        self, api_key: str, api_secret: str, access_token: str, access_token_secret: str
+        self,
+        api_key: str,
+        api_secret: str,
+        access_token: str,
+        access_token_secret: str,
+        clients: Optional[TwitterClientRegistry] = None,
     ) -> None:
-        """Run Constructor."""
+        """Run Constructor.
+
+        Args:
+            api_key: Twitter API key
+            api_secret: Twitter API key secret
+            access_token: Twitter access token
+            access_token_secret: Twitter access token secret
+            clients: Shared client cache, new clients are created per post if not given
+        """
         self.api_key = api_key
         self.api_secret = api_secret
         self.access_token = access_token
         self.access_token_secret = access_token_secret
+        self.clients = clients
         return
 
-    def post(self, content: str, image_url: str) -> None:
+    def post(self, content: str, image_url: str, image_filepath: Optional[str] = None) -> str:
+        """Post a tweet with an image.
+
+        Args:
+            content: Tweet text
+            image_url: URL of the image, downloaded if no local file is given
+            image_filepath: Local image file, e.g. from the image store
+
+        Returns:
+            ID of the tweet
+        """
         log.info("Posting Twitter post ...")
-        client_v1 = self.get_twitter_conn_v1(
-            self.api_key, self.api_secret, self.access_token, self.access_token_secret
-        )
-        client_v2 = self.get_twitter_conn_v2(
-            self.api_key, self.api_secret, self.access_token, self.access_token_secret
-        )
+        credentials = (self.api_key, self.api_secret, self.access_token, self.access_token_secret)
+        if self.clients is not None:
+            client_v1, client_v2 = self.clients.get_clients(*credentials)
+        else:
+            client_v1 = self.get_twitter_conn_v1(*credentials)
+            client_v2 = self.get_twitter_conn_v2(*credentials)
+
+        if image_filepath is not None:
+            with open(image_filepath, "rb") as file:
+                media_id = self.upload_media(client_v1, os.path.basename(image_filepath), file)
+        else:
+            # Unique per post and removed on close, so parallel posts never share a file
+            with self.download_media(image_url) as file:
+                filename = os.path.basename(urllib.parse.urlparse(image_url).path) or "image.png"
+                media_id = self.upload_media(client_v1, filename, file)
+
+        response = client_v2.create_tweet(text=content, media_ids=[media_id])
+        return str(response.data["id"])
+
+    def download_media(self, url: str) -> tempfile.SpooledTemporaryFile:
+        """Stream media from a URL into a spooled temporary file.
+
+        Media up to `SPOOL_MAX_BYTES` stays in memory, larger media rolls
+        over to an anonymous temporary file. Close the file to release it.
+
+        Args:
+            url: Media URL
+
+        Returns:
+            Spooled file positioned at the start of the media
+        """
+        timeout = self.clients.timeout if self.clients is not None else DOWNLOAD_TIMEOUT
+        file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        try:
+            with requests.get(url, stream=True, timeout=timeout) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                    file.write(chunk)
+        except BaseException:
+            file.close()
+            raise
+        file.seek(0)
+        return file
 
-        urllib.request.urlretrieve(image_url, "tempImage.png")
+    @staticmethod
+    def upload_media(client_v1: tweepy.API, filename: str, file: BinaryIO) -> int:
+        """Upload media from an open file, chunked above the simple upload limit.
 
-        media = client_v1.media_upload(filename="tempImage.png")
-        media_id = media.media_id
+        Args:
+            client_v1: Twitter API v1.1 client
+            filename: Media file name, used to detect the media type
+            file: Open media file, positioned at the start
 
-        client_v2.create_tweet(text=content, media_ids=[media_id])
+        Returns:
+            Media ID
+        """
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        file.seek(0)
+        chunked = size > SIMPLE_UPLOAD_MAX_BYTES
+        log.debug(f"Uploading media {filename} ({size} bytes, chunked: {chunked}) ...")
+        return client_v1.media_upload(filename=filename, file=file, chunked=chunked).media_id
 
     def get_twitter_conn_v1(
         self, api_key: str, api_secret: str, access_token: str, access_token_secret: str
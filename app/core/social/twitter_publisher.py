@@ -0,0 +1,96 @@
+"""Publisher posting to Twitter/x."""
+
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import requests
+import tweepy
+
+from app.core.social.base_publisher import BasePublisher, PublishError
+from app.core.social.twitter import Twitter, TwitterClientRegistry
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+
+class TwitterPublisher(BasePublisher):
+    """Publisher posting to Twitter/x.
+
+    NOTE:
+        tweepy blocks, so posts run on a thread pool of this publisher only.
+        Twitter has no idempotency keys, so only errors where the tweet was
+        certainly not created are retryable: rate limits, 503 and failed
+        connections. A read timeout may hide a created tweet and is final.
+    """
+
+    name = "twitter"
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        api_secret: Optional[str],
+        access_token: Optional[str],
+        access_token_secret: Optional[str],
+        clients: TwitterClientRegistry,
+        resolve_image: Callable[[str], Optional[str]],
+        max_workers: int = 4,
+    ) -> None:
+        """Run Constructor.
+
+        Args:
+            api_key: Twitter API key
+            api_secret: Twitter API key secret
+            access_token: Twitter access token
+            access_token_secret: Twitter access token secret
+            clients: Shared client cache
+            resolve_image: Called with the picture URL of a post, returns the
+                local image file or None to download the URL
+            max_workers: Number of posts run concurrently
+        """
+        self.twitter = Twitter(
+            api_key, api_secret, access_token, access_token_secret, clients=clients
+        )
+        self.resolve_image = resolve_image
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def open(self) -> None:
+        """Start the thread pool."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="twitter"
+            )
+
+    async def close(self) -> None:
+        """Wait for running posts, stop the thread pool and close the cached clients."""
+        if self._executor is not None:
+            # A running tweepy call cannot be stopped, let it end before its clients close
+            await asyncio.to_thread(self._executor.shutdown, wait=True, cancel_futures=True)
+            self._executor = None
+        self.twitter.clients.close()
+
+    async def publish(self, post: dict, idempotency_key: str) -> str:
+        """Post a tweet with the caption and image of a post."""
+        await self.open()
+        post_tweet = functools.partial(
+            self.twitter.post,
+            content=post["caption_text"],
+            image_url=post["picture_url"],
+            image_filepath=self.resolve_image(post["picture_url"]),
+        )
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, post_tweet)
+        except tweepy.TooManyRequests as error:
+            reset = error.response.headers.get("x-rate-limit-reset")
+            retry_after = max(0.0, float(reset) - time.time()) if reset else None
+            raise PublishError(str(error), retryable=True, retry_after=retry_after) from error
+        except tweepy.HTTPException as error:
+            retryable = error.response.status_code == 503
+            raise PublishError(str(error), retryable=retryable) from error
+        except requests.ConnectionError as error:
+            raise PublishError(str(error), retryable=True) from error
+        except (tweepy.TweepyException, requests.RequestException) as error:
+            raise PublishError(str(error)) from error
@@ -0,0 +1,46 @@
+"""Striped inter-process file locks."""
+
+import fcntl
+import os
+import zlib
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class StripedFileLock:
+    """Striped inter-process file locks.
+
+    NOTE:
+        Keys are spread over a fixed number of lock files, so any number of
+        keys needs a bounded number of files. Each acquisition opens its own
+        file descriptor, so the lock excludes other threads of this process
+        as well as other processes. Never nest two acquisitions, the keys may
+        map to the same stripe.
+    """
+
+    def __init__(self, dirpath: str, stripes: int = 64) -> None:
+        """Create lock directory if needed.
+
+        Args:
+            dirpath: Directory of the lock files
+            stripes: Number of lock files
+        """
+        self.dirpath = dirpath
+        self.stripes = stripes
+        os.makedirs(dirpath, exist_ok=True)
+
+    @contextmanager
+    def locked(self, key: str) -> Iterator[None]:
+        """Hold the lock of a key, blocking until it is free.
+
+        Args:
+            key: Key to lock
+        """
+        stripe = zlib.crc32(key.encode("utf-8")) % self.stripes
+        lock_filepath = os.path.join(self.dirpath, f"{stripe}.lock")
+        lock_fd = os.open(lock_filepath, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(lock_fd)
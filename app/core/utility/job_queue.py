@@ -0,0 +1,99 @@
+"""Bounded background job queue."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, List
+
+from app.core.utility.logger_setup import get_logger
+
+log = get_logger()
+
+
+class JobQueue:
+    """Bounded background job queue.
+
+    NOTE:
+        Jobs are run by a fixed number of worker tasks on the event loop of
+        the worker process. The queue itself lives in memory, any state that
+        must survive or be visible to other workers is persisted by the job.
+    """
+
+    def __init__(
+        self, run_job: Callable[[Any], Awaitable[None]], workers: int = 4, max_queued: int = 100
+    ) -> None:
+        """Run Constructor.
+
+        Args:
+            run_job: Coroutine function running a single job
+            workers: Number of jobs run concurrently
+            max_queued: Maximum number of jobs waiting to run
+        """
+        self.run_job = run_job
+        self.workers = workers
+        self.max_queued = max_queued
+        self._queue: asyncio.Queue = None
+        self._worker_tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start worker tasks on the running event loop."""
+        log.info(f"Starting job queue with {self.workers} workers ...")
+        self._queue = asyncio.Queue(maxsize=self.max_queued)
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Cancel worker tasks, dropping queued jobs."""
+        log.info("Stopping job queue ...")
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        while self._queue is not None and not self._queue.empty():
+            _, finished = self._queue.get_nowait()
+            finished.cancel()
+
+    def is_full(self) -> bool:
+        """Check if no more jobs can be queued."""
+        return self._queue is None or self._queue.full()
+
+    def submit(self, job: Any) -> asyncio.Future:
+        """Queue a job without waiting.
+
+        Args:
+            job: Job passed to `run_job`
+
+        Returns:
+            Future resolved with the result of `run_job`, cancelled if the job is dropped
+
+        Raises:
+            asyncio.QueueFull: If the queue is full
+        """
+        if self._queue is None:
+            raise asyncio.QueueFull("Job queue is not running")
+        finished = asyncio.get_running_loop().create_future()
+        # Failures are logged by the worker, callers do not have to await the future
+        finished.add_done_callback(lambda future: future.cancelled() or future.exception())
+        self._queue.put_nowait((job, finished))
+        return finished
+
+    def qsize(self) -> int:
+        """Get number of jobs waiting to run."""
+        return self._queue.qsize() if self._queue else 0
+
+    async def _worker(self) -> None:
+        """Run queued jobs one after another."""
+        while True:
+            job, finished = await self._queue.get()
+            try:
+                result = await self.run_job(job)
+            except asyncio.CancelledError:
+                finished.cancel()
+                raise
+            except Exception as error:  # pylint: disable=broad-except
+                log.exception(f"Job failed: {error}")
+                finished.set_exception(error)
+            else:
+                finished.set_result(result)
+            finally:
+                self._queue.task_done()
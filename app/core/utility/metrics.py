@@ -0,0 +1,149 @@
+"""In-process counters and histograms in Prometheus text format."""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def format_labels(labelnames: Sequence[str], labelvalues: Sequence[str], **extra: str) -> str:
+    """Format a label set, e.g. `{stage="intent"}`."""
+    pairs = list(zip(labelnames, labelvalues)) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()) -> None:
+        """Run Constructor.
+
+        Args:
+            name: Metric name
+            description: Help text
+            labelnames: Label names, values are passed by keyword
+        """
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1.0, **labels: str) -> None:
+        """Increase the counter of a label set."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def render(self) -> List[str]:
+        """Render samples in Prometheus text format."""
+        with self._lock:
+            return [
+                f"{self.name}{format_labels(self.labelnames, key)} {value}"
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Histogram:
+    """Cumulative bucket histogram with labels."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Run Constructor.
+
+        Args:
+            name: Metric name
+            description: Help text
+            labelnames: Label names, values are passed by keyword
+            buckets: Upper bounds of the buckets, ascending
+        """
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # Per label set: count per bucket (last one is +Inf), sum
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record a value for a label set."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        """Render samples in Prometheus text format."""
+        lines = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    upper = "+Inf" if bound == float("inf") else repr(bound)
+                    labels = format_labels(self.labelnames, key, le=upper)
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {total[0]}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """In-process counters and histograms in Prometheus text format.
+
+    NOTE:
+        Metrics live in the memory of one worker process. With several
+        gunicorn workers each scrape sees one worker, so scrape them with a
+        per-instance target or aggregate with `sum()`.
+    """
+
+    def __init__(self) -> None:
+        """Run Constructor."""
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Create and register a counter."""
+        self._metrics[name] = Counter(name, description, labelnames)
+        return self._metrics[name]
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Create and register a histogram."""
+        self._metrics[name] = Histogram(name, description, labelnames, buckets)
+        return self._metrics[name]
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Registry of this worker process, rendered by the /metrics endpoint
+metrics = MetricsRegistry()
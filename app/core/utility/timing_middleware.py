@@ -7,14 +7,22 @@ from typing import Callable
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from app.core.utility.metrics import metrics
+
 log = logging.getLogger("uvicorn")
 
+REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds",
+    "Time to the response start of HTTP requests",
+    ["method", "route", "status"],
+)
+
 
 class TimingMiddleware(BaseHTTPMiddleware):
-    """Middleware to log request time."""
+    """Middleware to log and record request time."""
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Log request time.
+        """Log request time and record it by route template.
 
         Args:
             request: Request object
@@ -30,5 +38,27 @@ class TimingMiddleware(BaseHTTPMiddleware):
         end_time = time.perf_counter()
         time_taken = end_time - start_time
         log.debug(f"{request.method} {request.url.path} took {time_taken:.4f} seconds")
+        REQUEST_DURATION.observe(
+            time_taken,
+            method=request.method,
+            route=self.route_label(request),
+            status=response.status_code,
+        )
 
         return response
+
+    @staticmethod
+    def route_label(request: Request) -> str:
+        """Get a bounded-cardinality label of the route a request matched.
+
+        Args:
+            request: Request object
+
+        Returns:
+            Request path, the route template if it has path parameters
+        """
+        route = request.scope.get("route")
+        if route is None:
+            return "unmatched"
+        # Templates of included routers lack the router prefix, prefer the concrete path
+        return route.path if request.path_params else request.url.path
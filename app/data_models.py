@@ -1,3 +1,40 @@
 """Data Models for FastAPI."""
 
-# Nothing
+from typing import Annotated, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+# Business IDs are handed out by a numeric counter, all database backends order by them
+BUSINESS_ID_PATTERN = r"^[0-9]+$"
+BusinessId = Annotated[str, Field(pattern=BUSINESS_ID_PATTERN)]
+
+
+class BusinessCreate(BaseModel):
+    """Business to create."""
+
+    name: str = Field(min_length=1)
+    description: str
+    specifics: str
+    email: str
+    password: str
+
+
+class BatchPostRequest(BaseModel):
+    """Post request for many businesses."""
+
+    business_ids: List[BusinessId] = Field(min_length=1)
+    mood: str
+    tone: str
+    description: str
+    cache_bypass: Optional[str] = None
+    concurrency: Optional[int] = Field(None, ge=1, le=256)
+    profile: Optional[Literal["full", "fast"]] = None
+
+
+class PublishRequest(BaseModel):
+    """Publish the generated post of a business to social media platforms."""
+
+    business_id: BusinessId
+    platforms: List[str] = Field(min_length=1)
+    idempotency_key: Optional[str] = Field(None, min_length=1, max_length=200)
+    retry_interrupted: bool = False
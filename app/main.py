@@ -1,32 +1,79 @@
 """Server routes definitions."""
 
+import asyncio
+import json
 import os
+import time
+import uuid
+from contextlib import asynccontextmanager
 from pprint import pprint
-from typing import Any, Dict
+from typing import (
+    Annotated,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from dotenv import load_dotenv
-from fastapi import APIRouter, FastAPI, HTTPException, Request
+from fastapi import APIRouter, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import (
+    FileResponse,
+    HTMLResponse,
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from pydantic import ValidationError
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 
 from app.core.ai_bot.ai_bot import AiBot
-from app.core.database.database import Database
+from app.core.ai_bot.batch import BatchRunner
+from app.core.ai_bot.business_context import BusinessContextBuilder
+from app.core.ai_bot.image_store import ImageStore
+from app.core.ai_bot.prompt_registry import PromptRegistry
+from app.core.ai_bot.provider_factory import create_provider
+from app.core.ai_bot.response_cache import ResponseCache
+from app.core.ai_bot.scheduler import RateBudget, RequestScheduler
+from app.core.database.async_database import AsyncDatabase
+from app.core.database.base_database import project_fields
+from app.core.database.cached_database import CachedDatabase
+from app.core.database.database_factory import create_database
 from app.core.fastapi_config import Settings
-from app.core.social.twitter import Twitter
+from app.core.social.base_publisher import PublishError
+from app.core.social.dispatcher import PublishDispatcher
+from app.core.social.outbox import Outbox
+from app.core.social.publisher_factory import create_publishers
+from app.core.utility.file_lock import StripedFileLock
+from app.core.utility.job_queue import JobQueue
 from app.core.utility.logger_setup import get_logger
+from app.core.utility.metrics import metrics
 from app.core.utility.timing_middleware import TimingMiddleware
+from app.data_models import (
+    BUSINESS_ID_PATTERN,
+    BatchPostRequest,
+    BusinessCreate,
+    PublishRequest,
+)
 
 log = get_logger()
 load_dotenv()
 
-# Retrieving API Key
+# Retrieving API Key, not needed when running against the fake AI provider
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
+if not OPENAI_API_KEY and Settings().AI_PROVIDER == "openai":
     ERROR_MESSAGE = "No OpenAI key found;. Make sure your .env file is set up correctly"
     log.fatal(ERROR_MESSAGE)
     raise ValueError(ERROR_MESSAGE)
@@ -35,6 +82,23 @@ if not OPENAI_API_KEY:
 ######################################################################
 #              FastAPI init
 ######################################################################
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Open application scoped resources and close them on shutdown."""
+    await ai_provider.open()
+    await image_store.open()
+    post_jobs.start()
+    await publish_dispatcher.start()
+    yield
+    await post_batches.stop()
+    await post_jobs.stop()
+    await publish_dispatcher.stop()
+    await image_store.close()
+    await ai_provider.close()
+    async_database.close()
+    database.close()
+
+
 def get_app():
     """Get application handle and add any middleware.
 
@@ -48,6 +112,7 @@ def get_app():
         title=settings.PROJECT_NAME,
         description=settings.PROJECT_DESCRIPTION,
         version=settings.PROJECT_VERSION,
+        lifespan=lifespan,
     )
     # Add CORS Middleware
     _app.add_middleware(
@@ -73,7 +138,30 @@ def get_app():
 
 
 app = get_app()
-database = Database("app/core/database/database.json")
+settings = Settings()
+database = create_database(settings)
+async_database = AsyncDatabase(database)
+ai_provider = create_provider(settings, OPENAI_API_KEY)
+prompts = PromptRegistry(settings.PROMPTS_DIRPATH, auto_reload=settings.APP_ENV == "dev")
+image_store = ImageStore(
+    settings.IMAGE_STORE_DIRPATH,
+    max_bytes=settings.IMAGE_STORE_MAX_BYTES,
+    timeout=settings.IMAGE_FETCH_TIMEOUT,
+)
+business_contexts = BusinessContextBuilder(
+    settings.AI_CONTEXT_FIELDS,
+    max_tokens=settings.AI_CONTEXT_MAX_TOKENS,
+    max_entries=settings.AI_CONTEXT_CACHE_SIZE,
+)
+ai_cache = (
+    ResponseCache(
+        settings.AI_CACHE_FILEPATH,
+        max_bytes=settings.AI_CACHE_MAX_BYTES,
+        ttl_seconds=settings.AI_CACHE_TTL_SECONDS,
+    )
+    if settings.AI_CACHE_ENABLED
+    else None
+)
 templates = Jinja2Templates(directory="app/front-end/templates")
 
 
@@ -95,11 +183,20 @@ def app_health_check() -> Dict[str, str]:
     return {"status": "healthy"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics() -> str:
+    """Metrics of this worker in Prometheus text format."""
+    return metrics.render()
+
+
 #################################################################################
 #                                 BUSINESS
 #################################################################################
 business_api_router = APIRouter(tags=["business"])
 
+# Business ID query parameter, rejects IDs no database backend can store with 422
+BusinessId = Annotated[str, Query(pattern=BUSINESS_ID_PATTERN)]
+
 
 @business_api_router.post("/create")
 def create_a_business(
@@ -110,8 +207,69 @@ def create_a_business(
     return {"success": success}
 
 
+async def iter_body_lines(request: Request) -> AsyncIterator[bytes]:
+    """Yield the request body line by line as it is received.
+
+    Args:
+        request: Incoming request
+
+    Yields:
+        Body lines without line endings
+    """
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r")
+    if buffer:
+        yield buffer
+
+
+@business_api_router.post("/create_bulk")
+async def create_businesses(request: Request) -> dict:
+    """Create many businesses at once.
+
+    Body is a JSON array of businesses, or one business per line when sent as
+    `application/x-ndjson`. Lines are parsed as they arrive. Valid businesses
+    are created in a single durable write, rows with invalid JSON or an
+    invalid business are reported per row and skipped.
+    """
+    results: List[dict] = []
+    valid_rows, valid_businesses = [], []
+
+    def add_row(validate: Callable[[Any], BusinessCreate], row: Any) -> None:
+        index = len(results)
+        try:
+            valid_businesses.append(validate(row).model_dump())
+            valid_rows.append(index)
+            results.append({})
+        except ValidationError as error:
+            results.append({"index": index, "success": False, "error": error.errors()})
+
+    if "ndjson" in request.headers.get("content-type", ""):
+        # Malformed lines fail validation as "json_invalid", like any schema error
+        async for line in iter_body_lines(request):
+            if line.strip():
+                add_row(BusinessCreate.model_validate_json, line)
+    else:
+        try:
+            businesses = json.loads(await request.body())
+        except json.JSONDecodeError as error:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {error}") from error
+        if not isinstance(businesses, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array of businesses")
+        for business in businesses:
+            add_row(BusinessCreate.model_validate, business)
+
+    created = await async_database.create_businesses(valid_businesses)
+    for index, (success, _, business_id) in zip(valid_rows, created):
+        results[index] = {"index": index, "success": success, "id": business_id}
+    return {"created": len(created), "failed": len(results) - len(created), "results": results}
+
+
 @business_api_router.get("/get_business_info_with_id")
-def get_business_info_with_id(id: str) -> dict:
+def get_business_info_with_id(id: BusinessId) -> dict:
     """Get business info with id."""
     info = database.get_business_info(int(id))
     return {"info": info}
@@ -124,18 +282,87 @@ def get_business_info_with_name(name: str) -> dict:
     return {"info": info}
 
 
+@business_api_router.get("/get_business_info_with_email")
+def get_business_info_with_email(email: str) -> dict:
+    """Get business info with email."""
+    info = database.get_business_info(email=email)
+    return {"info": info}
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma separated field projection, None to keep all fields."""
+    if fields is None:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
+def stream_businesses(cursor: int, batch_size: int, fields: Optional[List[str]]) -> Iterator[str]:
+    """Yield businesses as NDJSON lines, reading one batch at a time."""
+    while True:
+        page = database.get_business_page(after_id=cursor, limit=batch_size, fields=fields)
+        for business_id, business_info in page:
+            yield json.dumps({"id": business_id, **business_info}) + "\n"
+        if len(page) < batch_size:
+            return
+        cursor = int(page[-1][0])
+
+
 @business_api_router.get("/get_all_Business_info")
-def get_all_business_info() -> dict:
-    """Get all business info."""
-    info = database.get_all_business_info()
-    return {"ids": info}
+def get_all_business_info(
+    cursor: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    fields: Optional[str] = None,
+    stream: bool = False,
+) -> Any:
+    """Get all business info.
+
+    Without `cursor` and `limit` all businesses are returned at once. With
+    either, one page (default 100 businesses) after `cursor` is returned, use
+    `next_cursor` to get the next one. `fields` is a comma separated list of
+    fields to return. With `stream` set, all businesses after `cursor` are
+    streamed as NDJSON.
+    """
+    field_names = parse_fields(fields)
+    if stream:
+        return StreamingResponse(
+            stream_businesses(cursor or 0, limit or 100, field_names),
+            media_type="application/x-ndjson",
+        )
+    if cursor is None and limit is None:
+        info = database.get_all_business_info()
+        if field_names is not None:
+            info = {id: project_fields(record, field_names) for id, record in info.items()}
+        return {"ids": info}
+    limit = limit or 100
+    page = database.get_business_page(after_id=cursor or 0, limit=limit, fields=field_names)
+    next_cursor = int(page[-1][0]) if len(page) == limit else None
+    return {"ids": dict(page), "next_cursor": next_cursor}
 
 
 @business_api_router.get("/get_all_business_ids")
-def get_all_business_ids() -> dict:
-    """Get all business ids."""
-    info = database.get_all_business_ids()
-    return {"ids": info}
+def get_all_business_ids(
+    cursor: int = 0, limit: Optional[int] = Query(None, ge=1, le=100000), stream: bool = False
+) -> Any:
+    """Get all business ids.
+
+    Without `limit` all IDs are returned at once, otherwise one page after `cursor`.
+    """
+    if stream:
+        return StreamingResponse(
+            stream_businesses(cursor, limit or 1000, []), media_type="application/x-ndjson"
+        )
+    if limit is None:
+        return {"ids": database.get_all_business_ids()}
+    page = database.get_business_page(after_id=cursor, limit=limit, fields=[])
+    next_cursor = int(page[-1][0]) if len(page) == limit else None
+    return {"ids": [int(business_id) for business_id, _ in page], "next_cursor": next_cursor}
+
+
+@business_api_router.post("/remove_business")
+def remove_business(id: BusinessId) -> dict:
+    """Remove a business."""
+    success = database.remove_business(id)
+    return {"success": success}
 
 
 @business_api_router.post("/remove_all_businesses")
@@ -145,6 +372,14 @@ def remove_all_businesses() -> dict:
     return {"success": success}
 
 
+@business_api_router.get("/get_cache_stats")
+def get_cache_stats() -> dict:
+    """Get database read cache statistics of this worker."""
+    if not isinstance(database, CachedDatabase):
+        return {"enabled": False}
+    return {"enabled": True, **database.get_cache_stats()}
+
+
 app.include_router(business_api_router, prefix="/business")
 
 
@@ -153,60 +388,569 @@ app.include_router(business_api_router, prefix="/business")
 #################################################################################
 ai_api_router = APIRouter(tags=["ai_api"])
 
+STAGE_WALL_SECONDS = metrics.histogram(
+    "aibot_stage_wall_seconds", "Wall time of AiBot stages", ["stage", "cached"]
+)
+STAGE_QUEUE_SECONDS = metrics.histogram(
+    "aibot_stage_queue_seconds", "Time AiBot stage calls waited for the rate budget", ["stage"]
+)
+STAGE_TOKENS = metrics.counter(
+    "aibot_stage_tokens_total", "Tokens used by AiBot stages", ["stage", "kind"]
+)
+STAGE_RETRIES = metrics.counter("aibot_stage_retries_total", "Retried AiBot stage calls", ["stage"])
+STAGE_CALLS = metrics.counter(
+    "aibot_stage_calls_total", "Finished AiBot stages", ["stage", "cached"]
+)
+POST_JOB_QUEUE_SECONDS = metrics.histogram(
+    "post_job_queue_seconds", "Time post jobs waited before running"
+)
+POST_JOB_SECONDS = metrics.histogram("post_job_seconds", "Run time of post jobs", ["status"])
+
+
+def record_post_metrics(stage_metrics: Dict[str, dict]) -> dict:
+    """Export the stage metrics of a post job and summarize them.
+
+    Args:
+        stage_metrics: Metrics by stage name, see `AiBot.get_stage_metrics`
+
+    Returns:
+        Totals of the post job
+    """
+    for stage, stage_metric in stage_metrics.items():
+        cached = str(stage_metric["cached"]).lower()
+        STAGE_WALL_SECONDS.observe(stage_metric["wall_seconds"], stage=stage, cached=cached)
+        STAGE_QUEUE_SECONDS.observe(stage_metric["queue_seconds"], stage=stage)
+        STAGE_TOKENS.inc(stage_metric["prompt_tokens"], stage=stage, kind="prompt")
+        STAGE_TOKENS.inc(stage_metric["completion_tokens"], stage=stage, kind="completion")
+        STAGE_RETRIES.inc(stage_metric["retries"], stage=stage)
+        STAGE_CALLS.inc(stage=stage, cached=cached)
+    return {
+        key: sum(stage_metric[key] for stage_metric in stage_metrics.values())
+        for key in ("queue_seconds", "prompt_tokens", "completion_tokens", "retries")
+    }
+
+
+def update_business_metrics(business_id: str, job_metrics: dict) -> None:
+    """Add the totals of a finished post job to the metrics summary of a business."""
+    with post_request_locks.locked(business_id):
+        business_info = database.get_business_info(business_id) or {}
+        summary = dict(business_info.get("post_metrics") or {})
+        for key, value in job_metrics.items():
+            summary[key] = summary.get(key, 0) + value
+        database.set_business_info(business_id, "post_metrics", summary)
+
+
+async def run_post_job(
+    job: dict,
+    on_event: Optional[Callable[[str, dict], None]] = None,
+    scheduler: Optional[RequestScheduler] = None,
+) -> bool:
+    """Run the AI pipeline of a queued post request and persist its progress.
+
+    Args:
+        job: Post job, see `claim_post_job`
+        on_event: Called with event name and data for stage boundaries,
+            streamed chat tokens and the final result, defaults to the
+            "on_event" of the job
+        scheduler: Rate budget and retries of the API calls
+
+    Returns:
+        True if the post was generated
+    """
+    business_id = job["business_id"]
+    on_event = on_event or job.get("on_event")
+    stages: Dict[str, str] = {}
+    progress_lock = asyncio.Lock()
+
+    def emit(event: str, data: dict) -> None:
+        if on_event is not None:
+            on_event(event, data)
+
+    async def persist(updates: dict) -> bool:
+        # Never touch a post request that was replaced by a newer job
+        business_info = await async_database.update_post_request_info(
+            business_id, updates, expected_job_id=job["job_id"]
+        )
+        return business_info is not None
+
+    def replaced() -> bool:
+        log.warning(f"Post job {job['job_id']} was replaced by a newer post request")
+        emit(
+            "error", {"job_id": job["job_id"], "error": "Post request was replaced by a newer one"}
+        )
+        return False
+
+    async def on_stage_start(stage: str) -> None:
+        emit("stage", {"stage": stage, "status": "started"})
+
+    async def on_stage_done(stage: str, result: Any) -> None:
+        emit("stage", {"stage": stage, "status": "done", "result": result})
+        # Serialized, so a slower write cannot overwrite a newer stage map
+        async with progress_lock:
+            stages[stage] = "done"
+            await persist({"stages": dict(stages)})
+
+    started_at = time.time()
+    POST_JOB_QUEUE_SECONDS.observe(started_at - job.get("submitted_at", started_at))
+    if not await persist({"status": "running", "started_at": started_at}):
+        return replaced()
+    try:
+        business_info = await async_database.get_business_info(business_id)
+        our_ai_bot = AiBot(
+            api_key=OPENAI_API_KEY,
+            mood=job["mood"],
+            tone=job["tone"],
+            description=job["description"],
+            businessInfo=business_contexts.build(business_info or {}, business_id),
+            provider=ai_provider,
+            cache=ai_cache,
+            cache_bypass=settings.AI_CACHE_BYPASS_STAGES + job.get("cache_bypass", []),
+            prompts=prompts,
+            on_token=(
+                (lambda stage, text: emit("token", {"stage": stage, "text": text}))
+                if on_event is not None
+                else None
+            ),
+            scheduler=scheduler,
+            profile=job.get("profile") or settings.AI_PIPELINE_PROFILE,
+            image_store=image_store,
+        )
+        post = await our_ai_bot.generate_post(
+            on_stage_done=on_stage_done, on_stage_start=on_stage_start
+        )
+        responses = {"caption_text": post["caption"]["caption1"], "picture_url": post["image"]}
+    except Exception as error:  # pylint: disable=broad-except
+        log.exception(f"Post job {job['job_id']} failed: {error}")
+        emit("error", {"job_id": job["job_id"], "error": str(error)})
+        await persist(
+            {
+                "status": "failed",
+                "in_progress": False,
+                "error": str(error),
+                "finished_at": time.time(),
+            }
+        )
+        POST_JOB_SECONDS.observe(time.time() - started_at, status="failed")
+        await asyncio.to_thread(update_business_metrics, business_id, {"jobs": 1, "failed_jobs": 1})
+        return False
+
+    log.info(f"Post generated with the {post['profile']} profile")
+    log.info(f"Intent: {post['intent']}")
+    log.info(f"Prompt to generate Instagram Caption: {post.get('caption_prompt')}")
+    log.info(f"Prompt to generate Image: {post['image_prompt']}")
+
+    done = await persist(
+        {
+            "ai_response": responses,
+            "in_progress": False,
+            "status": "done",
+            "finished_at": time.time(),
+            "metrics": post["metrics"],
+            "pipeline_profile": post["profile"],
+        }
+    )
+    if not done:
+        return replaced()
+    POST_JOB_SECONDS.observe(time.time() - started_at, status="done")
+    job_metrics = record_post_metrics(post["metrics"])
+    job_metrics.update(jobs=1, failed_jobs=0, wall_seconds=post["timings"]["total"]["duration"])
+    await asyncio.to_thread(update_business_metrics, business_id, job_metrics)
+    emit("done", {"job_id": job["job_id"], **responses})
+    return True
+
+
+post_request_locks = StripedFileLock(settings.POST_LOCKS_DIRPATH)
+post_jobs = JobQueue(
+    run_post_job, workers=settings.POST_JOB_WORKERS, max_queued=settings.POST_JOB_QUEUE_SIZE
+)
+
 
 @ai_api_router.post("/send_post_request")
-async def send_post_request(id: str, mood: str, tone: str, description: str) -> bool:
-    """Send a post request to OpenAPI."""
-    info = {
-        "caption_mood": mood,
-        "cpation_tone": tone,
-        "caption_description": description,
-        "picture_prompt": description,
-        "picture_size": "256x256",
-        "in_progress": True,
+async def send_post_request(
+    id: BusinessId,
+    mood: str,
+    tone: str,
+    description: str,
+    cache_bypass: Optional[str] = None,
+    profile: Optional[Literal["full", "fast"]] = None,
+) -> dict:
+    """Queue a post request to OpenAPI.
+
+    Returns immediately, use `check_post_status` to follow progress and
+    `get_post_data` to get the result. `cache_bypass` is a comma separated
+    list of stages to regenerate instead of serving from the response cache,
+    or "all". `profile` selects the pipeline: "full" chains four chat calls,
+    "fast" plans the post in one JSON-mode call and falls back to "full" if
+    the plan does not validate. It defaults to the `AI_PIPELINE_PROFILE`
+    setting. An identical request still in flight is not run again, its job
+    is returned with status "coalesced".
+    """
+    if post_jobs.is_full():
+        raise HTTPException(status_code=503, detail="Too many post requests queued")
+
+    job, created = await asyncio.to_thread(
+        claim_post_job, id, mood, tone, description, cache_bypass, profile
+    )
+    if not created:
+        return {"job_id": job["job_id"], "status": "coalesced"}
+    try:
+        post_jobs.submit(job)
+    except asyncio.QueueFull as error:
+        await async_database.update_post_request_info(
+            id,
+            {"status": "failed", "in_progress": False, "error": "Job queue full"},
+            expected_job_id=job["job_id"],
+        )
+        raise HTTPException(status_code=503, detail="Too many post requests queued") from error
+    return {"job_id": job["job_id"], "status": "queued"}
+
+
+def claim_post_job(
+    business_id: str,
+    mood: str,
+    tone: str,
+    description: str,
+    cache_bypass: Optional[str],
+    profile: Optional[str] = None,
+) -> Tuple[dict, bool]:
+    """Get the in-flight job of an identical post request, or persist a new queued one.
+
+    Check and write run under a per-business file lock, so concurrent
+    duplicates coalesce onto one job across all workers. Requests bypassing
+    the response cache ask for fresh output and always get a new job.
+
+    Returns:
+        Post job and True if it was created, False if an in-flight one was found
+    """
+    with post_request_locks.locked(business_id):
+        business_info = database.get_business_info(business_id) or {}
+        post_request = business_info.get("post_request") or {}
+        if (
+            not cache_bypass
+            and post_request.get("status") in ("queued", "running")
+            and post_request.get("caption_mood") == mood
+            and post_request.get("cpation_tone") == tone
+            and post_request.get("caption_description") == description
+            and post_request.get("profile") == profile
+            and time.time() - post_request.get("submitted_at", 0) < settings.POST_COALESCE_MAX_AGE
+        ):
+            log.info(f"Coalescing post request of business {business_id} onto in-flight job")
+            job_id, created = post_request["job_id"], False
+        else:
+            job_id, created = uuid.uuid4().hex, True
+            info = {
+                "caption_mood": mood,
+                "cpation_tone": tone,
+                "caption_description": description,
+                "profile": profile,
+                "picture_prompt": description,
+                "picture_size": "256x256",
+                "in_progress": True,
+                "job_id": job_id,
+                "status": "queued",
+                "stages": {},
+                "submitted_at": time.time(),
+            }
+            database.set_post_request_info(business_id=business_id, post_request_info=info)
+    job = {
+        "job_id": job_id,
+        "business_id": business_id,
+        "submitted_at": time.time(),
+        "mood": mood,
+        "tone": tone,
+        "description": description,
+        "cache_bypass": parse_fields(cache_bypass) or [],
+        "profile": profile,
     }
-    database.set_post_request_info(business_id=id, post_request_info=info)
-    business_info = database.get_business_info(id)
+    return job, created
+
+
+async def wait_for_post_job(
+    job: dict, on_event: Optional[Callable[[str, dict], None]] = None, poll_interval: float = 0.5
+) -> bool:
+    """Wait for an in-flight post job, possibly of another worker, to finish.
+
+    Args:
+        job: Post job, see `claim_post_job`
+        on_event: Called with the events of `run_post_job`, except tokens
+            and stage starts
+        poll_interval: Seconds between database reads
+
+    Returns:
+        True if the post was generated
+    """
+    stages_seen = set()
+    while True:
+        business_info = await async_database.get_business_info(job["business_id"]) or {}
+        post_request = business_info.get("post_request") or {}
+        if post_request.get("job_id") != job["job_id"]:
+            error = "Post request was replaced by a newer one"
+        elif time.time() - post_request.get("submitted_at", 0) >= settings.POST_COALESCE_MAX_AGE:
+            error = "Timed out waiting for in-flight post request"
+        elif post_request.get("status") == "failed":
+            error = post_request.get("error")
+        else:
+            error = None
+            for stage in post_request.get("stages", {}):
+                if stage not in stages_seen and on_event is not None:
+                    on_event("stage", {"stage": stage, "status": "done"})
+                stages_seen.add(stage)
+            if post_request.get("status") == "done":
+                if on_event is not None:
+                    on_event("done", {"job_id": job["job_id"], **post_request["ai_response"]})
+                return True
+            await asyncio.sleep(poll_interval)
+            continue
+
+        if on_event is not None:
+            on_event("error", {"job_id": job["job_id"], "error": error})
+        return False
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Format a server-sent event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-    our_ai_bot = AiBot(
-        api_key=OPENAI_API_KEY,
-        mood=mood,
-        tone=tone,
-        description=description,
-        businessInfo=business_info
+
+# Followed jobs keep running when the client disconnects, hold a reference until done
+streamed_post_jobs: Set[asyncio.Task] = set()
+
+
+@ai_api_router.get("/stream_post_request")
+async def stream_post_request(
+    id: BusinessId,
+    mood: str,
+    tone: str,
+    description: str,
+    cache_bypass: Optional[str] = None,
+    profile: Optional[Literal["full", "fast"]] = None,
+) -> StreamingResponse:
+    """Run a post request and stream its progress as server-sent events.
+
+    Events are `stage` (stage started/done, with the stage result),
+    `token` (streamed chat tokens, by stage), then a final `done` with the
+    caption and picture URL, or `error`. The result is also persisted like
+    for `send_post_request`. When attached to an identical in-flight request,
+    only finished stages and the final event are sent. New requests run in
+    the same bounded job queue, a full queue is answered with 503.
+    """
+    if post_jobs.is_full():
+        raise HTTPException(status_code=503, detail="Too many post requests queued")
+
+    job, created = await asyncio.to_thread(
+        claim_post_job, id, mood, tone, description, cache_bypass, profile
     )
+    events: asyncio.Queue = asyncio.Queue()
 
-    # send post request
-    # generated_content = await our_ai_bot.generate_post_content()
-    log.info("getting intent")
-    intent = await our_ai_bot.understand_intent()
-    instagramCaptionPrompt = await our_ai_bot.create_prompt_caption()
-    imagePrompt = await our_ai_bot.create_prompt_image()
+    def on_event(event: str, data: dict) -> None:
+        events.put_nowait((event, data))
 
-    log.info(f"Intent: {intent}")
-    log.info(f"Prompt to generate Instagram Caption: {instagramCaptionPrompt}")
-    log.info(f"Prompt to generate Image: {imagePrompt}")
+    if created:
+        try:
+            task = post_jobs.submit({**job, "on_event": on_event})
+        except asyncio.QueueFull as error:
+            await async_database.update_post_request_info(
+                id,
+                {"status": "failed", "in_progress": False, "error": "Job queue full"},
+                expected_job_id=job["job_id"],
+            )
+            raise HTTPException(status_code=503, detail="Too many post requests queued") from error
+    else:
+        # Identical request in flight, follow its persisted progress instead
+        task = asyncio.create_task(wait_for_post_job(job, on_event=on_event))
+    streamed_post_jobs.add(task)
+    task.add_done_callback(streamed_post_jobs.discard)
+    task.add_done_callback(lambda _: events.put_nowait((None, {})))
 
-    instagramCaption = await our_ai_bot.create_instagram_caption()
-    generated_image = await our_ai_bot.generate_post_image()
+    async def event_stream() -> AsyncIterator[str]:
+        yield format_sse("queued" if created else "coalesced", {"job_id": job["job_id"]})
+        while True:
+            event, data = await events.get()
+            if event is None:
+                # Job ended without a final event, e.g. failed to persist progress
+                business_info = await async_database.get_business_info(id) or {}
+                post_request = business_info.get("post_request") or {}
+                if post_request.get("job_id") == job["job_id"]:
+                    if post_request.get("status") == "done":
+                        result = {"job_id": job["job_id"], **post_request["ai_response"]}
+                        yield format_sse("done", result)
+                        return
+                    if post_request.get("status") == "failed":
+                        error = post_request.get("error")
+                        yield format_sse("error", {"job_id": job["job_id"], "error": error})
+                        return
+                if task.cancelled():
+                    error = "cancelled"
+                elif task.exception() is not None:
+                    error = str(task.exception())
+                else:
+                    error = "Job ended without a result"
+                if created:
+                    await async_database.update_post_request_info(
+                        id,
+                        {"status": "failed", "in_progress": False, "error": error},
+                        expected_job_id=job["job_id"],
+                    )
+                yield format_sse("error", {"job_id": job["job_id"], "error": error})
+                return
+            yield format_sse(event, data)
+            if event in ("done", "error"):
+                return
 
-    responses = {"caption_text": instagramCaption['caption1'], "picture_url": generated_image}
-    database.set_ai_response(business_id=id, ai_response=responses)
-    return True
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @ai_api_router.post("/check_post_status")
-def check_post_status() -> bool:
+def check_post_status(id: BusinessId) -> dict:
     """Check status of OpenAPI request."""
-    return True
+    post_request = database.get_business_info(id).get("post_request")
+    if not post_request:
+        raise HTTPException(status_code=404, detail=f"No post request for business: {id}")
+    return {
+        "job_id": post_request.get("job_id"),
+        "status": post_request.get("status", "queued" if post_request["in_progress"] else "done"),
+        "in_progress": post_request["in_progress"],
+        "stages": post_request.get("stages", {}),
+        "error": post_request.get("error"),
+    }
+
+
+@ai_api_router.get("/get_post_metrics")
+def get_post_metrics(id: BusinessId) -> dict:
+    """Get per stage metrics of the last post job and totals of all post jobs of a business.
+
+    Stage metrics are wall time, rate budget queue time, prompt and
+    completion tokens, retries and whether the response came from cache.
+    """
+    business_info = database.get_business_info(id)
+    if not business_info:
+        raise HTTPException(status_code=404, detail=f"Business not found: {id}")
+    summary = dict(business_info.get("post_metrics") or {})
+    succeeded = summary.get("jobs", 0) - summary.get("failed_jobs", 0)
+    if succeeded:
+        summary["mean_wall_seconds"] = summary.get("wall_seconds", 0) / succeeded
+        summary["mean_tokens"] = (
+            summary.get("prompt_tokens", 0) + summary.get("completion_tokens", 0)
+        ) / succeeded
+    return {
+        "last_job": (business_info.get("post_request") or {}).get("metrics"),
+        "summary": summary,
+    }
 
 
 @ai_api_router.get("/get_post_data")
-def get_post_data(id: str) -> dict:
+def get_post_data(id: BusinessId) -> Any:
     """Get the data returened from OpenAPI if ready."""
-    business_info = database.get_business_info(id)
-    print("businessInfo", business_info["post_request"]["ai_response"])
-    return business_info["post_request"]["ai_response"]
+    post_request = database.get_business_info(id).get("post_request")
+    if not post_request:
+        raise HTTPException(status_code=404, detail=f"No post request for business: {id}")
+    if "ai_response" not in post_request or post_request["in_progress"]:
+        # Not ready yet (or failed), report job state instead
+        return JSONResponse(status_code=202, content=check_post_status(id))
+    return post_request["ai_response"]
+
+
+@ai_api_router.get("/images/{name}")
+def get_image(name: str, request: Request) -> Response:
+    """Serve a stored post image.
+
+    Images are content-addressed, so the ETag is the content hash and the
+    response may be cached forever.
+    """
+    filepath = image_store.get_filepath(name)
+    if filepath is None:
+        raise HTTPException(status_code=404, detail=f"Image not found: {name}")
+    headers = {
+        "ETag": image_store.get_etag(name),
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if headers["ETag"] in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(filepath, media_type=image_store.get_media_type(name), headers=headers)
+
+
+@ai_api_router.get("/get_cache_stats")
+def get_ai_cache_stats() -> dict:
+    """Get AI response cache hit rates per stage of this worker."""
+    if ai_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, "stages": ai_cache.get_stats()}
+
+
+@ai_api_router.get("/get_prompt_stats")
+def get_prompt_stats() -> dict:
+    """Get prompt template render timings and business context stats of this worker."""
+    return {"templates": prompts.get_stats(), "business_context": business_contexts.get_stats()}
+
+
+batch_scheduler = RequestScheduler(
+    RateBudget(settings.BATCH_REQUESTS_PER_MINUTE, settings.BATCH_TOKENS_PER_MINUTE),
+    max_retries=settings.BATCH_MAX_RETRIES,
+    base_delay=settings.BATCH_RETRY_BASE_DELAY,
+    max_delay=settings.BATCH_RETRY_MAX_DELAY,
+)
+
+
+async def run_batch_item(item: dict) -> bool:
+    """Create and run the post job of one business of a batch."""
+    job, created = await asyncio.to_thread(
+        claim_post_job,
+        item["business_id"],
+        item["mood"],
+        item["tone"],
+        item["description"],
+        item["cache_bypass"],
+        item["profile"],
+    )
+    if not created:
+        return await wait_for_post_job(job)
+    return await run_post_job(job, scheduler=batch_scheduler)
+
+
+post_batches = BatchRunner(
+    run_batch_item,
+    settings.BATCH_STATUS_DIRPATH,
+    concurrency=settings.BATCH_CONCURRENCY,
+    status_ttl_seconds=settings.BATCH_STATUS_TTL_SECONDS,
+    get_retries=lambda: batch_scheduler.retries,
+)
+
+
+@ai_api_router.post("/send_batch_post_request")
+async def send_batch_post_request(batch: BatchPostRequest) -> dict:
+    """Generate posts for many businesses in the background.
+
+    API calls of all batches of a worker share one requests and tokens per
+    minute budget, and are retried on rate limit and server errors. Use
+    `get_batch_status` to follow progress, results are stored per business
+    like for `send_post_request`.
+    """
+    items = [
+        {
+            "business_id": business_id,
+            "mood": batch.mood,
+            "tone": batch.tone,
+            "description": batch.description,
+            "cache_bypass": batch.cache_bypass,
+            "profile": batch.profile,
+        }
+        for business_id in batch.business_ids
+    ]
+    batch_id = post_batches.start(items, concurrency=batch.concurrency)
+    return {"batch_id": batch_id, "total": len(items)}
+
+
+@ai_api_router.get("/get_batch_status")
+def get_batch_status(batch_id: str) -> dict:
+    """Get progress of a batch post request."""
+    status = post_batches.get_status(batch_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Batch not found: {batch_id}")
+    return status
 
 
 app.include_router(ai_api_router, prefix="/ai_api")
@@ -217,31 +961,123 @@ app.include_router(ai_api_router, prefix="/ai_api")
 social_api_router = APIRouter(tags=["social"])
 
 
-@social_api_router.post("/post_to_instagram")
-def post_to_instagram() -> bool:
-    """Post to Instagram."""
-    return True
+def resolve_post_image(picture_url: str) -> Optional[str]:
+    """Get the local file of a post image, None if it is not stored locally."""
+    image_name = image_store.get_name(picture_url)
+    if image_name is None:
+        # Posts generated before the image store reference the upstream URL
+        return None
+    image_filepath = image_store.get_filepath(image_name)
+    if image_filepath is None:
+        raise PublishError(f"Post image was evicted: {image_name}")
+    return image_filepath
 
 
-@social_api_router.post("/post_to_twitter")
-def post_to_twitter(id: str) -> bool:
-    """Post to Twitter/x."""
+publish_outbox = Outbox(settings.PUBLISH_OUTBOX_FILEPATH)
+publish_dispatcher = PublishDispatcher(
+    publish_outbox,
+    create_publishers(settings, resolve_post_image),
+    concurrency=settings.PUBLISH_CONCURRENCY,
+    max_attempts=settings.PUBLISH_MAX_ATTEMPTS,
+    base_delay=settings.PUBLISH_RETRY_BASE_DELAY,
+    max_delay=settings.PUBLISH_RETRY_MAX_DELAY,
+    lease_seconds=settings.PUBLISH_LEASE_SECONDS,
+)
 
-    api_key = os.getenv("TWITTER_API_KEY")
-    api_secret = os.getenv("TWITTER_API_KEY_SECRET")
-    access_token = os.getenv("TWITTER_ACCESS_TOKEN")
-    access_token_secret = os.getenv("TWITTER_ACCESS_TOKEN_SECRET")
 
-    # get image and content from database
-    ai_response = database.get_business_info(business_id=id)["post_request"]["ai_response"]
-    twitter = Twitter(api_key, api_secret, access_token, access_token_secret)
+def format_delivery(delivery: dict) -> dict:
+    """Get the public fields of an outbox delivery."""
+    return {
+        key: delivery[key]
+        for key in (
+            "platform",
+            "status",
+            "attempts",
+            "platform_post_id",
+            "error",
+            "created_at",
+            "updated_at",
+        )
+    }
 
-    print(type(ai_response['caption_text']))
-    log.debug(f"Twitter: Posting caption: {ai_response['caption_text']}")
-    log.debug(f"Twitter: Posting picture URL: {ai_response['picture_url']}")
-    twitter.post(content=ai_response["caption_text"], image_url=ai_response["picture_url"])
 
-    return True
+async def publish_post(
+    business_id: str,
+    platforms: List[str],
+    idempotency_key: Optional[str] = None,
+    retry_interrupted: bool = False,
+) -> dict:
+    """Queue the generated post of a business for publishing.
+
+    Returns:
+        Publish ID and the state of the delivery to each platform
+    """
+    business_info = await async_database.get_business_info(business_id=business_id)
+    ai_response = ((business_info or {}).get("post_request") or {}).get("ai_response")
+    if not ai_response:
+        raise HTTPException(
+            status_code=404, detail=f"No generated post for business: {business_id}"
+        )
+    post = {"caption_text": ai_response["caption_text"], "picture_url": ai_response["picture_url"]}
+    try:
+        publish_id, deliveries = await publish_dispatcher.submit(
+            business_id, platforms, post, idempotency_key, retry_interrupted
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error)) from error
+    return {"publish_id": publish_id, "deliveries": [format_delivery(d) for d in deliveries]}
+
+
+@social_api_router.post("/publish", status_code=202)
+async def publish(publish_request: PublishRequest) -> dict:
+    """Publish the generated post of a business to several platforms.
+
+    Returns immediately, the post is stored in the outbox and published to
+    all platforms concurrently, with retries per platform. Use
+    `get_publish_status` to follow progress. Submitting the same post, or
+    the same `idempotency_key`, again never posts twice; only deliveries
+    that failed are retried. Deliveries interrupted mid-post on a platform
+    without idempotency keys may have been posted, they are only retried
+    with `retry_interrupted` set, after checking the platform.
+    """
+    return await publish_post(
+        publish_request.business_id,
+        publish_request.platforms,
+        publish_request.idempotency_key,
+        publish_request.retry_interrupted,
+    )
+
+
+@social_api_router.get("/get_publish_status")
+async def get_publish_status(publish_id: str) -> dict:
+    """Get the state of the delivery to each platform of a published post."""
+    deliveries = await asyncio.to_thread(publish_outbox.get_publish, publish_id)
+    if not deliveries:
+        raise HTTPException(status_code=404, detail=f"Publish not found: {publish_id}")
+    return {"publish_id": publish_id, "deliveries": [format_delivery(d) for d in deliveries]}
+
+
+@social_api_router.post("/post_to_instagram")
+async def post_to_instagram(id: BusinessId) -> dict:
+    """Post to Instagram, see `publish`."""
+    result = await publish_post(id, ["instagram"])
+    return {"publish_id": result["publish_id"], "status": result["deliveries"][0]["status"]}
+
+
+@social_api_router.post("/post_to_twitter")
+async def post_to_twitter(id: BusinessId) -> dict:
+    """Post to Twitter/x, see `publish`."""
+    result = await publish_post(id, ["twitter"])
+    return {"publish_id": result["publish_id"], "status": result["deliveries"][0]["status"]}
+
+
+@social_api_router.get("/get_twitter_publish_status")
+async def get_twitter_publish_status(id: BusinessId) -> dict:
+    """Get the state of the last Twitter post of a business."""
+    delivery = await asyncio.to_thread(publish_outbox.get_latest, id, "twitter")
+    if delivery is None:
+        raise HTTPException(status_code=404, detail=f"No Twitter post for business: {id}")
+    return {"publish_id": delivery["publish_id"], **format_delivery(delivery)}
 
 
 app.include_router(social_api_router, prefix="/social")
@@ -0,0 +1,193 @@
+"""Benchmark post generation overhead and concurrency against the fake AI provider.
+
+Usage:
+    python -m benchmarks.bench_post_pipeline --posts 200 --concurrency 1,10,50 --latency-ms 100
+    python -m benchmarks.bench_post_pipeline --mode server --posts 200 --concurrency 50
+    python -m benchmarks.bench_post_pipeline --profiles full,fast --concurrency 10
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from app.core.ai_bot.ai_bot import AiBot
+from app.core.ai_bot.business_context import BusinessContextBuilder
+from app.core.ai_bot.fake_provider import FakeProvider
+from app.core.ai_bot.prompt_registry import PromptRegistry
+
+BUSINESS_INFO = {
+    "name": "Burger Barn",
+    "description": "Fast food chain serving burgers since 1954",
+    "specifics": "Burgers, fries, shakes",
+}
+
+
+# Runs one post by index, returns its total tokens if known
+PostRunner = Callable[[int], Awaitable[Optional[int]]]
+
+
+async def run_concurrently(
+    run_post: PostRunner, posts: int, concurrency: int
+) -> Tuple[List[float], List[int]]:
+    """Run posts with bounded concurrency.
+
+    Returns:
+        Latency of each post in seconds, and tokens of each post that reported them
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, tokens = [], []
+
+    async def timed_post(index: int) -> None:
+        async with semaphore:
+            start_time = time.perf_counter()
+            post_tokens = await run_post(index)
+            latencies.append(time.perf_counter() - start_time)
+            if post_tokens is not None:
+                tokens.append(post_tokens)
+
+    await asyncio.gather(*(timed_post(index) for index in range(posts)))
+    return latencies, tokens
+
+
+def bot_runner(provider: FakeProvider, profile: str) -> PostRunner:
+    """Run the AiBot pipeline directly, without server, database or cache."""
+    prompts = PromptRegistry()
+    business_context = BusinessContextBuilder().build(BUSINESS_INFO)
+
+    async def run_post(index: int) -> int:
+        ai_bot = AiBot(
+            api_key=None,
+            mood="Happy",
+            tone="Playful",
+            description=f"Post number {index}",
+            businessInfo=business_context,
+            provider=provider,
+            prompts=prompts,
+            profile=profile,
+        )
+        post = await ai_bot.generate_post()
+        return sum(
+            stage["prompt_tokens"] + stage["completion_tokens"]
+            for stage in post["metrics"].values()
+        )
+
+    return run_post
+
+
+def server_runner(temp_dir: str, profile: str) -> PostRunner:
+    """Run posts end to end through the streaming endpoint of the app, in process."""
+    os.environ["DATABASE_SQLITE_FILEPATH"] = os.path.join(temp_dir, "database.sqlite3")
+    os.environ["AI_CACHE_FILEPATH"] = os.path.join(temp_dir, "ai_response_cache.sqlite3")
+    os.environ["POST_LOCKS_DIRPATH"] = os.path.join(temp_dir, "locks")
+    os.environ["BATCH_STATUS_DIRPATH"] = os.path.join(temp_dir, "batches")
+    import httpx  # pylint: disable=import-outside-toplevel
+
+    from app import main  # pylint: disable=import-outside-toplevel
+
+    business_id = main.database.create_business("Burger Barn", "Burgers", "Fries", "a@b.c", "x")[2]
+    transport = httpx.ASGITransport(app=main.app)
+
+    async def run_post(index: int) -> None:
+        # Token usage is not part of the event stream
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            params = {
+                "id": business_id,
+                "mood": "Happy",
+                "tone": "Playful",
+                "description": f"Post number {index}",
+                "cache_bypass": "all",
+                "profile": profile,
+            }
+            async with client.stream(
+                "GET", "/ai_api/stream_post_request", params=params
+            ) as response:
+                async for line in response.aiter_lines():
+                    if line in ("event: done", "event: error"):
+                        break
+
+    return run_post
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Get a percentile of a list of values."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def ideal_latency(profile: str, latency_ms: float, image_latency_ms: float) -> float:
+    """Get the latency of the longest dependent chain of a profile, in seconds."""
+    if profile == "fast":
+        # Plan, then image
+        return (latency_ms + image_latency_ms) / 1000
+    # Intent, caption prompt, caption (or image prompt, image)
+    return max(3 * latency_ms, 2 * latency_ms + image_latency_ms) / 1000
+
+
+async def benchmark(args: argparse.Namespace) -> None:
+    """Run the benchmark for every profile and concurrency level."""
+    profiles = args.profiles.split(",")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.mode == "server":
+            os.environ["AI_PROVIDER"] = "fake"
+            os.environ["FAKE_PROVIDER_LATENCY_MS"] = str(args.latency_ms)
+            os.environ["FAKE_PROVIDER_IMAGE_LATENCY_MS"] = str(args.image_latency_ms)
+            os.environ["FAKE_PROVIDER_LATENCY_DISTRIBUTION"] = "fixed"
+            runners = {profile: server_runner(temp_dir, profile) for profile in profiles}
+            from app import main  # pylint: disable=import-outside-toplevel
+
+            lifespan = main.lifespan(main.app)
+            await lifespan.__aenter__()
+        else:
+            provider = FakeProvider(
+                latency_ms=args.latency_ms,
+                image_latency_ms=args.image_latency_ms,
+                latency_distribution="fixed",
+            )
+            runners = {profile: bot_runner(provider, profile) for profile in profiles}
+
+        print(f"mode={args.mode} (fixed fake provider latency)")
+        print(
+            f"{'profile':>7} {'concurrency':>11} {'posts/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'overhead p50 ms':>16} {'tokens/post':>12}"
+        )
+        for profile in profiles:
+            ideal = ideal_latency(profile, args.latency_ms, args.image_latency_ms)
+            for concurrency in [int(level) for level in args.concurrency.split(",")]:
+                start_time = time.perf_counter()
+                latencies, tokens = await run_concurrently(
+                    runners[profile], args.posts, concurrency
+                )
+                elapsed = time.perf_counter() - start_time
+                p50 = statistics.median(latencies)
+                tokens_per_post = f"{statistics.mean(tokens):.0f}" if tokens else "-"
+                print(
+                    f"{profile:>7} {concurrency:>11} {args.posts / elapsed:>8.1f} "
+                    f"{p50 * 1000:>8.1f} {percentile(latencies, 0.95) * 1000:>8.1f} "
+                    f"{percentile(latencies, 0.99) * 1000:>8.1f} "
+                    f"{(p50 - ideal) * 1000:>16.1f} {tokens_per_post:>12}"
+                )
+
+        if args.mode == "server":
+            await lifespan.__aexit__(None, None, None)
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--mode", choices=("bot", "server"), default="bot")
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--concurrency", default="1,10,50")
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--image-latency-ms", type=float, default=200.0)
+    parser.add_argument("--profiles", default="full", help="Comma separated, e.g. full,fast")
+    args = parser.parse_args()
+    asyncio.run(benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
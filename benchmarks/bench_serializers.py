@@ -0,0 +1,103 @@
+"""Benchmark read/write throughput of the database snapshot formats.
+
+Usage:
+    python -m benchmarks.bench_serializers --sizes 10000,100000,1000000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Dict
+
+from app.core.database.serializers import SERIALIZERS
+
+
+def make_dataset(size: int) -> Dict[str, dict]:
+    """Create a dataset of businesses shaped like production records."""
+    return {
+        str(business_id): {
+            "name": f"Business {business_id}",
+            "description": "Fast food chain serving burgers since 1954",
+            "specifics": "Burgers, fries, shakes",
+            "email": f"owner{business_id}@example.com",
+            "password": "1234",
+            "post_request": {
+                "caption_mood": "Happy",
+                "cpation_tone": "Playful",
+                "caption_description": "Our new burger is the best thing since sliced bread",
+                "picture_prompt": "A cool burger joint",
+                "picture_size": "256x256",
+                "in_progress": False,
+                "ai_response": {
+                    "caption_text": "Try the new burger today! #burger #food",
+                    "picture_url": f"https://example.com/images/{business_id}.png",
+                },
+            },
+        }
+        for business_id in range(1, size + 1)
+    }
+
+
+def timed(function: Callable) -> float:
+    """Run a function once and return elapsed seconds."""
+    start_time = time.perf_counter()
+    function()
+    return time.perf_counter() - start_time
+
+
+def dump_pretty_json(data: dict, filepath: str) -> None:
+    """Write data the way the original database did (indent=4)."""
+    with open(filepath, "w", encoding="utf-8") as json_file:
+        json.dump(data, json_file, indent=4)
+
+
+def load_pretty_json(filepath: str) -> dict:
+    """Read data the way the original database did."""
+    with open(filepath, "r", encoding="utf-8") as json_file:
+        return json.load(json_file)
+
+
+def main() -> None:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+
+    print(
+        f"{'businesses':>10} {'format':>12} {'size MB':>9} {'write s':>8} {'read s':>8} {'rec/s read':>11}"
+    )
+    for size in [int(size) for size in args.sizes.split(",")]:
+        data = make_dataset(size)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filepath = os.path.join(temp_dir, "database")
+            write_time = timed(lambda: dump_pretty_json(data, filepath))
+            read_time = timed(lambda: load_pretty_json(filepath))
+            megabytes = os.path.getsize(filepath) / 1e6
+            print(
+                f"{size:>10} {'json-indent4':>12} {megabytes:>9.1f} "
+                f"{write_time:>8.2f} {read_time:>8.2f} {size / read_time:>11.0f}"
+            )
+
+            for name, serializer in SERIALIZERS.items():
+
+                def write() -> None:
+                    with open(filepath, "wb") as database_file:
+                        serializer.dump(data, database_file)
+
+                def read() -> None:
+                    with open(filepath, "rb") as database_file:
+                        assert len(serializer.load(database_file)) == size
+
+                write_time = timed(write)
+                read_time = timed(read)
+                megabytes = os.path.getsize(filepath) / 1e6
+                print(
+                    f"{size:>10} {name:>12} {megabytes:>9.1f} "
+                    f"{write_time:>8.2f} {read_time:>8.2f} {size / read_time:>11.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,8 @@ import json
 import multiprocessing
 import os
 
+from dotenv import dotenv_values
+
 host = os.getenv("HOST", "127.0.0.1")
 port = os.getenv("PORT", "9500")
 bind_env = os.getenv("BIND", None)
@@ -31,6 +33,14 @@ else:
     if USE_MAX_WORKERS:
         web_concurrency = min(web_concurrency, USE_MAX_WORKERS)
 
+# The json database backend keeps the dataset in one process and locks its files
+database_backend = os.getenv("DATABASE_BACKEND") or dotenv_values(".env").get("DATABASE_BACKEND")
+if (database_backend or "sqlite").lower() == "json" and web_concurrency > 1:
+    raise RuntimeError(
+        f"The json database backend supports a single worker only, got {web_concurrency}. "
+        'Set WEB_CONCURRENCY=1 or DATABASE_BACKEND="sqlite"'
+    )
+
 accesslog_var = os.getenv("ACCESS_LOG", "-")
 use_accesslog = accesslog_var or None
 errorlog_var = os.getenv("ERROR_LOG", "-")
@@ -0,0 +1,136 @@
+"""Tests of the database backends."""
+
+import os
+
+import pytest
+
+from app.core.database.database import Database
+from app.core.database.sharded_database import ShardedDatabase
+from app.core.database.sqlite_database import SqliteDatabase
+
+
+def crash(database: Database) -> None:
+    """Stop using a json database like a killed process would, without compacting."""
+    database._closed.set()
+    database._compaction_requested.set()
+    database._compaction_thread.join()
+    database._wal_file.close()
+    database._process_lock_file.close()
+
+
+def create(database, name: str) -> str:
+    """Create a business and return its ID."""
+    return database.create_business(name, "description", "specifics", f"{name}@mail", "pw")[2]
+
+
+def test_wal_replayed_after_crash(tmp_path):
+    filepath = str(tmp_path / "database.json")
+    database = Database(filepath, snapshot_interval=3600)
+    first_id = create(database, "first")
+    second_id = create(database, "second")
+    database.set_post_request_info(first_id, {"job_id": "job", "status": "queued"})
+    database.remove_business(second_id)
+    crash(database)
+    # A crash mid-append leaves a torn final line
+    with open(f"{filepath}.wal", "a", encoding="utf-8") as wal_file:
+        wal_file.write('{"op":"set","id":"9","rec')
+
+    database = Database(filepath, snapshot_interval=3600)
+    try:
+        # Recovered entries were compacted into the snapshot
+        assert os.path.getsize(f"{filepath}.wal") == 0
+        assert database.get_all_business_ids() == [int(first_id)]
+        assert database.get_business_info(first_id)["post_request"]["status"] == "queued"
+        assert database.get_business_info(email="first@mail")["name"] == "first"
+        # IDs of removed businesses are never handed out again
+        assert int(create(database, "third")) == int(second_id) + 1
+    finally:
+        database.close()
+
+
+def test_wal_replayed_after_crash_during_compaction(tmp_path):
+    filepath = str(tmp_path / "database.json")
+    database = Database(filepath, snapshot_interval=3600)
+    first_id = create(database, "first")
+    crash(database)
+    # Killed after rotating the log, before the new snapshot was written
+    os.replace(f"{filepath}.wal", f"{filepath}.wal.compacting")
+    with open(f"{filepath}.wal", "w", encoding="utf-8") as wal_file:
+        wal_file.write('{"op":"set","id":"2","record":{"name":"second"}}\n')
+
+    database = Database(filepath, snapshot_interval=3600)
+    try:
+        assert database.get_all_business_ids() == [int(first_id), 2]
+        assert not os.path.exists(f"{filepath}.wal.compacting")
+    finally:
+        database.close()
+
+
+def test_second_process_is_refused(tmp_path):
+    filepath = str(tmp_path / "database.json")
+    database = Database(filepath)
+    try:
+        with pytest.raises(RuntimeError, match="single process"):
+            Database(filepath)
+    finally:
+        database.close()
+
+
+def test_read_only_leaves_files_unchanged(tmp_path):
+    filepath = str(tmp_path / "database.json")
+    database = Database(filepath, snapshot_interval=3600)
+    business_id = create(database, "first")
+    crash(database)
+    files = {name: (tmp_path / name).read_bytes() for name in os.listdir(tmp_path)}
+
+    database = Database(filepath, read_only=True)
+    assert database.get_business_info(business_id)["name"] == "first"
+    database.close()
+    assert {name: (tmp_path / name).read_bytes() for name in os.listdir(tmp_path)} == files
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite", "sharded"])
+def test_update_post_request_info_checks_job_id(tmp_path, backend):
+    if backend == "json":
+        database = Database(str(tmp_path / "database.json"))
+    elif backend == "sqlite":
+        database = SqliteDatabase(str(tmp_path / "database.sqlite3"))
+    else:
+        database = ShardedDatabase(str(tmp_path / "shards"))
+    try:
+        business_id = create(database, "first")
+        database.set_post_request_info(business_id, {"job_id": "new", "status": "queued"})
+
+        stale = database.update_post_request_info(
+            business_id, {"status": "done"}, expected_job_id="old"
+        )
+        assert stale is None
+        assert database.get_business_info(business_id)["post_request"]["status"] == "queued"
+
+        current = database.update_post_request_info(
+            business_id, {"status": "running"}, expected_job_id="new"
+        )
+        assert current["post_request"] == {"job_id": "new", "status": "running"}
+    finally:
+        database.close()
+
+
+def test_sqlite_imports_json_database_once(tmp_path):
+    json_filepath = str(tmp_path / "database.json")
+    database = Database(json_filepath)
+    first_id = create(database, "first")
+    second_id = create(database, "second")
+    database.remove_business(second_id)
+    database.close()
+
+    sqlite_database = SqliteDatabase(str(tmp_path / "database.sqlite3"))
+    try:
+        assert sqlite_database.import_json_database(json_filepath) == 1
+        assert sqlite_database.get_business_info(first_id)["name"] == "first"
+        assert int(create(sqlite_database, "third")) == int(second_id) + 1
+
+        sqlite_database.remove_all_businesses()
+        assert sqlite_database.import_json_database(json_filepath) == 0
+        assert sqlite_database.get_all_business_ids() == []
+    finally:
+        sqlite_database.close()
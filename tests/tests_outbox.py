@@ -0,0 +1,99 @@
+"""Tests of the publish outbox."""
+
+from app.core.social.outbox import INTERRUPTED_ERROR, Outbox
+
+POST = {"caption_text": "caption", "picture_url": "http://picture"}
+
+
+def make_outbox(tmp_path) -> Outbox:
+    """Open an empty outbox."""
+    return Outbox(str(tmp_path / "outbox.sqlite3"))
+
+
+def test_claim_holds_lease(tmp_path):
+    outbox = make_outbox(tmp_path)
+    outbox.add("1", ["twitter", "fake"], POST, "key")
+
+    claimed = outbox.claim("twitter", limit=10, lease_seconds=60)
+    assert [delivery["platform"] for delivery in claimed] == ["twitter"]
+    assert claimed[0]["status"] == "running"
+    assert claimed[0]["attempts"] == 1
+    # Leased deliveries are not handed out twice
+    assert outbox.claim("twitter", limit=10, lease_seconds=60) == []
+
+    outbox.complete(claimed[0]["idempotency_key"], "post-1")
+    delivery = outbox.get_latest("1", "twitter")
+    assert delivery["status"] == "done"
+    assert delivery["platform_post_id"] == "post-1"
+    assert delivery["lease_until"] is None
+
+
+def test_expired_lease_reclaimed_when_idempotent(tmp_path):
+    outbox = make_outbox(tmp_path)
+    outbox.add("1", ["fake"], POST, "key")
+    outbox.claim("fake", limit=10, lease_seconds=-1)
+
+    claimed = outbox.claim("fake", limit=10, lease_seconds=60, reclaim_expired=True)
+    assert len(claimed) == 1
+    assert claimed[0]["attempts"] == 2
+
+
+def test_expired_lease_failed_when_not_idempotent(tmp_path):
+    outbox = make_outbox(tmp_path)
+    outbox.add("1", ["twitter"], POST, "key")
+    outbox.claim("twitter", limit=10, lease_seconds=-1)
+
+    assert outbox.claim("twitter", limit=10, lease_seconds=60, reclaim_expired=False) == []
+    delivery = outbox.get_latest("1", "twitter")
+    assert delivery["status"] == "failed"
+    assert delivery["error"] == INTERRUPTED_ERROR
+
+
+def test_same_key_never_posts_twice(tmp_path):
+    outbox = make_outbox(tmp_path)
+    first = outbox.add("1", ["twitter"], POST, "key")
+    key = first[0]["idempotency_key"]
+    outbox.claim("twitter", limit=10, lease_seconds=60)
+    outbox.complete(key, "post-1")
+
+    again = outbox.add("1", ["twitter"], {**POST, "caption_text": "other"}, "key")
+    assert again[0]["idempotency_key"] == key
+    assert again[0]["status"] == "done"
+    assert again[0]["post"] == POST
+    assert outbox.claim("twitter", limit=10, lease_seconds=60) == []
+
+
+def test_resubmit_queues_failed_delivery(tmp_path):
+    outbox = make_outbox(tmp_path)
+    key = outbox.add("1", ["twitter"], POST, "key")[0]["idempotency_key"]
+    outbox.claim("twitter", limit=10, lease_seconds=60)
+    outbox.fail(key, "Rejected by platform")
+
+    again = outbox.add("1", ["twitter"], POST, "key")
+    assert again[0]["status"] == "pending"
+    assert again[0]["attempts"] == 0
+    assert again[0]["error"] is None
+
+
+def test_resubmit_keeps_interrupted_delivery_failed(tmp_path):
+    outbox = make_outbox(tmp_path)
+    outbox.add("1", ["twitter"], POST, "key")
+    outbox.claim("twitter", limit=10, lease_seconds=-1)
+    outbox.claim("twitter", limit=10, lease_seconds=60, reclaim_expired=False)
+
+    again = outbox.add("1", ["twitter"], POST, "key")
+    assert again[0]["status"] == "failed"
+    assert again[0]["error"] == INTERRUPTED_ERROR
+
+    retried = outbox.add("1", ["twitter"], POST, "key", retry_interrupted=True)
+    assert retried[0]["status"] == "pending"
+
+
+def test_release_does_not_count_attempt(tmp_path):
+    outbox = make_outbox(tmp_path)
+    key = outbox.add("1", ["fake"], POST, "key")[0]["idempotency_key"]
+    outbox.claim("fake", limit=10, lease_seconds=60)
+    outbox.release(key)
+
+    claimed = outbox.claim("fake", limit=10, lease_seconds=60)
+    assert claimed[0]["attempts"] == 1
@@ -0,0 +1,122 @@
+"""Tests of the post request jobs."""
+
+import os
+import tempfile
+
+# The app is configured at import time, point all its files at a scratch directory
+SCRATCH_DIRPATH = tempfile.mkdtemp(prefix="post-jobs-")
+os.environ.update(
+    AI_PROVIDER="fake",
+    AI_CACHE_ENABLED="false",
+    FAKE_PROVIDER_LATENCY_MS="0",
+    FAKE_PROVIDER_IMAGE_LATENCY_MS="0",
+    DATABASE_BACKEND="sqlite",
+    DATABASE_JSON_FILEPATH=os.path.join(SCRATCH_DIRPATH, "database.json"),
+    DATABASE_SQLITE_FILEPATH=os.path.join(SCRATCH_DIRPATH, "database.sqlite3"),
+    IMAGE_STORE_DIRPATH=os.path.join(SCRATCH_DIRPATH, "images"),
+    BATCH_STATUS_DIRPATH=os.path.join(SCRATCH_DIRPATH, "batches"),
+    POST_LOCKS_DIRPATH=os.path.join(SCRATCH_DIRPATH, "locks"),
+    PUBLISH_OUTBOX_FILEPATH=os.path.join(SCRATCH_DIRPATH, "outbox.sqlite3"),
+)
+
+# pylint: disable=wrong-import-position
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.core.ai_bot.ai_bot import AiBot
+
+
+@pytest.fixture(scope="module")
+def client():
+    """Run the app, so its AI provider and image store are open."""
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def business_id(client):
+    """Create a business."""
+    return main.database.create_business("Bakery", "Bread", "Rye", "bakery@mail", "pw")[2]
+
+
+def get_post_request(business_id: str) -> dict:
+    """Get the persisted post request of a business."""
+    return main.database.get_business_info(business_id)["post_request"]
+
+
+def run_job(client, job: dict) -> tuple:
+    """Run a post job on the app's event loop and collect its events."""
+    events = []
+    success = client.portal.call(main.run_post_job, job, lambda event, data: events.append(event))
+    return success, events
+
+
+def test_job_runs_from_queued_to_done(client, business_id):
+    job, created = main.claim_post_job(business_id, "happy", "warm", "fresh bread", None)
+    assert created
+    assert get_post_request(business_id)["status"] == "queued"
+
+    success, events = run_job(client, job)
+    assert success
+    assert events[-1] == "done"
+    post_request = get_post_request(business_id)
+    assert post_request["status"] == "done"
+    assert post_request["in_progress"] is False
+    assert post_request["ai_response"]["caption_text"]
+    assert post_request["stages"]
+    assert all(status == "done" for status in post_request["stages"].values())
+
+
+def test_failed_job_is_persisted(client, business_id, monkeypatch):
+    async def generate_post(self, **kwargs):
+        raise RuntimeError("Provider down")
+
+    monkeypatch.setattr(AiBot, "generate_post", generate_post)
+    job, _ = main.claim_post_job(business_id, "happy", "warm", "fresh bread", None)
+
+    success, events = run_job(client, job)
+    assert not success
+    assert events[-1] == "error"
+    post_request = get_post_request(business_id)
+    assert post_request["status"] == "failed"
+    assert post_request["error"] == "Provider down"
+    assert post_request["in_progress"] is False
+
+
+def test_invalid_post_fails_job(client, business_id, monkeypatch):
+    async def generate_post(self, **kwargs):
+        return {"caption": "not captions", "image": "http://picture"}
+
+    monkeypatch.setattr(AiBot, "generate_post", generate_post)
+    job, _ = main.claim_post_job(business_id, "happy", "warm", "fresh bread", None)
+
+    success, _ = run_job(client, job)
+    assert not success
+    assert get_post_request(business_id)["status"] == "failed"
+
+
+def test_replaced_job_leaves_newer_request(client, business_id):
+    old_job, _ = main.claim_post_job(business_id, "happy", "warm", "fresh bread", None)
+    new_job, created = main.claim_post_job(business_id, "sad", "dry", "stale bread", None)
+    assert created
+
+    success, events = run_job(client, old_job)
+    assert not success
+    assert events[-1] == "error"
+    post_request = get_post_request(business_id)
+    assert post_request["job_id"] == new_job["job_id"]
+    assert post_request["status"] == "queued"
+    assert "ai_response" not in post_request
+
+
+def test_identical_request_coalesces(client, business_id):
+    job, _ = main.claim_post_job(business_id, "happy", "warm", "fresh bread", None)
+
+    same_job, created = main.claim_post_job(business_id, "happy", "warm", "fresh bread", None)
+    assert not created
+    assert same_job["job_id"] == job["job_id"]
+
+    bypass_job, created = main.claim_post_job(business_id, "happy", "warm", "fresh bread", "all")
+    assert created
+    assert bypass_job["job_id"] != job["job_id"]